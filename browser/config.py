@@ -17,12 +17,31 @@ DEFAULT_CONFIG = {
     "urls": {
         "home": "https://duckduckgo.com",
         "search_engine": "https://duckduckgo.com/?q={query}",
-        "new_tab": "https://duckduckgo.com"
+        "new_tab": "pybrowser://newtab"
     },
     "database": {
         "max_history_entries": 10000,
         "auto_save_interval": 30  # segundos
     },
+    "visited_filter": {
+        "capacity": 1000000,
+        "false_positive_rate": 0.01,
+        "max_memory_mb": 16
+    },
+    "content_filter": {
+        "enabled": True  # listas *.txt en <data_dir>/filters
+    },
+    "tabs": {
+        "spare_pool_size": 1,
+        "spare_min_available_mb": 512,
+        "spare_refill_delay_ms": 1000,
+        "freeze_after_s": 300,
+        "discard_after_s": 1800,
+        "discard_min_available_mb": 512,
+        "lifecycle_check_interval_ms": 30000,
+        "restore_background_interval_ms": 0,  # 0: cargar solo al seleccionar
+        "session_debounce_ms": 1000
+    },
     "ui": {
         "show_status_bar": True,
         "show_toolbar": True,
@@ -179,6 +198,18 @@ QListWidget::item:hover {
     background-color: #e9ecef;
 }
 
+QListView {
+    background-color: white;
+    border: 1px solid #ced4da;
+    border-radius: 4px;
+    padding: 4px;
+}
+
+QListView::item:selected {
+    background-color: #007bff;
+    color: white;
+}
+
 QTableWidget {
     background-color: white;
     border: 1px solid #ced4da;
@@ -0,0 +1,524 @@
+"""
+Motor de bloqueo de contenido con reglas de estilo EasyList
+Compila las listas de filtros en un conjunto de hosts y un índice de reglas por
+token, y guarda el resultado en disco para arrancar rápido
+"""
+
+import marshal
+import os
+import re
+import shutil
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .public_suffix import registrable_domain
+
+# Versión del formato compilado; una caché de otra versión se recompila
+CACHE_VERSION = 2
+
+# Bits de los tipos de recurso de las opciones de las reglas ($script, $image...)
+RESOURCE_TYPES = {
+    'document': 1 << 0,
+    'subdocument': 1 << 1,
+    'stylesheet': 1 << 2,
+    'script': 1 << 3,
+    'image': 1 << 4,
+    'font': 1 << 5,
+    'media': 1 << 6,
+    'object': 1 << 7,
+    'xmlhttprequest': 1 << 8,
+    'ping': 1 << 9,
+    'websocket': 1 << 10,
+    'other': 1 << 11,
+}
+TYPE_ALIASES = {'css': 'stylesheet', 'frame': 'subdocument', 'xhr': 'xmlhttprequest',
+                'object-subrequest': 'object', 'beacon': 'ping'}
+# Sin opciones de tipo, una regla se aplica a todo salvo al documento principal
+DEFAULT_TYPE_MASK = sum(RESOURCE_TYPES.values()) & ~RESOURCE_TYPES['document']
+
+# Origen de la petición respecto a la página
+PARTY_ANY = 0
+PARTY_THIRD = 1
+PARTY_FIRST = 2
+
+# Tamaño medio estimado de cada tipo de recurso, para estimar los bytes ahorrados
+RESOURCE_SIZE_ESTIMATES = {
+    'subdocument': 60000,
+    'stylesheet': 15000,
+    'script': 30000,
+    'image': 20000,
+    'font': 40000,
+    'media': 200000,
+    'object': 50000,
+    'xmlhttprequest': 5000,
+    'ping': 500,
+    'websocket': 0,
+    'other': 5000,
+}
+
+# Los tokens son tramos alfanuméricos; los muy frecuentes no sirven de índice
+TOKEN_RE = re.compile(r'[a-z0-9%]{2,}')
+BAD_TOKENS = frozenset({'http', 'https', 'www', 'com', 'net', 'org', 'js', 'html', 'php'})
+HOST_RULE_RE = re.compile(r'^\|\|([a-z0-9][a-z0-9.\-]*[a-z0-9])\^\|?$')
+URL_HOST_RE = re.compile(r'^[a-z][a-z0-9+.\-]*://(?:[^@/?#]*@)?(\[[^\]]*\]|[^:/?#]*)')
+
+# Equivalente regex del separador ^: cualquier carácter que no sea parte de un token, o el final
+SEPARATOR_REGEX = r'(?:[^\w\-.%]|$)'
+
+# Regla compilada: (regex, máscara de tipos, origen, dominios incluidos,
+# dominios excluidos, distingue mayúsculas)
+Rule = Tuple[str, int, int, Tuple[str, ...], Tuple[str, ...], bool]
+
+def url_host(url: str) -> str:
+    """Extraer el host de una URL en minúsculas"""
+    match = URL_HOST_RE.match(url)
+    return match.group(1) if match else ''
+
+def _host_matches(host: str, domains: Iterable[str]) -> bool:
+    """Comprobar si el host es alguno de los dominios o un subdominio suyo"""
+    for domain in domains:
+        if host == domain or host.endswith('.' + domain):
+            return True
+    return False
+
+def pattern_to_regex(pattern: str) -> str:
+    """
+    Convertir un patrón de filtro (con *, ^, | y ||) en una expresión regular
+
+    Args:
+        pattern: Patrón sin opciones
+
+    Returns:
+        Código fuente de la expresión regular equivalente
+    """
+    if len(pattern) > 2 and pattern.startswith('/') and pattern.endswith('/'):
+        return pattern[1:-1]
+
+    prefix = suffix = ''
+    if pattern.startswith('||'):
+        # Inicio del host o de cualquiera de sus subdominios
+        prefix = r'^[a-z][a-z0-9+.\-]*://(?:[^/?#]*\.)?'
+        pattern = pattern[2:]
+    elif pattern.startswith('|'):
+        prefix = '^'
+        pattern = pattern[1:]
+    if pattern.endswith('|'):
+        suffix = '$'
+        pattern = pattern[:-1]
+
+    parts = []
+    for char in pattern:
+        if char == '*':
+            parts.append('.*')
+        elif char == '^':
+            parts.append(SEPARATOR_REGEX)
+        else:
+            parts.append(re.escape(char))
+    return prefix + ''.join(parts) + suffix
+
+def best_token(pattern: str) -> Optional[str]:
+    """
+    Elegir el token del patrón que se usará como índice
+
+    Solo sirven los tokens que seguro aparecen completos en las URLs que
+    coinciden: no pueden tocar un comodín ni un extremo sin ancla.
+
+    Returns:
+        El token más largo utilizable, o None si no hay ninguno
+    """
+    if pattern.startswith('/') and pattern.endswith('/'):
+        return None
+    lowered = pattern.lower()
+    anchored_start = lowered.startswith('|')
+    anchored_end = lowered.endswith(('|', '^'))
+    body = lowered.lstrip('|')
+
+    best = None
+    for match in TOKEN_RE.finditer(body):
+        start, end = match.span()
+        if start > 0 and body[start - 1] == '*':
+            continue
+        if start == 0 and not anchored_start:
+            continue
+        if end < len(body) and body[end] == '*':
+            continue
+        if end == len(body) and not anchored_end:
+            continue
+        token = match.group()
+        if token in BAD_TOKENS:
+            continue
+        if best is None or len(token) > len(best):
+            best = token
+    return best
+
+def parse_rule(line: str) -> Optional[Tuple[bool, Optional[str], Optional[Rule], Optional[str]]]:
+    """
+    Interpretar una línea de una lista de filtros
+
+    Args:
+        line: Línea de la lista
+
+    Returns:
+        (es_excepción, host, regla, token): `host` está presente para las reglas
+        de host simples (||dominio^) y `regla` para el resto; None si la línea
+        es un comentario, una regla cosmética o usa opciones no soportadas
+    """
+    line = line.strip()
+    if not line or line.startswith(('!', '[')) or '##' in line or '#@#' in line \
+            or '#?#' in line or '#$#' in line:
+        return None
+
+    is_exception = line.startswith('@@')
+    if is_exception:
+        line = line[2:]
+
+    options = ''
+    dollar = line.rfind('$')
+    # Un $ dentro de una regla regex no separa opciones
+    if dollar > 0 and not (line.startswith('/') and line.endswith('/')):
+        line, options = line[:dollar], line[dollar + 1:]
+    pattern = line
+    if not pattern or pattern in ('*', '|', '||'):
+        return None
+
+    type_mask = 0
+    excluded_types = 0
+    party = PARTY_ANY
+    include_domains: List[str] = []
+    exclude_domains: List[str] = []
+    match_case = False
+    for option in filter(None, options.split(',')):
+        option = option.strip().lower()
+        negated = option.startswith('~')
+        name = option.lstrip('~')
+        name = TYPE_ALIASES.get(name, name)
+        if name in RESOURCE_TYPES:
+            if negated:
+                excluded_types |= RESOURCE_TYPES[name]
+            else:
+                type_mask |= RESOURCE_TYPES[name]
+        elif name in ('third-party', '3p'):
+            party = PARTY_FIRST if negated else PARTY_THIRD
+        elif name in ('first-party', '1p'):
+            party = PARTY_THIRD if negated else PARTY_FIRST
+        elif name.startswith('domain='):
+            for domain in option[len('domain='):].split('|'):
+                if domain.startswith('~'):
+                    exclude_domains.append(domain[1:])
+                elif domain:
+                    include_domains.append(domain)
+        elif name == 'match-case':
+            match_case = True
+        elif name == 'important':
+            continue
+        else:
+            # Opción no soportada ($popup, $csp, $redirect...): se ignora la
+            # regla antes que bloquear de más
+            return None
+
+    if not type_mask:
+        type_mask = DEFAULT_TYPE_MASK
+    type_mask &= ~excluded_types
+
+    if not options:
+        host_match = HOST_RULE_RE.match(pattern.lower())
+        if host_match:
+            return is_exception, host_match.group(1), None, None
+
+    if len(pattern) > 2 and pattern.startswith('/') and pattern.endswith('/'):
+        # Una regex literal no se pasa a minúsculas (\D, \W, \S o \B cambiarían
+        # de significado): sin $match-case se marca como insensible
+        source = pattern_to_regex(pattern)
+        if not match_case:
+            source = '(?i)' + source
+        # Los patrones normales siempre dan una regex válida; las literales no
+        try:
+            re.compile(source)
+        except re.error:
+            return None
+    else:
+        source = pattern_to_regex(pattern if match_case else pattern.lower())
+    rule = (source, type_mask, party, tuple(include_domains), tuple(exclude_domains), match_case)
+    return is_exception, None, rule, best_token(pattern)
+
+class RuleSet:
+    """Reglas de bloqueo (o de excepción) compiladas"""
+
+    def __init__(self):
+        self.hosts = set()
+        self.rules: List[Rule] = []
+        self.token_index: Dict[str, List[int]] = {}
+        self.untokenized: List[int] = []
+        self._compiled: Dict[int, re.Pattern] = {}
+
+    def add_host(self, host: str):
+        self.hosts.add(host)
+
+    def add_rule(self, rule: Rule, token: Optional[str]):
+        index = len(self.rules)
+        self.rules.append(rule)
+        if token:
+            self.token_index.setdefault(token, []).append(index)
+        else:
+            self.untokenized.append(index)
+
+    def __len__(self) -> int:
+        return len(self.hosts) + len(self.rules)
+
+    def to_data(self) -> tuple:
+        """Convertir a tipos básicos serializables con marshal"""
+        return (self.hosts, self.rules, self.token_index, self.untokenized)
+
+    @classmethod
+    def from_data(cls, data: tuple) -> "RuleSet":
+        rule_set = cls()
+        rule_set.hosts, rule_set.rules, rule_set.token_index, rule_set.untokenized = data
+        return rule_set
+
+    def match_host(self, host: str) -> bool:
+        """Comprobar el host y cada uno de sus dominios padre en el conjunto de hosts"""
+        hosts = self.hosts
+        while host:
+            if host in hosts:
+                return True
+            dot = host.find('.')
+            if dot < 0:
+                return False
+            host = host[dot + 1:]
+        return False
+
+    def match(self, url: str, url_lower: str, tokens: Iterable[str], type_bit: int,
+              third_party: bool, page_host: str) -> bool:
+        """Comprobar las reglas de patrón indexadas por los tokens de la URL"""
+        token_index = self.token_index
+        for token in tokens:
+            indices = token_index.get(token)
+            if indices and self._match_any(indices, url, url_lower, type_bit,
+                                           third_party, page_host):
+                return True
+        return bool(self.untokenized) and self._match_any(
+            self.untokenized, url, url_lower, type_bit, third_party, page_host)
+
+    def _match_any(self, indices: List[int], url: str, url_lower: str, type_bit: int,
+                   third_party: bool, page_host: str) -> bool:
+        rules = self.rules
+        for index in indices:
+            source, type_mask, party, include_domains, exclude_domains, match_case = rules[index]
+            if not type_mask & type_bit:
+                continue
+            if party == PARTY_THIRD and not third_party or party == PARTY_FIRST and third_party:
+                continue
+            if include_domains and not _host_matches(page_host, include_domains):
+                continue
+            if exclude_domains and _host_matches(page_host, exclude_domains):
+                continue
+            regex = self._compiled.get(index)
+            if regex is None:
+                # Se compila al usarla por primera vez: la mayoría nunca se usa
+                regex = self._compiled[index] = re.compile(source)
+            if regex.search(url if match_case else url_lower):
+                return True
+        return False
+
+class ContentFilter:
+    """
+    Filtro de contenido compartido por todas las ventanas de un perfil
+
+    Las listas (*.txt) se leen de `<data_dir>/filters`; el resultado compilado
+    se guarda junto a ellas y se reutiliza mientras las listas no cambien.
+    Hasta que termina de cargarse no bloquea nada.
+    """
+
+    DIRNAME = "filters"
+    CACHE_FILENAME = "compiled.cache"
+
+    _instances: Dict[str, "ContentFilter"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, lists_dir: str):
+        """
+        Args:
+            lists_dir: Directorio con las listas de filtros
+        """
+        self.lists_dir = lists_dir
+        self.cache_path = os.path.join(lists_dir, self.CACHE_FILENAME)
+        self._block = RuleSet()
+        self._allow = RuleSet()
+        self._lock = threading.Lock()
+        self._load_thread: Optional[threading.Thread] = None
+        self.ready = False
+
+        # Métricas
+        self.requests_checked = 0
+        self.requests_blocked = 0
+
+    @classmethod
+    def for_data_dir(cls, data_dir: str) -> "ContentFilter":
+        """Obtener la instancia compartida para un directorio de datos"""
+        lists_dir = os.path.join(data_dir, cls.DIRNAME)
+        with cls._instances_lock:
+            instance = cls._instances.get(lists_dir)
+            if instance is None:
+                instance = cls(lists_dir)
+                cls._instances[lists_dir] = instance
+            return instance
+
+    @property
+    def rule_count(self) -> int:
+        """Número de reglas de bloqueo y de excepción cargadas"""
+        return len(self._block) + len(self._allow)
+
+    def list_files(self) -> List[str]:
+        """Rutas de las listas de filtros, en orden"""
+        try:
+            names = sorted(name for name in os.listdir(self.lists_dir) if name.endswith('.txt'))
+        except OSError:
+            return []
+        return [os.path.join(self.lists_dir, name) for name in names]
+
+    def add_list(self, path: str) -> str:
+        """
+        Copiar una lista de filtros al directorio de listas (hay que recargar después)
+
+        Returns:
+            Ruta de la copia
+        """
+        os.makedirs(self.lists_dir, exist_ok=True)
+        target = os.path.join(self.lists_dir, os.path.basename(path))
+        if not target.endswith('.txt'):
+            target += '.txt'
+        shutil.copyfile(path, target)
+        return target
+
+    def _sources(self, paths: List[str]) -> List[Tuple[str, int, int]]:
+        sources = []
+        for path in paths:
+            stat = os.stat(path)
+            sources.append((os.path.basename(path), stat.st_mtime_ns, stat.st_size))
+        return sources
+
+    @staticmethod
+    def compile_lines(lines: Iterable[str]) -> Tuple[RuleSet, RuleSet]:
+        """
+        Compilar reglas de filtro
+
+        Returns:
+            (reglas de bloqueo, reglas de excepción)
+        """
+        block, allow = RuleSet(), RuleSet()
+        for line in lines:
+            parsed = parse_rule(line)
+            if parsed is None:
+                continue
+            is_exception, host, rule, token = parsed
+            target = allow if is_exception else block
+            if host:
+                target.add_host(host)
+            else:
+                target.add_rule(rule, token)
+        return block, allow
+
+    def load(self) -> bool:
+        """
+        Cargar las listas, desde la caché compilada si sigue siendo válida
+
+        Returns:
+            True si se cargó alguna regla
+        """
+        try:
+            paths = self.list_files()
+            sources = self._sources(paths)
+            cached = self._read_cache(sources)
+            if cached is not None:
+                block, allow = cached
+            else:
+                block, allow = self.compile_lines(self._iter_lines(paths))
+                self._write_cache(sources, block, allow)
+        except OSError as e:
+            print(f"Error al cargar las listas de filtros: {e}")
+            return False
+
+        with self._lock:
+            self._block, self._allow = block, allow
+            self.ready = True
+        return self.rule_count > 0
+
+    def _iter_lines(self, paths: List[str]) -> Iterable[str]:
+        for path in paths:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                yield from f
+
+    def _read_cache(self, sources: List[Tuple[str, int, int]]) -> Optional[Tuple[RuleSet, RuleSet]]:
+        try:
+            with open(self.cache_path, 'rb') as f:
+                data = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if not isinstance(data, dict) or data.get('version') != CACHE_VERSION \
+                or data.get('sources') != sources:
+            return None
+        return RuleSet.from_data(data['block']), RuleSet.from_data(data['allow'])
+
+    def _write_cache(self, sources: List[Tuple[str, int, int]], block: RuleSet, allow: RuleSet):
+        if not sources:
+            return
+        temp_path = self.cache_path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            marshal.dump({'version': CACHE_VERSION, 'sources': sources,
+                          'block': block.to_data(), 'allow': allow.to_data()}, f)
+        os.replace(temp_path, self.cache_path)
+
+    def start_load(self) -> threading.Thread:
+        """Cargar (o recargar) las listas en un hilo en segundo plano"""
+        with self._lock:
+            if self._load_thread and self._load_thread.is_alive():
+                return self._load_thread
+            self._load_thread = threading.Thread(
+                target=self.load, name="content-filter-load", daemon=True)
+        self._load_thread.start()
+        return self._load_thread
+
+    def ensure_loaded(self):
+        """Cargar las listas una sola vez por proceso"""
+        if self._load_thread is None:
+            self.start_load()
+
+    def should_block(self, url: str, page_url: str = '', resource_type: str = 'other') -> bool:
+        """
+        Decidir si una petición debe bloquearse
+
+        Args:
+            url: URL pedida
+            page_url: URL de la página que hace la petición
+            resource_type: Tipo de recurso (clave de RESOURCE_TYPES)
+
+        Returns:
+            True si alguna regla de bloqueo coincide y ninguna de excepción
+        """
+        block, allow = self._block, self._allow
+        if not block:
+            return False
+        self.requests_checked += 1
+
+        url_lower = url.lower()
+        host = url_host(url_lower)
+        page_host = url_host(page_url.lower()) if page_url else ''
+        third_party = bool(page_host) and registrable_domain(host) != registrable_domain(page_host)
+        type_bit = RESOURCE_TYPES.get(resource_type, RESOURCE_TYPES['other'])
+
+        tokens = None
+        if not block.match_host(host):
+            tokens = set(TOKEN_RE.findall(url_lower))
+            if not block.match(url, url_lower, tokens, type_bit, third_party, page_host):
+                return False
+
+        if allow:
+            if allow.match_host(host):
+                return False
+            if tokens is None:
+                tokens = set(TOKEN_RE.findall(url_lower))
+            if allow.match(url, url_lower, tokens, type_bit, third_party, page_host):
+                return False
+
+        self.requests_blocked += 1
+        return True
@@ -0,0 +1,286 @@
+"""
+Exportación e importación de datos del usuario
+Historial, favoritos y cookies en NDJSON o en un formato binario comprimido
+"""
+
+import gzip
+import json
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Formatos soportados
+FORMAT_NDJSON = "ndjson"
+FORMAT_BINARY = "pybx"
+
+# Secciones exportables
+EXPORT_SECTIONS = ("history", "favorites", "cookies")
+
+# Cabecera del formato binario (dentro del flujo gzip)
+BINARY_MAGIC = b"PYBX\x01"
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Etiquetas y campos de cada tipo de registro en el formato binario.
+# "favorite" (marcadores sin carpetas) solo se lee, de exportaciones anteriores;
+# ahora se exporta el árbol completo como "bookmark"
+RECORD_FIELDS = {
+    "history": ("url", "title", "visit_time", "visit_count", "is_favorite"),
+    "favorite": ("url", "title"),
+    "cookie": ("domain", "name", "value", "path", "expires", "secure", "http_only"),
+    "bookmark": ("id", "parent_id", "position", "title", "url"),
+}
+RECORD_TAGS = {"history": 1, "favorite": 2, "cookie": 3, "bookmark": 4}
+TAG_RECORDS = {tag: record for record, tag in RECORD_TAGS.items()}
+INTEGER_FIELDS = {"visit_count", "is_favorite", "secure", "http_only", "id", "parent_id", "position"}
+
+# Cada cuántos registros se invoca el callback de progreso
+PROGRESS_INTERVAL = 1000
+
+ProgressCallback = Optional[Callable[[int], None]]
+
+def _encode_varint(value: int) -> bytes:
+    """Codificar un entero no negativo como varint LEB128"""
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+def _encode_field(name: str, value) -> bytes:
+    """Codificar un campo; 0 representa None y el resto va desplazado en 1"""
+    if value is None:
+        return b"\x00"
+    if name in INTEGER_FIELDS:
+        return _encode_varint(int(value) + 1)
+    data = str(value).encode("utf-8")
+    return _encode_varint(len(data) + 1) + data
+
+class _BinaryRecordReader:
+    """Lector incremental de registros binarios con búfer de bloques"""
+
+    BLOCK_SIZE = 64 * 1024
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = b""
+        self.pos = 0
+
+    def _fill(self, needed: int) -> bool:
+        """Asegurar que hay al menos `needed` bytes disponibles en el búfer"""
+        while len(self.buffer) - self.pos < needed:
+            chunk = self.stream.read(self.BLOCK_SIZE)
+            if not chunk:
+                return False
+            self.buffer = self.buffer[self.pos:] + chunk
+            self.pos = 0
+        return True
+
+    def _read_varint(self) -> int:
+        result = 0
+        shift = 0
+        while True:
+            if not self._fill(1):
+                raise ValueError("Registro binario truncado")
+            byte = self.buffer[self.pos]
+            self.pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def _read_field(self, name: str):
+        value = self._read_varint()
+        if value == 0:
+            return None
+        if name in INTEGER_FIELDS:
+            return value - 1
+        length = value - 1
+        if not self._fill(length):
+            raise ValueError("Registro binario truncado")
+        data = self.buffer[self.pos:self.pos + length]
+        self.pos += length
+        return data.decode("utf-8")
+
+    def __iter__(self) -> Iterator[Tuple[str, Dict]]:
+        while self._fill(1):
+            tag = self.buffer[self.pos]
+            self.pos += 1
+            record_type = TAG_RECORDS.get(tag)
+            if record_type is None:
+                raise ValueError(f"Tipo de registro desconocido: {tag}")
+            fields = RECORD_FIELDS[record_type]
+            yield record_type, {name: self._read_field(name) for name in fields}
+
+class DataExporter:
+    """Exporta datos del usuario leyendo la base de datos por páginas"""
+
+    def __init__(self, db_manager, batch_size: int = 1000):
+        """
+        Args:
+            db_manager: Instancia de DatabaseManager
+            batch_size: Filas leídas por consulta
+        """
+        self.db_manager = db_manager
+        self.batch_size = batch_size
+
+    def iter_records(self, sections: Iterable[str] = EXPORT_SECTIONS) -> Iterator[Tuple[str, Dict]]:
+        """
+        Generar los registros a exportar sin cargarlos todos en memoria
+
+        Yields:
+            Tuplas (tipo de registro, datos)
+        """
+        sections = set(sections)
+        # Los marcadores van antes que el historial: al importar, los favoritos
+        # del historial ya están en su carpeta y no se agregan a la raíz
+        if "favorites" in sections:
+            for entry in self.db_manager.iter_bookmarks(self.batch_size):
+                yield "bookmark", entry
+        if "history" in sections:
+            for entry in self.db_manager.iter_history(self.batch_size):
+                yield "history", {name: entry[name] for name in RECORD_FIELDS["history"]}
+        if "cookies" in sections:
+            for cookie in self.db_manager.iter_cookies(self.batch_size):
+                yield "cookie", cookie
+
+    def export_to_file(self, filepath: str, fmt: str = FORMAT_NDJSON,
+                       sections: Iterable[str] = EXPORT_SECTIONS,
+                       progress_callback: ProgressCallback = None) -> int:
+        """
+        Exportar datos a un archivo
+
+        Args:
+            filepath: Ruta del archivo de destino
+            fmt: FORMAT_NDJSON o FORMAT_BINARY
+            sections: Secciones a exportar (history, favorites, cookies)
+            progress_callback: Función llamada con el número de registros escritos
+
+        Returns:
+            Número de registros exportados
+        """
+        records = self.iter_records(sections)
+        if fmt == FORMAT_BINARY:
+            with gzip.open(filepath, "wb") as f:
+                f.write(BINARY_MAGIC)
+                return self._write_records(f, records, self._encode_binary, progress_callback)
+        if fmt == FORMAT_NDJSON:
+            with open(filepath, "w", encoding="utf-8") as f:
+                header = {"type": "header", "format": "pybrowser-export", "version": 2}
+                f.write(json.dumps(header) + "\n")
+                return self._write_records(f, records, self._encode_ndjson, progress_callback)
+        raise ValueError(f"Formato de exportación no soportado: {fmt}")
+
+    @staticmethod
+    def _encode_ndjson(record_type: str, data: Dict) -> str:
+        line = {"type": record_type}
+        line.update(data)
+        return json.dumps(line, ensure_ascii=False, default=str) + "\n"
+
+    @staticmethod
+    def _encode_binary(record_type: str, data: Dict) -> bytes:
+        parts = [bytes((RECORD_TAGS[record_type],))]
+        for name in RECORD_FIELDS[record_type]:
+            parts.append(_encode_field(name, data.get(name)))
+        return b"".join(parts)
+
+    @staticmethod
+    def _write_records(f, records, encoder, progress_callback: ProgressCallback) -> int:
+        count = 0
+        for record_type, data in records:
+            f.write(encoder(record_type, data))
+            count += 1
+            if progress_callback and count % PROGRESS_INTERVAL == 0:
+                progress_callback(count)
+        if progress_callback:
+            progress_callback(count)
+        return count
+
+class DataImporter:
+    """Importa datos exportados usando transacciones por lotes"""
+
+    def __init__(self, db_manager, batch_size: int = 5000):
+        """
+        Args:
+            db_manager: Instancia de DatabaseManager
+            batch_size: Registros por transacción
+        """
+        self.db_manager = db_manager
+        self.batch_size = batch_size
+
+    @staticmethod
+    def detect_format(filepath: str) -> str:
+        """Detectar el formato de un archivo exportado por su cabecera"""
+        with open(filepath, "rb") as f:
+            head = f.read(2)
+        return FORMAT_BINARY if head == GZIP_MAGIC else FORMAT_NDJSON
+
+    @staticmethod
+    def iter_file_records(filepath: str, fmt: str = None) -> Iterator[Tuple[str, Dict]]:
+        """
+        Leer los registros de un archivo exportado de forma incremental
+
+        Yields:
+            Tuplas (tipo de registro, datos)
+        """
+        fmt = fmt or DataImporter.detect_format(filepath)
+        if fmt == FORMAT_BINARY:
+            with gzip.open(filepath, "rb") as f:
+                if f.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+                    raise ValueError("El archivo no es una exportación de PyWebBrowser")
+                yield from _BinaryRecordReader(f)
+        elif fmt == FORMAT_NDJSON:
+            with open(filepath, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    record_type = data.pop("type", None)
+                    if record_type in RECORD_FIELDS:
+                        yield record_type, data
+        else:
+            raise ValueError(f"Formato de importación no soportado: {fmt}")
+
+    def import_from_file(self, filepath: str, fmt: str = None,
+                         progress_callback: ProgressCallback = None) -> int:
+        """
+        Importar un archivo exportado
+
+        Args:
+            filepath: Ruta del archivo
+            fmt: Formato; se detecta automáticamente si es None
+            progress_callback: Función llamada con el número de registros importados
+
+        Returns:
+            Número de registros importados
+        """
+        importers = {
+            "history": self.db_manager.import_history_entries,
+            "favorite": self.db_manager.import_favorites,
+            "cookie": self.db_manager.import_cookies,
+            "bookmark": self.db_manager.import_bookmark_tree,
+        }
+        batches: Dict[str, List[Dict]] = {record_type: [] for record_type in importers}
+        count = 0
+        previous_type = None
+
+        for record_type, data in self.iter_file_records(filepath, fmt):
+            # Cada sección se termina de importar antes de la siguiente (en el orden del archivo)
+            if record_type != previous_type and previous_type and batches[previous_type]:
+                count += importers[previous_type](batches[previous_type])
+                batches[previous_type].clear()
+            previous_type = record_type
+            batch = batches[record_type]
+            batch.append(data)
+            # El árbol de marcadores se importa entero: los hijos necesitan a sus carpetas
+            if len(batch) >= self.batch_size and record_type != "bookmark":
+                count += importers[record_type](batch)
+                batch.clear()
+                if progress_callback:
+                    progress_callback(count)
+
+        for record_type, batch in batches.items():
+            if batch:
+                count += importers[record_type](batch)
+        if progress_callback:
+            progress_callback(count)
+        return count
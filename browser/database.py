@@ -6,12 +6,142 @@ Maneja historial, cookies y otras operaciones CRUD
 import sqlite3
 import os
 import json
+from array import array
+from contextlib import closing
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Iterable, Iterator, Callable
+
+from .utils import CookieUtils, URLUtils
+
+# Versión del esquema (PRAGMA user_version)
+SCHEMA_VERSION = 3
+
+# Tamaño de página por defecto para lecturas paginadas
+DEFAULT_PAGE_SIZE = 1000
+
+# Máximo de parámetros por sentencia en las operaciones por lotes (límite de SQLite: 999)
+MAX_SQL_PARAMS = 500
+
+# Solo se importan al historial URLs http(s), como en history_import (las
+# canónicas llevan el esquema en minúsculas)
+IMPORTABLE_URL_PREFIXES = ('http://', 'https://')
+
+# Sentencias UPSERT compartidas por las escrituras normales y la importación
+HISTORY_VISIT_UPSERT = '''
+    INSERT INTO history (url, title) VALUES (?, ?)
+    ON CONFLICT(url) DO UPDATE SET
+        visit_count = visit_count + 1,
+        visit_time = CURRENT_TIMESTAMP,
+        title = COALESCE(excluded.title, title)
+'''
+
+# Fusión idempotente: importar dos veces la misma entrada no altera el resultado
+HISTORY_MERGE_ON_CONFLICT = '''
+    ON CONFLICT(url) DO UPDATE SET
+        title = COALESCE(excluded.title, title),
+        visit_time = MAX(visit_time, excluded.visit_time),
+        visit_count = MAX(visit_count, excluded.visit_count)
+'''
+
+# history.is_favorite ya no se escribe: desde la versión 3 los favoritos son marcadores
+HISTORY_MERGE_UPSERT = '''
+    INSERT INTO history (url, title, visit_time, visit_count)
+    VALUES (?, ?, COALESCE(?, CURRENT_TIMESTAMP), COALESCE(?, 1))
+''' + HISTORY_MERGE_ON_CONFLICT
+
+# Índices secundarios del historial (se pueden diferir durante importaciones masivas)
+HISTORY_SECONDARY_INDEXES = {
+    'idx_history_time': 'CREATE INDEX IF NOT EXISTS idx_history_time ON history(visit_time)',
+    'idx_history_visit_count': 'CREATE INDEX IF NOT EXISTS idx_history_visit_count ON history(visit_count)',
+}
+
+# Agregar un marcador al final de una carpeta (parent_id NULL es la raíz)
+BOOKMARK_APPEND = '''
+    INSERT INTO bookmarks (parent_id, position, title, url)
+    SELECT ?, COALESCE(MAX(position) + 1, 0), ?, ?
+    FROM bookmarks WHERE parent_id IS ?
+'''
+
+# Agregar al final de una carpeta un marcador importado si su URL no está ya guardada
+BOOKMARK_IMPORT = '''
+    INSERT INTO bookmarks (parent_id, position, title, url)
+    SELECT ?1, (SELECT COALESCE(MAX(position) + 1, 0) FROM bookmarks WHERE parent_id IS ?1),
+           ?2, ?3
+    WHERE NOT EXISTS (SELECT 1 FROM bookmarks WHERE url = ?3)
+'''
+
+# Índices de marcadores: listar un nivel de carpeta solo lee el índice de hijos
+BOOKMARK_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS idx_bookmarks_children ON bookmarks(parent_id, position, title, url)',
+    'CREATE INDEX IF NOT EXISTS idx_bookmarks_url ON bookmarks(url)',
+)
+
+COOKIE_UPSERT = '''
+    INSERT INTO cookies (domain, name, value, path, expires, secure, http_only)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(domain, name, path) DO UPDATE SET
+        value = excluded.value,
+        expires = excluded.expires,
+        secure = excluded.secure,
+        http_only = excluded.http_only
+'''
+
+HISTORY_RESTORE_UPSERT = '''
+    INSERT INTO history (id, url, title, visit_time, visit_count)
+    VALUES (?, ?, ?, ?, ?)
+''' + HISTORY_MERGE_ON_CONFLICT
+
+# Contenido de una pestaña de la sesión; solo se escribe cuando cambia
+SESSION_TAB_UPSERT = '''
+    INSERT INTO session_tabs (tab_id, position, is_active, url, title, icon, history)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(tab_id) DO UPDATE SET
+        position = excluded.position,
+        is_active = excluded.is_active,
+        url = excluded.url,
+        title = excluded.title,
+        icon = excluded.icon,
+        history = excluded.history,
+        updated_time = CURRENT_TIMESTAMP
+'''
+
+HISTORY_COLUMNS = ['id', 'url', 'title', 'visit_time', 'visit_count', 'is_favorite']
+
+# Columnas leídas del historial; is_favorite se deriva de la tabla de marcadores
+BOOKMARK_COLUMNS = ['id', 'parent_id', 'position', 'title', 'url', 'is_folder', 'has_children']
+
+HISTORY_SELECT_COLUMNS = '''id, url, title, visit_time, visit_count,
+    EXISTS (SELECT 1 FROM bookmarks WHERE bookmarks.url = history.url) AS is_favorite'''
+COOKIE_COLUMNS = ['domain', 'name', 'value', 'path', 'expires', 'secure', 'http_only']
+SESSION_TAB_COLUMNS = ['id', 'is_active', 'url', 'title', 'icon', 'history']
+
+def register_url_functions(conn: sqlite3.Connection):
+    """Registrar las funciones SQL de URLs (canonical_url, url_site, cookie_site) en una conexión"""
+    conn.create_function('canonical_url', 1, URLUtils.canonicalize_url, deterministic=True)
+    conn.create_function('url_site', 1, URLUtils.get_domain, deterministic=True)
+    conn.create_function('cookie_site', 1, CookieUtils.get_cookie_site, deterministic=True)
+
+def like_pattern(query: str) -> str:
+    """
+    Patrón LIKE que busca el texto tal cual (usar con ESCAPE '\\')
+    
+    _ y % dejan de ser comodines. LIKE sigue sin distinguir mayúsculas solo
+    en ASCII; HistorySearchController refina con la misma regla.
+    """
+    escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+def _chunks(items: List, size: int = MAX_SQL_PARAMS) -> Iterator[List]:
+    """Dividir una lista en trozos de como máximo `size` elementos"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
 
 class DatabaseManager:
     """Clase para manejar todas las operaciones de base de datos"""
     
+    # Generación del historial por base de datos, compartida por todas las ventanas
+    _history_generations: Dict[str, int] = {}
+    
     def __init__(self, data_dir: str):
         """
         Inicializar el gestor de base de datos
@@ -21,6 +151,26 @@ class DatabaseManager:
         """
         self.data_dir = data_dir
         self.db_path = os.path.join(data_dir, "browser_data.db")
+        self.visited_filter = None
+    
+    @property
+    def history_generation(self) -> int:
+        """Número que cambia cada vez que se modifica el historial (para cachés)"""
+        return self._history_generations.get(self.db_path, 0)
+    
+    def mark_history_changed(self):
+        """Invalidar las cachés derivadas del historial"""
+        generations = DatabaseManager._history_generations
+        generations[self.db_path] = generations.get(self.db_path, 0) + 1
+    
+    def attach_visited_filter(self, visited_filter):
+        """
+        Asociar un filtro de URLs visitadas que se mantiene al día con cada visita
+        
+        Args:
+            visited_filter: Instancia de VisitedURLFilter
+        """
+        self.visited_filter = visited_filter
         
     def initialize_database(self):
         """Crear las tablas necesarias si no existen"""
@@ -54,6 +204,32 @@ class DatabaseManager:
                 )
             ''')
             
+            # Tabla para marcadores (las carpetas no tienen URL)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS bookmarks (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    parent_id INTEGER,
+                    position INTEGER NOT NULL,
+                    title TEXT,
+                    url TEXT,
+                    created_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Pestañas abiertas de la sesión (historial de navegación serializado)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS session_tabs (
+                    tab_id INTEGER PRIMARY KEY,
+                    position INTEGER NOT NULL,
+                    is_active BOOLEAN DEFAULT FALSE,
+                    url TEXT,
+                    title TEXT,
+                    icon TEXT,
+                    history BLOB,
+                    updated_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
             # Tabla para configuraciones
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS settings (
@@ -64,53 +240,242 @@ class DatabaseManager:
             ''')
             
             # Índices para mejorar el rendimiento
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_url ON history(url)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_time ON history(visit_time)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_cookies_domain ON cookies(domain)')
+            for create_index_sql in HISTORY_SECONDARY_INDEXES.values():
+                cursor.execute(create_index_sql)
+            for create_index_sql in BOOKMARK_INDEXES:
+                cursor.execute(create_index_sql)
+            
+            self._apply_migrations(cursor)
             
             conn.commit()
     
+    def _apply_migrations(self, cursor):
+        """
+        Aplicar las migraciones pendientes según PRAGMA user_version
+        
+        Args:
+            cursor: Cursor de una conexión abierta
+        """
+        cursor.execute('PRAGMA user_version')
+        version = cursor.fetchone()[0]
+        
+        if version < 1:
+            # Fusionar URLs duplicadas antes de exigir unicidad
+            cursor.execute('''
+                UPDATE history SET
+                    visit_count = (SELECT SUM(d.visit_count) FROM history AS d WHERE d.url = history.url),
+                    visit_time = (SELECT MAX(d.visit_time) FROM history AS d WHERE d.url = history.url),
+                    is_favorite = (SELECT MAX(d.is_favorite) FROM history AS d WHERE d.url = history.url)
+                WHERE url IN (SELECT url FROM history GROUP BY url HAVING COUNT(*) > 1)
+            ''')
+            cursor.execute('''
+                DELETE FROM history
+                WHERE id NOT IN (SELECT MIN(id) FROM history GROUP BY url)
+            ''')
+            
+            # Conservar la cookie más reciente de cada (dominio, nombre, ruta)
+            cursor.execute('''
+                DELETE FROM cookies
+                WHERE id NOT IN (SELECT MAX(id) FROM cookies GROUP BY domain, name, path)
+            ''')
+            
+            # Los índices únicos sustituyen a los anteriores y habilitan los UPSERT
+            cursor.execute('DROP INDEX IF EXISTS idx_history_url')
+            cursor.execute('DROP INDEX IF EXISTS idx_cookies_domain')
+            cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_history_url_unique ON history(url)')
+            cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_cookies_key ON cookies(domain, name, path)')
+        
+        if version < 2:
+            self._merge_canonical_duplicates(cursor)
+        
+        if version < 3:
+            # Los favoritos pasan a la tabla de marcadores, en la raíz y por título
+            cursor.execute('''
+                INSERT INTO bookmarks (parent_id, position, title, url)
+                SELECT NULL, ROW_NUMBER() OVER (ORDER BY title, id) - 1, title, url
+                FROM history
+                WHERE is_favorite = TRUE
+                    AND url NOT IN (SELECT url FROM bookmarks WHERE url IS NOT NULL)
+            ''')
+            cursor.execute('UPDATE history SET is_favorite = FALSE WHERE is_favorite = TRUE')
+        
+        if version < SCHEMA_VERSION:
+            cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    
+    def _merge_canonical_duplicates(self, cursor):
+        """
+        Fusionar las entradas del historial que comparten URL canónica
+        
+        Conserva la fila más antigua de cada grupo con la suma de visitas, la
+        última fecha de visita y el título más reciente, y le asigna la URL canónica.
+        
+        Args:
+            cursor: Cursor de una conexión abierta
+        """
+        register_url_functions(cursor.connection)
+        cursor.execute('''
+            CREATE TEMP TABLE canon_map AS
+            SELECT id, url, canonical_url(url) AS canon FROM history
+        ''')
+        cursor.execute('CREATE INDEX temp.idx_canon_map ON canon_map(canon)')
+        cursor.execute('''
+            CREATE TEMP TABLE canon_groups AS
+            SELECT m.canon AS canon,
+                   MIN(h.id) AS keep_id,
+                   SUM(h.visit_count) AS visits,
+                   MAX(h.visit_time) AS last_visit,
+                   MAX(h.is_favorite) AS favorite,
+                   (SELECT h2.title FROM canon_map AS m2 JOIN history AS h2 ON h2.id = m2.id
+                    WHERE m2.canon = m.canon AND h2.title IS NOT NULL
+                    ORDER BY h2.visit_time DESC LIMIT 1) AS title
+            FROM canon_map AS m JOIN history AS h ON h.id = m.id
+            GROUP BY m.canon
+            HAVING COUNT(*) > 1 OR MIN(m.url) <> m.canon
+        ''')
+        
+        cursor.execute('''
+            DELETE FROM history WHERE id IN (
+                SELECT m.id FROM canon_map AS m JOIN canon_groups AS g ON g.canon = m.canon
+                WHERE m.id <> g.keep_id
+            )
+        ''')
+        cursor.execute('''
+            SELECT canon, title, visits, last_visit, favorite, keep_id FROM canon_groups
+        ''')
+        cursor.executemany('''
+            UPDATE history
+            SET url = ?, title = ?, visit_count = ?, visit_time = ?, is_favorite = ?
+            WHERE id = ?
+        ''', cursor.fetchall())
+        
+        cursor.execute('DROP TABLE temp.canon_groups')
+        cursor.execute('DROP TABLE temp.canon_map')
+    
     def add_history_entry(self, url: str, title: str = None) -> bool:
         """
         Agregar una entrada al historial
         
         Args:
-            url: URL visitada
+            url: URL visitada (se guarda en su forma canónica)
             title: Título de la página
             
         Returns:
             True si se agregó correctamente
         """
+        url = URLUtils.canonicalize_url(url)
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 
-                # Verificar si la URL ya existe
-                cursor.execute('SELECT id, visit_count FROM history WHERE url = ?', (url,))
-                existing = cursor.fetchone()
-                
-                if existing:
-                    # Actualizar contador de visitas y tiempo
-                    cursor.execute('''
-                        UPDATE history 
-                        SET visit_count = visit_count + 1, 
-                            visit_time = CURRENT_TIMESTAMP,
-                            title = COALESCE(?, title)
-                        WHERE id = ?
-                    ''', (title, existing[0]))
-                else:
-                    # Insertar nueva entrada
-                    cursor.execute('''
-                        INSERT INTO history (url, title) 
-                        VALUES (?, ?)
-                    ''', (url, title))
+                # Insertar o actualizar contador de visitas y tiempo
+                cursor.execute(HISTORY_VISIT_UPSERT, (url, title))
                 
                 conn.commit()
-                return True
+            self.mark_history_changed()
+            if self.visited_filter:
+                self.visited_filter.add(url)
+            return True
         except sqlite3.Error as e:
             print(f"Error al agregar al historial: {e}")
             return False
     
+    def update_history_title(self, url: str, title: str) -> bool:
+        """
+        Actualizar el título de una entrada sin contar una nueva visita
+        
+        Args:
+            url: URL de la entrada
+            title: Nuevo título
+            
+        Returns:
+            True si se actualizó alguna entrada
+        """
+        url = URLUtils.canonicalize_url(url)
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute('UPDATE history SET title = ? WHERE url = ?', (title, url))
+                conn.commit()
+                if cursor.rowcount > 0:
+                    self.mark_history_changed()
+                return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            print(f"Error al actualizar título del historial: {e}")
+            return False
+    
+    def has_visited(self, url: str) -> bool:
+        """
+        Comprobar si una URL está en el historial
+        
+        Las respuestas negativas del filtro de visitadas no consultan SQLite.
+        
+        Args:
+            url: URL a comprobar
+            
+        Returns:
+            True si la URL está en el historial
+        """
+        url = URLUtils.canonicalize_url(url)
+        if self.visited_filter and not self.visited_filter.might_contain(url):
+            return False
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT 1 FROM history WHERE url = ?', (url,))
+                return cursor.fetchone() is not None
+        except sqlite3.Error as e:
+            print(f"Error al consultar historial: {e}")
+            return False
+    
+    def get_top_sites(self, limit: int = 8) -> List[Dict]:
+        """
+        Obtener los sitios más visitados, uno por dominio
+        
+        Lee los candidatos por idx_history_visit_count en lugar de agrupar
+        todo el historial por dominio.
+        
+        Args:
+            limit: Número máximo de sitios
+            
+        Returns:
+            Lista de entradas con url, title y visit_count
+        """
+        sites = []
+        seen_domains = set()
+        try:
+            with closing(sqlite3.connect(self.db_path)) as conn:
+                cursor = conn.execute('''
+                    SELECT url, title, visit_count FROM history
+                    WHERE url LIKE 'http%'
+                    ORDER BY visit_count DESC
+                ''')
+                while len(sites) < limit:
+                    rows = cursor.fetchmany(limit * 4)
+                    if not rows:
+                        break
+                    for url, title, visit_count in rows:
+                        domain = URLUtils.get_domain(url)
+                        if domain in seen_domains:
+                            continue
+                        seen_domains.add(domain)
+                        sites.append({'url': url, 'title': title, 'visit_count': visit_count})
+                        if len(sites) == limit:
+                            break
+        except sqlite3.Error as e:
+            print(f"Error al obtener sitios más visitados: {e}")
+        return sites
+    
+    def count_history(self) -> int:
+        """Obtener el número de entradas del historial"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT COUNT(*) FROM history')
+                return cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Error al contar historial: {e}")
+            return 0
+    
     def get_history(self, limit: int = 100) -> List[Dict]:
         """
         Obtener el historial de navegación
@@ -124,19 +489,104 @@ class DatabaseManager:
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT id, url, title, visit_time, visit_count, is_favorite
+                cursor.execute(f'''
+                    SELECT {HISTORY_SELECT_COLUMNS}
                     FROM history 
                     ORDER BY visit_time DESC 
                     LIMIT ?
                 ''', (limit,))
                 
-                columns = ['id', 'url', 'title', 'visit_time', 'visit_count', 'is_favorite']
-                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+                return [dict(zip(HISTORY_COLUMNS, row)) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"Error al obtener historial: {e}")
+            return []
+    
+    def get_history_page(self, after: Optional[Tuple[str, int]] = None, limit: int = 100,
+                         query: str = None) -> List[Dict]:
+        """
+        Obtener una página del historial ordenada de la visita más reciente a la más antigua
+        
+        Usa paginación por clave (visit_time, id), que aprovecha idx_history_time
+        y no degrada al avanzar como lo haría OFFSET.
+        
+        Args:
+            after: Clave (visit_time, id) de la última fila de la página anterior
+            limit: Número máximo de entradas
+            query: Si se especifica, filtrar por URL o título
+            
+        Returns:
+            Lista de entradas del historial
+        """
+        conditions = []
+        params: List = []
+        if after is not None:
+            conditions.append('(visit_time, id) < (?, ?)')
+            params.extend(after)
+        if query:
+            conditions.append("(url LIKE ? ESCAPE '\\' OR title LIKE ? ESCAPE '\\')")
+            params.extend([like_pattern(query)] * 2)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        params.append(limit)
+        
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT {HISTORY_SELECT_COLUMNS}
+                    FROM history
+                    {where}
+                    ORDER BY visit_time DESC, id DESC
+                    LIMIT ?
+                ''', params)
+                return [dict(zip(HISTORY_COLUMNS, row)) for row in cursor.fetchall()]
         except sqlite3.Error as e:
             print(f"Error al obtener historial: {e}")
             return []
     
+    def iter_search_history(self, query: str, page_size: int = 200, limit: int = 5000,
+                            is_cancelled: Callable[[], bool] = None) -> Iterator[List[Dict]]:
+        """
+        Buscar en el historial entregando los resultados por páginas
+        
+        La consulta recorre idx_history_time en orden, así que la primera página
+        llega sin esperar al resto. Si `is_cancelled` devuelve True la consulta se
+        interrumpe dentro de SQLite.
+        
+        Args:
+            query: Término de búsqueda
+            page_size: Resultados por página
+            limit: Número máximo de resultados
+            is_cancelled: Función que indica si hay que abandonar la búsqueda
+            
+        Yields:
+            Listas de entradas que coinciden con la búsqueda
+        """
+        search_term = like_pattern(query)
+        try:
+            with closing(sqlite3.connect(self.db_path)) as conn:
+                if is_cancelled:
+                    conn.set_progress_handler(lambda: 1 if is_cancelled() else 0, 10000)
+                cursor = conn.execute(f'''
+                    SELECT {HISTORY_SELECT_COLUMNS}
+                    FROM history
+                    WHERE url LIKE ? ESCAPE '\\' OR title LIKE ? ESCAPE '\\'
+                    ORDER BY visit_time DESC, id DESC
+                    LIMIT ?
+                ''', (search_term, search_term, limit))
+                while True:
+                    rows = cursor.fetchmany(page_size)
+                    if not rows:
+                        break
+                    yield [dict(zip(HISTORY_COLUMNS, row)) for row in rows]
+                    if is_cancelled and is_cancelled():
+                        break
+        except sqlite3.OperationalError as e:
+            # La interrupción por cancelación no es un error
+            if not (is_cancelled and is_cancelled()):
+                print(f"Error al buscar en historial: {e}")
+        except sqlite3.Error as e:
+            print(f"Error al buscar en historial: {e}")
+    
     def search_history(self, query: str, limit: int = 50) -> List[Dict]:
         """
         Buscar en el historial
@@ -151,17 +601,16 @@ class DatabaseManager:
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
-                search_term = f"%{query}%"
-                cursor.execute('''
-                    SELECT id, url, title, visit_time, visit_count, is_favorite
+                search_term = like_pattern(query)
+                cursor.execute(f'''
+                    SELECT {HISTORY_SELECT_COLUMNS}
                     FROM history 
-                    WHERE url LIKE ? OR title LIKE ?
+                    WHERE url LIKE ? ESCAPE '\\' OR title LIKE ? ESCAPE '\\'
                     ORDER BY visit_count DESC, visit_time DESC
                     LIMIT ?
                 ''', (search_term, search_term, limit))
                 
-                columns = ['id', 'url', 'title', 'visit_time', 'visit_count', 'is_favorite']
-                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+                return [dict(zip(HISTORY_COLUMNS, row)) for row in cursor.fetchall()]
         except sqlite3.Error as e:
             print(f"Error al buscar en historial: {e}")
             return []
@@ -181,6 +630,7 @@ class DatabaseManager:
                 cursor = conn.cursor()
                 cursor.execute('DELETE FROM history WHERE id = ?', (entry_id,))
                 conn.commit()
+                self.mark_history_changed()
                 return cursor.rowcount > 0
         except sqlite3.Error as e:
             print(f"Error al eliminar entrada del historial: {e}")
@@ -209,6 +659,7 @@ class DatabaseManager:
                     cursor.execute('DELETE FROM history')
                 
                 conn.commit()
+                self.mark_history_changed()
                 return True
         except sqlite3.Error as e:
             print(f"Error al limpiar historial: {e}")
@@ -227,40 +678,342 @@ class DatabaseManager:
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE history 
-                    SET is_favorite = NOT is_favorite 
-                    WHERE id = ?
-                ''', (entry_id,))
-                conn.commit()
-                return cursor.rowcount > 0
+                cursor.execute(f'SELECT {HISTORY_SELECT_COLUMNS} FROM history WHERE id = ?',
+                               (entry_id,))
+                row = cursor.fetchone()
         except sqlite3.Error as e:
             print(f"Error al actualizar favorito: {e}")
             return False
+        if row is None:
+            return False
+        return bool(self.set_favorite([entry_id], not row[5]))
+    
+    def set_favorite(self, entry_ids: Iterable[int], is_favorite: bool) -> List[int]:
+        """
+        Marcar o desmarcar varias entradas como favoritas en una sola transacción
+        
+        Marcar agrega un marcador en la raíz; desmarcar elimina los marcadores
+        de la URL, estén en la carpeta que estén.
+        
+        Args:
+            entry_ids: IDs de las entradas del historial
+            is_favorite: Nuevo estado de favorito
+            
+        Returns:
+            IDs de las entradas cuyo estado cambió (para poder deshacerlo)
+        """
+        ids = list(entry_ids)
+        condition = 'NOT EXISTS' if is_favorite else 'EXISTS'
+        changed = []
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                for chunk in _chunks(ids):
+                    placeholders = ','.join('?' * len(chunk))
+                    cursor.execute(f'''
+                        SELECT id, url, title FROM history
+                        WHERE id IN ({placeholders})
+                            AND {condition} (SELECT 1 FROM bookmarks WHERE bookmarks.url = history.url)
+                    ''', chunk)
+                    rows = cursor.fetchall()
+                    if is_favorite:
+                        cursor.executemany(BOOKMARK_APPEND,
+                                           [(None, title, url, None) for _, url, title in rows])
+                    else:
+                        cursor.executemany('DELETE FROM bookmarks WHERE url = ?',
+                                           [(url,) for _, url, _ in rows])
+                    changed.extend(row[0] for row in rows)
+                conn.commit()
+                return changed
+        except sqlite3.Error as e:
+            print(f"Error al actualizar favoritos: {e}")
+            return []
+    
+    def delete_history_entries(self, entry_ids: Iterable[int]) -> List[Dict]:
+        """
+        Eliminar varias entradas del historial en una sola transacción
+        
+        Args:
+            entry_ids: IDs de las entradas a eliminar
+            
+        Returns:
+            Entradas eliminadas, para poder restaurarlas con restore_history_entries
+        """
+        ids = list(entry_ids)
+        deleted = []
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                for chunk in _chunks(ids):
+                    placeholders = ','.join('?' * len(chunk))
+                    cursor.execute(f'''
+                        SELECT {HISTORY_SELECT_COLUMNS}
+                        FROM history WHERE id IN ({placeholders})
+                    ''', chunk)
+                    deleted.extend(dict(zip(HISTORY_COLUMNS, row)) for row in cursor.fetchall())
+                    cursor.execute(f'DELETE FROM history WHERE id IN ({placeholders})', chunk)
+                conn.commit()
+                self.mark_history_changed()
+                return deleted
+        except sqlite3.Error as e:
+            print(f"Error al eliminar entradas del historial: {e}")
+            return []
+    
+    def delete_history_by_domain(self, domain: str) -> List[Dict]:
+        """
+        Eliminar todas las entradas del historial de un sitio
+        
+        Incluye todos sus subdominios y puertos. instr() descarta en C casi
+        todas las filas antes de calcular el dominio registrable de las demás.
+        
+        Args:
+            domain: Dominio registrable tal como lo devuelve URLUtils.get_domain
+            
+        Returns:
+            Entradas eliminadas, para poder restaurarlas con restore_history_entries
+        """
+        site = domain.lower()
+        if not site:
+            return []
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                register_url_functions(conn)
+                cursor = conn.cursor()
+                condition = "instr(url, ?) > 0 AND url_site(url) = ?"
+                cursor.execute(f'''
+                    SELECT {HISTORY_SELECT_COLUMNS}
+                    FROM history WHERE {condition}
+                ''', (site, site))
+                deleted = [dict(zip(HISTORY_COLUMNS, row)) for row in cursor.fetchall()]
+                if deleted:
+                    ids = [entry['id'] for entry in deleted]
+                    for chunk in _chunks(ids):
+                        placeholders = ','.join('?' * len(chunk))
+                        cursor.execute(f'DELETE FROM history WHERE id IN ({placeholders})', chunk)
+                conn.commit()
+                self.mark_history_changed()
+                return deleted
+        except sqlite3.Error as e:
+            print(f"Error al eliminar historial del dominio: {e}")
+            return []
+    
+    def restore_history_entries(self, entries: List[Dict]) -> List[int]:
+        """
+        Volver a insertar entradas eliminadas conservando sus IDs
+        
+        Si una URL se ha vuelto a visitar entretanto, se fusiona con la entrada nueva.
+        Los marcadores no se tocan al eliminar, así que is_favorite no se restaura.
+        
+        Args:
+            entries: Entradas devueltas por delete_history_entries o delete_history_by_domain
+            
+        Returns:
+            IDs restaurados con su valor original
+        """
+        rows = [(e['id'], e['url'], e['title'], e['visit_time'], e['visit_count'])
+                for e in entries]
+        ids = [row[0] for row in rows]
+        restored = []
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.executemany(HISTORY_RESTORE_UPSERT, rows)
+                for chunk in _chunks(ids):
+                    placeholders = ','.join('?' * len(chunk))
+                    cursor.execute(f'SELECT id FROM history WHERE id IN ({placeholders})', chunk)
+                    restored.extend(row[0] for row in cursor.fetchall())
+                conn.commit()
+            self.mark_history_changed()
+        except sqlite3.Error as e:
+            print(f"Error al restaurar entradas del historial: {e}")
+            return []
+        
+        if self.visited_filter:
+            self.visited_filter.add_many(row[1] for row in rows)
+        return restored
     
     def get_favorites(self) -> List[Dict]:
         """
-        Obtener todas las páginas marcadas como favoritas
+        Obtener todos los marcadores (sin carpetas) ordenados por título
+        
+        Para mostrar el árbol de marcadores usar get_bookmark_children, que
+        lee solo un nivel.
         
         Returns:
-            Lista de favoritos
+            Lista de favoritos con id, url y title
         """
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
-                    SELECT id, url, title, visit_time, visit_count
-                    FROM history 
-                    WHERE is_favorite = TRUE
+                    SELECT id, url, title
+                    FROM bookmarks 
+                    WHERE url IS NOT NULL
                     ORDER BY title ASC
                 ''')
                 
-                columns = ['id', 'url', 'title', 'visit_time', 'visit_count']
+                columns = ['id', 'url', 'title']
                 return [dict(zip(columns, row)) for row in cursor.fetchall()]
         except sqlite3.Error as e:
             print(f"Error al obtener favoritos: {e}")
             return []
     
+    def get_bookmark_children(self, parent_id: Optional[int] = None) -> List[Dict]:
+        """
+        Obtener un nivel del árbol de marcadores
+        
+        La consulta se resuelve con idx_bookmarks_children sin leer la tabla.
+        
+        Args:
+            parent_id: ID de la carpeta, o None para la raíz
+            
+        Returns:
+            Marcadores y carpetas del nivel, en orden
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT id, parent_id, position, title, url, url IS NULL,
+                           url IS NULL AND EXISTS (SELECT 1 FROM bookmarks AS c
+                                                   WHERE c.parent_id = b.id)
+                    FROM bookmarks AS b
+                    WHERE parent_id IS ?
+                    ORDER BY position
+                ''', (parent_id,))
+                return [dict(zip(BOOKMARK_COLUMNS, row)) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"Error al obtener marcadores: {e}")
+            return []
+    
+    def add_bookmark(self, url: str, title: str = None,
+                     parent_id: Optional[int] = None) -> Optional[int]:
+        """
+        Agregar un marcador al final de una carpeta
+        
+        Args:
+            url: URL del marcador
+            title: Título del marcador
+            parent_id: ID de la carpeta, o None para la raíz
+            
+        Returns:
+            ID del marcador, o None si hubo error
+        """
+        return self._append_bookmark(parent_id, title, URLUtils.canonicalize_url(url))
+    
+    def add_bookmark_folder(self, title: str, parent_id: Optional[int] = None) -> Optional[int]:
+        """
+        Crear una carpeta de marcadores al final de otra carpeta
+        
+        Returns:
+            ID de la carpeta, o None si hubo error
+        """
+        return self._append_bookmark(parent_id, title, None)
+    
+    def _append_bookmark(self, parent_id: Optional[int], title: Optional[str],
+                         url: Optional[str]) -> Optional[int]:
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute(BOOKMARK_APPEND, (parent_id, title, url, parent_id))
+                conn.commit()
+                return cursor.lastrowid
+        except sqlite3.Error as e:
+            print(f"Error al agregar marcador: {e}")
+            return None
+    
+    def is_bookmarked(self, url: str) -> bool:
+        """Comprobar si una URL está guardada en marcadores"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT 1 FROM bookmarks WHERE url = ? LIMIT 1',
+                               (URLUtils.canonicalize_url(url),))
+                return cursor.fetchone() is not None
+        except sqlite3.Error as e:
+            print(f"Error al consultar marcadores: {e}")
+            return False
+    
+    def delete_bookmarks(self, bookmark_ids: Iterable[int]) -> List[Dict]:
+        """
+        Eliminar marcadores y carpetas (con todo su contenido) en una sola transacción
+        
+        Args:
+            bookmark_ids: IDs de marcadores o carpetas
+            
+        Returns:
+            Filas eliminadas, para poder restaurarlas con restore_bookmarks
+        """
+        ids = list(bookmark_ids)
+        deleted = []
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                for chunk in _chunks(ids):
+                    placeholders = ','.join('?' * len(chunk))
+                    cursor.execute(f'''
+                        WITH RECURSIVE subtree(id) AS (
+                            SELECT id FROM bookmarks WHERE id IN ({placeholders})
+                            UNION
+                            SELECT b.id FROM bookmarks AS b JOIN subtree AS s ON b.parent_id = s.id
+                        )
+                        SELECT id, parent_id, position, title, url, created_time
+                        FROM bookmarks WHERE id IN (SELECT id FROM subtree)
+                    ''', chunk)
+                    rows = cursor.fetchall()
+                    deleted.extend(dict(zip(['id', 'parent_id', 'position', 'title', 'url',
+                                             'created_time'], row)) for row in rows)
+                    cursor.executemany('DELETE FROM bookmarks WHERE id = ?',
+                                       [(row[0],) for row in rows])
+                conn.commit()
+                return deleted
+        except sqlite3.Error as e:
+            print(f"Error al eliminar marcadores: {e}")
+            return []
+    
+    def restore_bookmarks(self, rows: List[Dict]) -> int:
+        """
+        Volver a insertar marcadores eliminados con sus IDs y posiciones
+        
+        Args:
+            rows: Filas devueltas por delete_bookmarks
+            
+        Returns:
+            Número de marcadores restaurados
+        """
+        return self._executemany('''
+            INSERT OR IGNORE INTO bookmarks (id, parent_id, position, title, url, created_time)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(r['id'], r['parent_id'], r['position'], r['title'], r['url'], r['created_time'])
+              for r in rows], "restaurar marcadores")
+    
+    def iter_bookmarks(self, batch_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict]:
+        """
+        Recorrer todos los marcadores y carpetas por páginas
+        
+        Yields:
+            Diccionarios con id, parent_id, position, title y url (None en las
+            carpetas), ordenados por id
+        """
+        columns = ['id', 'parent_id', 'position', 'title', 'url']
+        last_id = 0
+        try:
+            with closing(sqlite3.connect(self.db_path)) as conn:
+                while True:
+                    rows = conn.execute('''
+                        SELECT id, parent_id, position, title, url FROM bookmarks
+                        WHERE id > ?
+                        ORDER BY id
+                        LIMIT ?
+                    ''', (last_id, batch_size)).fetchall()
+                    if not rows:
+                        break
+                    last_id = rows[-1][0]
+                    for row in rows:
+                        yield dict(zip(columns, row))
+        except sqlite3.Error as e:
+            print(f"Error al recorrer marcadores: {e}")
+    
     def add_cookie(self, domain: str, name: str, value: str, path: str = '/', 
                    expires: datetime = None, secure: bool = False, 
                    http_only: bool = False) -> bool:
@@ -283,17 +1036,9 @@ class DatabaseManager:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 
-                # Eliminar cookie existente con el mismo dominio, nombre y ruta
-                cursor.execute('''
-                    DELETE FROM cookies 
-                    WHERE domain = ? AND name = ? AND path = ?
-                ''', (domain, name, path))
-                
-                # Insertar nueva cookie
-                cursor.execute('''
-                    INSERT INTO cookies (domain, name, value, path, expires, secure, http_only)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (domain, name, value, path, expires, secure, http_only))
+                # Reemplazar la cookie con el mismo dominio, nombre y ruta
+                cursor.execute(COOKIE_UPSERT,
+                               (domain, name, value, path, expires, secure, http_only))
                 
                 conn.commit()
                 return True
@@ -329,28 +1074,185 @@ class DatabaseManager:
                         ORDER BY domain ASC, name ASC
                     ''')
                 
-                columns = ['domain', 'name', 'value', 'path', 'expires', 'secure', 'http_only']
-                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+                return [dict(zip(COOKIE_COLUMNS, row)) for row in cursor.fetchall()]
         except sqlite3.Error as e:
             print(f"Error al obtener cookies: {e}")
             return []
     
+    @staticmethod
+    def _domain_prefix_condition(prefix: str) -> Tuple[str, List[str]]:
+        """
+        Construir un filtro por prefijo de dominio que usa idx_cookies_key
+        
+        Incluye los dominios con punto inicial (".ejemplo.com").
+        
+        Returns:
+            Tupla (condición SQL, parámetros)
+        """
+        prefix = prefix.lower()
+        ranges = []
+        for start in {prefix, '.' + prefix.lstrip('.')}:
+            ranges.extend([start, start[:-1] + chr(ord(start[-1]) + 1)])
+        condition = ' OR '.join(['(domain >= ? AND domain < ?)'] * (len(ranges) // 2))
+        return f'({condition})', ranges
+    
+    def get_cookie_ids(self, domain_prefix: str = None, sort_column: str = 'domain',
+                       descending: bool = False) -> array:
+        """
+        Obtener los IDs de las cookies en el orden en que se muestran
+        
+        Filtrar y ordenar se resuelve en SQL leyendo solo los IDs; las filas se
+        piden después con get_cookies_by_ids para la parte visible.
+        
+        Args:
+            domain_prefix: Si se especifica, solo dominios que empiezan así
+            sort_column: Columna de COOKIE_COLUMNS por la que ordenar
+            descending: Orden descendente
+            
+        Returns:
+            Array de IDs
+        """
+        if sort_column not in COOKIE_COLUMNS:
+            raise ValueError(f"Columna de ordenación no válida: {sort_column}")
+        direction = 'DESC' if descending else 'ASC'
+        where, params = '', []
+        if domain_prefix:
+            condition, params = self._domain_prefix_condition(domain_prefix)
+            where = f'WHERE {condition}'
+        
+        ids = array('q')
+        try:
+            with closing(sqlite3.connect(self.db_path)) as conn:
+                cursor = conn.execute(f'''
+                    SELECT id FROM cookies {where}
+                    ORDER BY {sort_column} {direction}, id {direction}
+                ''', params)
+                while True:
+                    rows = cursor.fetchmany(DEFAULT_PAGE_SIZE)
+                    if not rows:
+                        break
+                    ids.extend(row[0] for row in rows)
+        except sqlite3.Error as e:
+            print(f"Error al obtener cookies: {e}")
+        return ids
+    
+    def get_cookie_page(self, after: Optional[Tuple[str, str, str]] = None, limit: int = 100,
+                        domain_prefix: str = None) -> List[Dict]:
+        """
+        Obtener una página de cookies ordenada por (dominio, nombre, ruta)
+        
+        Usa paginación por clave sobre idx_cookies_key.
+        
+        Args:
+            after: Clave (domain, name, path) de la última cookie de la página anterior
+            limit: Número máximo de cookies
+            domain_prefix: Si se especifica, solo dominios que empiezan así
+            
+        Returns:
+            Lista de cookies
+        """
+        conditions = []
+        params: List = []
+        if after is not None:
+            conditions.append('(domain, name, path) > (?, ?, ?)')
+            params.extend(after)
+        if domain_prefix:
+            condition, prefix_params = self._domain_prefix_condition(domain_prefix)
+            conditions.append(condition)
+            params.extend(prefix_params)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        params.append(limit)
+        
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT domain, name, value, path, expires, secure, http_only
+                    FROM cookies
+                    {where}
+                    ORDER BY domain, name, path
+                    LIMIT ?
+                ''', params)
+                return [dict(zip(COOKIE_COLUMNS, row)) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"Error al obtener cookies: {e}")
+            return []
+    
+    def get_cookies_by_ids(self, cookie_ids: Iterable[int]) -> Dict[int, Tuple]:
+        """
+        Leer las filas de varias cookies
+        
+        Args:
+            cookie_ids: IDs de las cookies
+            
+        Returns:
+            Diccionario id -> tupla con los valores de COOKIE_COLUMNS
+        """
+        ids = list(cookie_ids)
+        rows = {}
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                for chunk in _chunks(ids):
+                    placeholders = ','.join('?' * len(chunk))
+                    cursor.execute(f'''
+                        SELECT id, domain, name, value, path, expires, secure, http_only
+                        FROM cookies WHERE id IN ({placeholders})
+                    ''', chunk)
+                    for row in cursor.fetchall():
+                        rows[row[0]] = row[1:]
+                return rows
+        except sqlite3.Error as e:
+            print(f"Error al obtener cookies: {e}")
+            return {}
+    
+    def delete_cookies_by_ids(self, cookie_ids: Iterable[int]) -> int:
+        """
+        Eliminar varias cookies en una sola transacción
+        
+        Args:
+            cookie_ids: IDs de las cookies
+            
+        Returns:
+            Número de cookies eliminadas
+        """
+        ids = list(cookie_ids)
+        deleted = 0
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                for chunk in _chunks(ids):
+                    placeholders = ','.join('?' * len(chunk))
+                    cursor.execute(f'DELETE FROM cookies WHERE id IN ({placeholders})', chunk)
+                    deleted += cursor.rowcount
+                conn.commit()
+                return deleted
+        except sqlite3.Error as e:
+            print(f"Error al eliminar cookies: {e}")
+            return 0
+    
     def delete_cookies(self, domain: str = None) -> bool:
         """
         Eliminar cookies
         
         Args:
-            domain: Si se especifica, solo eliminar cookies de este dominio
+            domain: Si se especifica, solo eliminar las cookies de su sitio
+                (el dominio registrable y todos sus subdominios)
             
         Returns:
             True si se eliminaron correctamente
         """
         try:
             with sqlite3.connect(self.db_path) as conn:
+                register_url_functions(conn)
                 cursor = conn.cursor()
                 
                 if domain:
-                    cursor.execute('DELETE FROM cookies WHERE domain = ?', (domain,))
+                    site = CookieUtils.get_cookie_site(domain)
+                    cursor.execute('''
+                        DELETE FROM cookies
+                        WHERE domain = ? OR (instr(domain, ?) > 0 AND cookie_site(domain) = ?)
+                    ''', (domain, site, site))
                 else:
                     cursor.execute('DELETE FROM cookies')
                 
@@ -404,3 +1306,271 @@ class DatabaseManager:
         except sqlite3.Error as e:
             print(f"Error al obtener configuración: {e}")
             return default_value
+    
+    def get_session_tabs(self) -> List[Dict]:
+        """
+        Obtener las pestañas guardadas de la sesión
+        
+        Returns:
+            Lista de pestañas en orden, con las claves de SESSION_TAB_COLUMNS
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT tab_id, is_active, url, title, icon, history
+                    FROM session_tabs ORDER BY position
+                ''')
+                return [dict(zip(SESSION_TAB_COLUMNS, row)) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"Error al obtener la sesión: {e}")
+            return []
+    
+    def save_session_tabs(self, tabs: List[Tuple], layout: List[Tuple],
+                          closed_ids: List[int]) -> bool:
+        """
+        Guardar los cambios de la sesión en una sola transacción
+        
+        Args:
+            tabs: Pestañas con contenido nuevo como
+                (tab_id, position, is_active, url, title, icon, history)
+            layout: Pestañas que solo cambiaron de posición o de estado activo
+                como (position, is_active, tab_id)
+            closed_ids: IDs de las pestañas cerradas
+            
+        Returns:
+            True si se guardó correctamente
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.executemany(SESSION_TAB_UPSERT, tabs)
+                cursor.executemany(
+                    'UPDATE session_tabs SET position = ?, is_active = ? WHERE tab_id = ?', layout)
+                for chunk in _chunks(closed_ids):
+                    placeholders = ','.join('?' * len(chunk))
+                    cursor.execute(
+                        f'DELETE FROM session_tabs WHERE tab_id IN ({placeholders})', chunk)
+                conn.commit()
+                return True
+        except sqlite3.Error as e:
+            print(f"Error al guardar la sesión: {e}")
+            return False
+    
+    def iter_history(self, batch_size: int = DEFAULT_PAGE_SIZE,
+                     favorites_only: bool = False) -> Iterator[Dict]:
+        """
+        Recorrer el historial completo por páginas (paginación por clave)
+        
+        Solo mantiene en memoria una página de resultados a la vez.
+        
+        Args:
+            batch_size: Número de filas leídas por consulta
+            favorites_only: Si es True, solo devuelve favoritos
+            
+        Yields:
+            Diccionarios con datos del historial, ordenados por id
+        """
+        favorite_filter = ('AND EXISTS (SELECT 1 FROM bookmarks WHERE bookmarks.url = history.url)'
+                           if favorites_only else '')
+        last_id = 0
+        try:
+            with closing(sqlite3.connect(self.db_path)) as conn:
+                while True:
+                    rows = conn.execute(f'''
+                        SELECT {HISTORY_SELECT_COLUMNS}
+                        FROM history
+                        WHERE id > ? {favorite_filter}
+                        ORDER BY id
+                        LIMIT ?
+                    ''', (last_id, batch_size)).fetchall()
+                    if not rows:
+                        break
+                    last_id = rows[-1][0]
+                    for row in rows:
+                        yield dict(zip(HISTORY_COLUMNS, row))
+        except sqlite3.Error as e:
+            print(f"Error al recorrer historial: {e}")
+    
+    def iter_history_urls(self, batch_size: int = DEFAULT_PAGE_SIZE) -> Iterator[str]:
+        """
+        Recorrer solo las URLs del historial por páginas
+        
+        A diferencia de iter_history, los errores de SQLite se propagan: quien
+        construye un índice con estas URLs debe saber si el recorrido terminó.
+        
+        Args:
+            batch_size: Número de filas leídas por consulta
+            
+        Yields:
+            URLs del historial
+        """
+        last_id = 0
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            while True:
+                rows = conn.execute('''
+                    SELECT id, url FROM history
+                    WHERE id > ?
+                    ORDER BY id
+                    LIMIT ?
+                ''', (last_id, batch_size)).fetchall()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                for row in rows:
+                    yield row[1]
+    
+    def iter_cookies(self, batch_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict]:
+        """
+        Recorrer todas las cookies por páginas
+        
+        Args:
+            batch_size: Número de filas leídas por consulta
+            
+        Yields:
+            Diccionarios con datos de las cookies
+        """
+        last_id = 0
+        try:
+            with closing(sqlite3.connect(self.db_path)) as conn:
+                while True:
+                    rows = conn.execute('''
+                        SELECT id, domain, name, value, path, expires, secure, http_only
+                        FROM cookies
+                        WHERE id > ?
+                        ORDER BY id
+                        LIMIT ?
+                    ''', (last_id, batch_size)).fetchall()
+                    if not rows:
+                        break
+                    last_id = rows[-1][0]
+                    for row in rows:
+                        yield dict(zip(COOKIE_COLUMNS, row[1:]))
+        except sqlite3.Error as e:
+            print(f"Error al recorrer cookies: {e}")
+    
+    def import_history_entries(self, entries: Iterable[Dict]) -> int:
+        """
+        Fusionar entradas de historial en una sola transacción
+        
+        Usa el UPSERT de fusión, por lo que repetir la importación es idempotente.
+        Las entradas con is_favorite se agregan además a los marcadores (como
+        import_favorites). Las URLs que no son http(s) (javascript:, data:...)
+        se omiten.
+        
+        Args:
+            entries: Entradas con url, title, visit_time, visit_count e is_favorite
+            
+        Returns:
+            Número de entradas importadas (0 si hubo error)
+        """
+        entries = [dict(e, url=URLUtils.canonicalize_url(e['url'])) for e in entries if e.get('url')]
+        entries = [e for e in entries if e['url'].startswith(IMPORTABLE_URL_PREFIXES)]
+        rows = [(e['url'], e.get('title'), e.get('visit_time'), e.get('visit_count'))
+                for e in entries]
+        count = self._executemany(HISTORY_MERGE_UPSERT, rows, "importar historial")
+        if count:
+            self.import_favorites(e for e in entries if e.get('is_favorite'))
+        if count:
+            self.mark_history_changed()
+        if count and self.visited_filter:
+            self.visited_filter.add_many(row[0] for row in rows)
+        return count
+    
+    def import_favorites(self, favorites: Iterable[Dict]) -> int:
+        """
+        Agregar a la raíz de marcadores las URLs que aún no lo estén, en una sola transacción
+        
+        Args:
+            favorites: Diccionarios con url y title
+            
+        Returns:
+            Número de favoritos procesados (0 si hubo error)
+        """
+        rows = [(None, f.get('title'), URLUtils.canonicalize_url(f['url']))
+                for f in favorites if f.get('url')]
+        return self._executemany(BOOKMARK_IMPORT, rows, "importar favoritos")
+    
+    def import_bookmark_tree(self, bookmarks: Iterable[Dict]) -> int:
+        """
+        Importar un árbol de marcadores exportado en una sola transacción
+        
+        Reconstruye las carpetas (también las vacías) y el orden dentro de cada
+        una. Las carpetas se fusionan con las que ya tienen el mismo nombre en
+        la misma carpeta y se omiten los marcadores cuya URL ya está guardada,
+        así que repetir la importación no duplica nada.
+        
+        Args:
+            bookmarks: Filas de iter_bookmarks (id, parent_id, position, title, url),
+                en cualquier orden
+            
+        Returns:
+            Número de marcadores y carpetas procesados (0 si hubo error)
+        """
+        rows = [b for b in bookmarks if b.get('id') is not None]
+        ids = {b['id'] for b in rows}
+        # Hijos de cada carpeta exportada; los que no tienen padre en el archivo van a la raíz
+        children: Dict[Optional[int], List[Dict]] = {}
+        for row in rows:
+            parent_id = row.get('parent_id')
+            children.setdefault(parent_id if parent_id in ids else None, []).append(row)
+        
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                # (ID de la carpeta en el archivo, ID de la carpeta creada o fusionada)
+                pending = [(None, None)]
+                while pending:
+                    old_parent, new_parent = pending.pop()
+                    for row in sorted(children.get(old_parent, ()),
+                                      key=lambda b: b.get('position') or 0):
+                        if row.get('url'):
+                            cursor.execute(BOOKMARK_IMPORT, (new_parent, row.get('title'),
+                                                             URLUtils.canonicalize_url(row['url'])))
+                            continue
+                        cursor.execute('''
+                            SELECT id FROM bookmarks
+                            WHERE parent_id IS ? AND url IS NULL AND title IS ?
+                            LIMIT 1
+                        ''', (new_parent, row.get('title')))
+                        folder = cursor.fetchone()
+                        if folder is None:
+                            cursor.execute(BOOKMARK_APPEND, (new_parent, row.get('title'),
+                                                             None, new_parent))
+                            folder_id = cursor.lastrowid
+                        else:
+                            folder_id = folder[0]
+                        pending.append((row['id'], folder_id))
+                conn.commit()
+                return len(rows)
+        except sqlite3.Error as e:
+            print(f"Error al importar marcadores: {e}")
+            return 0
+    
+    def import_cookies(self, cookies: Iterable[Dict]) -> int:
+        """
+        Insertar o reemplazar cookies en una sola transacción
+        
+        Args:
+            cookies: Diccionarios con las columnas de la tabla cookies
+            
+        Returns:
+            Número de cookies procesadas (0 si hubo error)
+        """
+        rows = [(c['domain'], c['name'], c.get('value'), c.get('path') or '/',
+                 c.get('expires'), bool(c.get('secure')), bool(c.get('http_only')))
+                for c in cookies if c.get('domain') and c.get('name')]
+        return self._executemany(COOKIE_UPSERT, rows, "importar cookies")
+    
+    def _executemany(self, sql: str, rows: List[Tuple], action: str) -> int:
+        """Ejecutar una sentencia para varias filas dentro de una transacción"""
+        if not rows:
+            return 0
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.executemany(sql, rows)
+                conn.commit()
+                return len(rows)
+        except sqlite3.Error as e:
+            print(f"Error al {action}: {e}")
+            return 0
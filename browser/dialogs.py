@@ -8,12 +8,20 @@ from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QListWidget,
                              QDialogButtonBox, QMessageBox, QTabWidget, QWidget,
                              QTableWidget, QTableWidgetItem, QComboBox, QSpinBox,
                              QCheckBox, QGroupBox, QFormLayout, QTextEdit,
-                             QHeaderView, QAbstractItemView, QSplitter)
-from PyQt5.QtCore import Qt, pyqtSignal, QDateTime
-from PyQt5.QtGui import QFont
+                             QHeaderView, QAbstractItemView, QSplitter, QListView,
+                             QUndoStack, QTreeView, QInputDialog, QTableView)
+from PyQt5.QtCore import Qt, pyqtSignal, QDateTime, QTimer
+from PyQt5.QtGui import QFont, QKeySequence
 import json
 from datetime import datetime
 
+from .models import (HistoryListModel, HistoryItemDelegate, BookmarkTreeModel,
+                     CookieTableModel)
+from .history_search import HistorySearchController
+from .history_commands import (DeleteHistoryCommand, SetFavoriteCommand,
+                               RemoveBookmarksCommand, UNDO_LIMIT)
+from .utils import CookieUtils, URLUtils
+
 class HistoryDialog(QDialog):
     """Diálogo para mostrar y gestionar el historial"""
     
@@ -41,16 +49,39 @@ class HistoryDialog(QDialog):
         search_layout.addWidget(self.search_input)
         
         self.search_button = QPushButton("Buscar")
-        self.search_button.clicked.connect(self.search_history)
+        self.search_button.clicked.connect(self.search_now)
         search_layout.addWidget(self.search_button)
         
         layout.addLayout(search_layout)
         
-        # Lista del historial
-        self.history_list = QListWidget()
-        self.history_list.itemDoubleClicked.connect(self.on_item_double_clicked)
+        # Lista del historial (modelo paginado, se dibuja bajo demanda)
+        self.history_model = HistoryListModel(self.db_manager, parent=self)
+        self.history_list = QListView()
+        self.history_list.setModel(self.history_model)
+        self.history_list.setItemDelegate(HistoryItemDelegate(self.history_list))
+        self.history_list.setUniformItemSizes(True)
+        self.history_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.history_list.doubleClicked.connect(self.on_item_double_clicked)
         layout.addWidget(self.history_list)
         
+        self.results_label = QLabel()
+        layout.addWidget(self.results_label)
+        
+        # Búsqueda en segundo plano con espera entre pulsaciones
+        self.search_controller = HistorySearchController(self.db_manager, parent=self)
+        self.search_controller.search_started.connect(self.on_search_started)
+        self.search_controller.results_ready.connect(self.history_model.append_entries)
+        self.search_controller.search_finished.connect(self.on_search_finished)
+        self.finished.connect(self.search_controller.cancel)
+        
+        # Operaciones por lotes que se pueden deshacer
+        self.undo_stack = QUndoStack(self)
+        self.undo_stack.setUndoLimit(UNDO_LIMIT)
+        self.undo_stack.indexChanged.connect(self.on_undo_index_changed)
+        undo_action = self.undo_stack.createUndoAction(self, "Deshacer")
+        undo_action.setShortcut(QKeySequence.Undo)
+        self.addAction(undo_action)
+        
         # Botones de acción
         button_layout = QHBoxLayout()
         
@@ -66,6 +97,16 @@ class HistoryDialog(QDialog):
         self.delete_button.clicked.connect(self.delete_selected)
         button_layout.addWidget(self.delete_button)
         
+        self.delete_domain_button = QPushButton("Eliminar Dominio")
+        self.delete_domain_button.clicked.connect(self.delete_domain)
+        button_layout.addWidget(self.delete_domain_button)
+        
+        self.undo_button = QPushButton("Deshacer")
+        self.undo_button.setEnabled(False)
+        self.undo_button.clicked.connect(self.undo_stack.undo)
+        self.undo_stack.canUndoChanged.connect(self.undo_button.setEnabled)
+        button_layout.addWidget(self.undo_button)
+        
         self.clear_button = QPushButton("Limpiar Todo")
         self.clear_button.clicked.connect(self.clear_history)
         button_layout.addWidget(self.clear_button)
@@ -79,64 +120,100 @@ class HistoryDialog(QDialog):
         layout.addLayout(button_layout)
     
     def load_history(self, search_term=None):
-        """Cargar el historial en la lista"""
-        self.history_list.clear()
-        
-        if search_term:
-            entries = self.db_manager.search_history(search_term)
-        else:
-            entries = self.db_manager.get_history()
-        
-        for entry in entries:
-            item_text = f"{entry['title'] or 'Sin título'}\n{entry['url']}\n"
-            item_text += f"Visitado: {entry['visit_time']} | Visitas: {entry['visit_count']}"
-            if entry['is_favorite']:
-                item_text += " ⭐"
-            
-            item = QListWidgetItem(item_text)
-            item.setData(Qt.UserRole, entry)
-            self.history_list.addItem(item)
+        """Cargar el historial en la lista (las páginas se leen al desplazarse)"""
+        # Las operaciones guardan filas del modelo anterior: deshacerlas aquí las colocaría mal
+        self.undo_stack.clear()
+        self.history_model.set_query(search_term)
+    
+    def on_undo_index_changed(self, index):
+        """Olvidar los resultados en memoria al hacer o deshacer una operación"""
+        # Vaciar la pila (al cambiar la búsqueda) no modifica el historial
+        if self.undo_stack.count():
+            self.search_controller.invalidate()
     
     def search_history(self):
-        """Buscar en el historial"""
-        search_term = self.search_input.text().strip()
-        self.load_history(search_term if search_term else None)
+        """Programar la búsqueda tras la última pulsación"""
+        self.search_controller.set_query(self.search_input.text())
     
-    def on_item_double_clicked(self, item):
+    def search_now(self):
+        """Buscar sin esperar"""
+        self.search_controller.set_query(self.search_input.text())
+        self.search_controller.search_now()
+    
+    def on_search_started(self, query: str):
+        """Preparar la lista para recibir los resultados"""
+        if query:
+            self.undo_stack.clear()
+            self.history_model.begin_results(query)
+            self.results_label.setText("Buscando...")
+        else:
+            self.load_history()
+            self.results_label.clear()
+    
+    def on_search_finished(self, query: str, count: int):
+        """Mostrar el número de resultados"""
+        if query:
+            self.results_label.setText(f"{count} resultados para \"{query}\"")
+    
+    def on_item_double_clicked(self, index):
         """Manejar doble clic en un elemento"""
         self.visit_selected()
     
     def visit_selected(self):
         """Visitar la URL seleccionada"""
-        current_item = self.history_list.currentItem()
-        if current_item:
-            entry = current_item.data(Qt.UserRole)
+        index = self.history_list.currentIndex()
+        if index.isValid():
+            entry = self.history_model.entry(index.row())
             self.url_selected.emit(entry['url'])
             self.close()
     
+    def selected_entries(self):
+        """Obtener las entradas seleccionadas en orden de aparición"""
+        rows = sorted(index.row() for index in self.history_list.selectedIndexes())
+        return [self.history_model.entry(row) for row in rows]
+    
     def toggle_favorite(self):
-        """Alternar el estado de favorito"""
-        current_item = self.history_list.currentItem()
-        if current_item:
-            entry = current_item.data(Qt.UserRole)
-            if self.db_manager.toggle_favorite(entry['id']):
-                self.load_history()
-                QMessageBox.information(self, "Favorito", 
-                                      "Estado de favorito actualizado")
+        """Marcar las entradas seleccionadas como favoritas, o desmarcarlas si ya lo son todas"""
+        entries = self.selected_entries()
+        if entries:
+            is_favorite = not all(entry['is_favorite'] for entry in entries)
+            text = "Marcar favoritos" if is_favorite else "Quitar favoritos"
+            self.undo_stack.push(SetFavoriteCommand(
+                self.db_manager, self.history_model,
+                [entry['id'] for entry in entries], is_favorite, text))
     
     def delete_selected(self):
-        """Eliminar la entrada seleccionada"""
-        current_item = self.history_list.currentItem()
-        if current_item:
-            entry = current_item.data(Qt.UserRole)
-            reply = QMessageBox.question(self, "Eliminar", 
-                                       f"¿Eliminar esta entrada del historial?\n{entry['url']}",
+        """Eliminar las entradas seleccionadas"""
+        entries = self.selected_entries()
+        if entries:
+            if len(entries) == 1:
+                question = f"¿Eliminar esta entrada del historial?\n{entries[0]['url']}"
+            else:
+                question = f"¿Eliminar {len(entries)} entradas del historial?"
+            reply = QMessageBox.question(self, "Eliminar", question,
                                        QMessageBox.Yes | QMessageBox.No)
             if reply == QMessageBox.Yes:
-                if self.db_manager.delete_history_entry(entry['id']):
-                    self.load_history()
-                    QMessageBox.information(self, "Eliminado", 
-                                          "Entrada eliminada del historial")
+                ids = [entry['id'] for entry in entries]
+                self.undo_stack.push(DeleteHistoryCommand(
+                    self.db_manager, self.history_model,
+                    lambda: self.db_manager.delete_history_entries(ids),
+                    f"Eliminar {len(ids)} entradas"))
+    
+    def delete_domain(self):
+        """Eliminar todo el historial del sitio de la entrada actual (con sus subdominios)"""
+        index = self.history_list.currentIndex()
+        if index.isValid():
+            domain = URLUtils.get_domain(self.history_model.entry(index.row())['url'])
+            if not domain:
+                return
+            reply = QMessageBox.question(self, "Eliminar Dominio", 
+                                       f"¿Eliminar todo el historial de {domain}?",
+                                       QMessageBox.Yes | QMessageBox.No)
+            if reply == QMessageBox.Yes:
+                self.undo_stack.push(DeleteHistoryCommand(
+                    self.db_manager, self.history_model,
+                    lambda: self.db_manager.delete_history_by_domain(domain),
+                    f"Eliminar {domain}"))
     
     def clear_history(self):
         """Limpiar todo el historial"""
@@ -145,6 +222,8 @@ class HistoryDialog(QDialog):
                                    QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
             if self.db_manager.clear_history():
+                self.undo_stack.clear()
+                self.search_controller.invalidate()
                 self.load_history()
                 QMessageBox.information(self, "Historial Limpiado", 
                                       "Todo el historial ha sido eliminado")
@@ -167,10 +246,15 @@ class FavoritesDialog(QDialog):
         """Configurar la interfaz del diálogo"""
         layout = QVBoxLayout(self)
         
-        # Lista de favoritos
-        self.favorites_list = QListWidget()
-        self.favorites_list.itemDoubleClicked.connect(self.on_item_double_clicked)
-        layout.addWidget(self.favorites_list)
+        # Árbol de marcadores (cada carpeta se lee al expandirla)
+        self.bookmark_model = BookmarkTreeModel(self.db_manager, parent=self)
+        self.favorites_tree = QTreeView()
+        self.favorites_tree.setModel(self.bookmark_model)
+        self.favorites_tree.setUniformRowHeights(True)
+        self.favorites_tree.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.favorites_tree.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.favorites_tree.doubleClicked.connect(self.on_item_double_clicked)
+        layout.addWidget(self.favorites_tree)
         
         # Botones de acción
         button_layout = QHBoxLayout()
@@ -179,10 +263,27 @@ class FavoritesDialog(QDialog):
         self.visit_button.clicked.connect(self.visit_selected)
         button_layout.addWidget(self.visit_button)
         
+        self.folder_button = QPushButton("Nueva Carpeta")
+        self.folder_button.clicked.connect(self.create_folder)
+        button_layout.addWidget(self.folder_button)
+        
         self.remove_button = QPushButton("Quitar de Favoritos")
         self.remove_button.clicked.connect(self.remove_favorite)
         button_layout.addWidget(self.remove_button)
         
+        # Quitar favoritos se puede deshacer
+        self.undo_stack = QUndoStack(self)
+        self.undo_stack.setUndoLimit(UNDO_LIMIT)
+        undo_action = self.undo_stack.createUndoAction(self, "Deshacer")
+        undo_action.setShortcut(QKeySequence.Undo)
+        self.addAction(undo_action)
+        
+        self.undo_button = QPushButton("Deshacer")
+        self.undo_button.setEnabled(False)
+        self.undo_button.clicked.connect(self.undo_stack.undo)
+        self.undo_stack.canUndoChanged.connect(self.undo_button.setEnabled)
+        button_layout.addWidget(self.undo_button)
+        
         button_layout.addStretch()
         
         self.close_button = QPushButton("Cerrar")
@@ -192,46 +293,68 @@ class FavoritesDialog(QDialog):
         layout.addLayout(button_layout)
     
     def load_favorites(self):
-        """Cargar favoritos en la lista"""
-        self.favorites_list.clear()
-        
-        favorites = self.db_manager.get_favorites()
-        
-        for favorite in favorites:
-            item_text = f"{favorite['title'] or 'Sin título'}\n{favorite['url']}"
-            item = QListWidgetItem(item_text)
-            item.setData(Qt.UserRole, favorite)
-            self.favorites_list.addItem(item)
+        """Cargar el primer nivel de marcadores"""
+        self.bookmark_model.reload_folder(None)
     
-    def on_item_double_clicked(self, item):
+    def on_item_double_clicked(self, index):
         """Manejar doble clic en un elemento"""
-        self.visit_selected()
+        entry = self.bookmark_model.entry(index)
+        if entry and not entry['is_folder']:
+            self.visit_selected()
     
     def visit_selected(self):
         """Visitar la URL seleccionada"""
-        current_item = self.favorites_list.currentItem()
-        if current_item:
-            favorite = current_item.data(Qt.UserRole)
-            self.url_selected.emit(favorite['url'])
+        entry = self.bookmark_model.entry(self.favorites_tree.currentIndex())
+        if entry and entry['url']:
+            self.url_selected.emit(entry['url'])
             self.close()
     
+    def create_folder(self):
+        """Crear una carpeta dentro de la carpeta seleccionada (o de la raíz)"""
+        title, ok = QInputDialog.getText(self, "Nueva Carpeta", "Nombre de la carpeta:")
+        if not ok or not title.strip():
+            return
+        
+        parent = self.favorites_tree.currentIndex()
+        entry = self.bookmark_model.entry(parent)
+        if entry and not entry['is_folder']:
+            parent = parent.parent()
+        parent = parent.sibling(parent.row(), 0) if parent.isValid() else parent
+        parent_id = self.bookmark_model.entry(parent)['id'] if parent.isValid() else None
+        
+        folder_id = self.db_manager.add_bookmark_folder(title.strip(), parent_id)
+        if folder_id is not None:
+            self.bookmark_model.append_entry(parent, {
+                'id': folder_id, 'parent_id': parent_id, 'position': None,
+                'title': title.strip(), 'url': None, 'is_folder': 1, 'has_children': 0})
+            if parent.isValid():
+                self.favorites_tree.expand(parent)
+    
     def remove_favorite(self):
-        """Quitar de favoritos"""
-        current_item = self.favorites_list.currentItem()
-        if current_item:
-            favorite = current_item.data(Qt.UserRole)
-            reply = QMessageBox.question(self, "Quitar Favorito", 
-                                       f"¿Quitar de favoritos?\n{favorite['url']}",
+        """Quitar de favoritos los marcadores y carpetas seleccionados"""
+        entries = [self.bookmark_model.entry(index)
+                   for index in self.favorites_tree.selectionModel().selectedRows()]
+        if entries:
+            if len(entries) == 1 and not entries[0]['is_folder']:
+                question = f"¿Quitar de favoritos?\n{entries[0]['url']}"
+            elif any(entry['is_folder'] for entry in entries):
+                question = f"¿Quitar {len(entries)} elementos y el contenido de las carpetas?"
+            else:
+                question = f"¿Quitar {len(entries)} favoritos?"
+            reply = QMessageBox.question(self, "Quitar Favorito", question,
                                        QMessageBox.Yes | QMessageBox.No)
             if reply == QMessageBox.Yes:
-                if self.db_manager.toggle_favorite(favorite['id']):
-                    self.load_favorites()
-                    QMessageBox.information(self, "Removido", 
-                                          "Quitado de favoritos")
+                self.undo_stack.push(RemoveBookmarksCommand(
+                    self.db_manager, self.bookmark_model,
+                    [entry['id'] for entry in entries],
+                    f"Quitar {len(entries)} favoritos"))
 
 class CookiesDialog(QDialog):
     """Diálogo para gestionar cookies"""
     
+    # Espera tras la última pulsación antes de filtrar
+    FILTER_DELAY_MS = 200
+    
     def __init__(self, db_manager, parent=None):
         super().__init__(parent)
         self.db_manager = db_manager
@@ -239,7 +362,6 @@ class CookiesDialog(QDialog):
         self.setGeometry(200, 200, 800, 500)
         
         self.setup_ui()
-        self.load_cookies()
     
     def setup_ui(self):
         """Configurar la interfaz del diálogo"""
@@ -250,23 +372,30 @@ class CookiesDialog(QDialog):
         filter_layout.addWidget(QLabel("Filtrar por dominio:"))
         self.domain_filter = QLineEdit()
         self.domain_filter.setPlaceholderText("Todos los dominios")
-        self.domain_filter.textChanged.connect(self.filter_cookies)
         filter_layout.addWidget(self.domain_filter)
         
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(self.FILTER_DELAY_MS)
+        self.filter_timer.timeout.connect(self.filter_cookies)
+        self.domain_filter.textChanged.connect(self.filter_timer.start)
+        
         self.filter_button = QPushButton("Filtrar")
         self.filter_button.clicked.connect(self.filter_cookies)
         filter_layout.addWidget(self.filter_button)
         
         layout.addLayout(filter_layout)
         
-        # Tabla de cookies
-        self.cookies_table = QTableWidget()
-        self.cookies_table.setColumnCount(7)
-        self.cookies_table.setHorizontalHeaderLabels([
-            "Dominio", "Nombre", "Valor", "Ruta", "Expira", "Segura", "HTTP Only"
-        ])
+        # Tabla de cookies (modelo virtual ordenado en SQL)
+        self.cookies_model = CookieTableModel(self.db_manager, parent=self)
+        self.cookies_table = QTableView()
+        self.cookies_table.setModel(self.cookies_model)
         self.cookies_table.horizontalHeader().setStretchLastSection(True)
+        self.cookies_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         self.cookies_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        # Activar la ordenación hace la primera carga
+        self.cookies_table.horizontalHeader().setSortIndicator(0, Qt.AscendingOrder)
+        self.cookies_table.setSortingEnabled(True)
         layout.addWidget(self.cookies_table)
         
         # Botones de acción
@@ -293,30 +422,18 @@ class CookiesDialog(QDialog):
         layout.addLayout(button_layout)
     
     def load_cookies(self, domain=None):
-        """Cargar cookies en la tabla"""
-        cookies = self.db_manager.get_cookies(domain)
-        
-        self.cookies_table.setRowCount(len(cookies))
-        
-        for row, cookie in enumerate(cookies):
-            self.cookies_table.setItem(row, 0, QTableWidgetItem(cookie['domain']))
-            self.cookies_table.setItem(row, 1, QTableWidgetItem(cookie['name']))
-            self.cookies_table.setItem(row, 2, QTableWidgetItem(cookie['value'][:50] + "..." if len(cookie['value']) > 50 else cookie['value']))
-            self.cookies_table.setItem(row, 3, QTableWidgetItem(cookie['path']))
-            self.cookies_table.setItem(row, 4, QTableWidgetItem(str(cookie['expires']) if cookie['expires'] else "Sesión"))
-            self.cookies_table.setItem(row, 5, QTableWidgetItem("Sí" if cookie['secure'] else "No"))
-            self.cookies_table.setItem(row, 6, QTableWidgetItem("Sí" if cookie['http_only'] else "No"))
+        """Cargar cookies en la tabla (domain filtra por prefijo de dominio)"""
+        self.cookies_model.set_domain_prefix(domain)
     
     def filter_cookies(self):
         """Filtrar cookies por dominio"""
+        self.filter_timer.stop()
         domain = self.domain_filter.text().strip()
         self.load_cookies(domain if domain else None)
     
     def delete_selected_cookies(self):
         """Eliminar cookies seleccionadas"""
-        selected_rows = set()
-        for item in self.cookies_table.selectedItems():
-            selected_rows.add(item.row())
+        selected_rows = [index.row() for index in self.cookies_table.selectionModel().selectedRows()]
         
         if not selected_rows:
             QMessageBox.information(self, "Sin Selección", 
@@ -328,10 +445,9 @@ class CookiesDialog(QDialog):
                                    QMessageBox.Yes | QMessageBox.No)
         
         if reply == QMessageBox.Yes:
-            # Nota: Esto requeriría una implementación más específica en el DatabaseManager
-            # para eliminar cookies individuales
-            QMessageBox.information(self, "Función Pendiente", 
-                                  "Eliminación de cookies individuales en desarrollo")
+            ids = [self.cookies_model.cookie_id(row) for row in selected_rows]
+            if self.db_manager.delete_cookies_by_ids(ids):
+                self.cookies_model.remove_rows(selected_rows)
     
     def delete_domain_cookies(self):
         """Eliminar cookies de un dominio específico"""
@@ -341,15 +457,16 @@ class CookiesDialog(QDialog):
                                   "Ingresa un dominio para eliminar sus cookies")
             return
         
+        site = CookieUtils.get_cookie_site(domain)
         reply = QMessageBox.question(self, "Eliminar Cookies del Dominio", 
-                                   f"¿Eliminar todas las cookies de {domain}?",
+                                   f"¿Eliminar todas las cookies de {site} y sus subdominios?",
                                    QMessageBox.Yes | QMessageBox.No)
         
         if reply == QMessageBox.Yes:
             if self.db_manager.delete_cookies(domain):
-                self.load_cookies()
+                self.cookies_model.reload()
                 QMessageBox.information(self, "Cookies Eliminadas", 
-                                      f"Cookies de {domain} eliminadas")
+                                      f"Cookies de {site} eliminadas")
     
     def clear_all_cookies(self):
         """Eliminar todas las cookies"""
@@ -359,7 +476,7 @@ class CookiesDialog(QDialog):
         
         if reply == QMessageBox.Yes:
             if self.db_manager.delete_cookies():
-                self.load_cookies()
+                self.cookies_model.reload()
                 QMessageBox.information(self, "Cookies Eliminadas", 
                                       "Todas las cookies han sido eliminadas")
 
@@ -0,0 +1,326 @@
+"""
+Lista de bloqueo de dominios
+Guarda millones de dominios como hashes ordenados en un archivo mapeado en
+memoria, con un filtro de Bloom delante y recarga en caliente
+"""
+
+import bisect
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from array import array
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from .public_suffix import public_suffix
+
+# Cabecera: magia, versión, número de dominios, bits y funciones hash del filtro de
+# Bloom, y relleno para que los hashes queden alineados a 8 bytes. Los hashes se
+# guardan en el orden de bytes de la máquina que compila la lista.
+HEADER = struct.Struct("<4sIQQII")
+MAGIC = b"PYDL"
+VERSION = 1
+
+# Filtro de Bloom poco lleno (~22 % de bits a 1, ~0,25 % de falsos positivos):
+# casi todas las búsquedas negativas terminan en la primera posición
+BLOOM_BITS_PER_DOMAIN = 16
+BLOOM_HASHES = 4
+
+# Resultados recientes por host (los hosts se repiten mucho al navegar)
+HOST_CACHE_SIZE = 4096
+
+# Segundos entre comprobaciones de cambios en los archivos
+RELOAD_CHECK_INTERVAL = 5.0
+
+# Prefijos de las líneas en formato hosts
+HOSTS_ADDRESSES = frozenset({'0.0.0.0', '127.0.0.1', '::', '::1'})
+
+def domain_hash(domain: str) -> int:
+    """
+    Hash de 64 bits de un dominio
+
+    CRC-32 y Adler-32 juntos son varias veces más rápidos que un hash
+    criptográfico y sin colisiones prácticas para listas de millones de dominios.
+    """
+    data = domain.encode('utf-8')
+    return zlib.crc32(data) | zlib.adler32(data) << 32
+
+def normalize_entry(line: str) -> Optional[str]:
+    """
+    Extraer el dominio de una línea de la lista de origen
+
+    Acepta un dominio por línea, el formato hosts (0.0.0.0 dominio) y reglas
+    ||dominio^; ignora comentarios y líneas vacías.
+
+    Returns:
+        El dominio en minúsculas, o None si la línea no tiene ninguno
+    """
+    line = line.split('#', 1)[0].strip()
+    if not line or line.startswith('!'):
+        return None
+    fields = line.split()
+    if len(fields) > 1 and fields[0] in HOSTS_ADDRESSES:
+        line = fields[1]
+    elif len(fields) > 1:
+        return None
+    if line.startswith('||'):
+        line = line[2:].rstrip('^')
+    domain = line.lower().rstrip('.')
+    if '.' not in domain or '/' in domain or domain == 'localhost':
+        return None
+    return domain
+
+def bloom_positions(value: int, num_bits: int, num_hashes: int) -> Iterator[int]:
+    """Posiciones del filtro de Bloom de un hash (doble hashing)"""
+    h1 = value & 0xFFFFFFFF
+    h2 = (value >> 32) | 1
+    for i in range(num_hashes):
+        yield (h1 + i * h2) % num_bits
+
+def compile_blocklist(domains: Iterable[str], target_path: str) -> int:
+    """
+    Compilar una lista de dominios al formato binario
+
+    El archivo se escribe aparte y se sustituye de forma atómica, así que una
+    instancia abierta puede recargarlo en caliente.
+
+    Args:
+        domains: Dominios (sin normalizar) o líneas del archivo de origen
+        target_path: Ruta del archivo compilado
+
+    Returns:
+        Número de dominios distintos
+    """
+    hashes = array('Q', sorted({domain_hash(domain) for domain in
+                                filter(None, map(normalize_entry, domains))}))
+    count = len(hashes)
+    num_hashes = BLOOM_HASHES
+    # Múltiplo de 64 bits para que los hashes sigan alineados
+    num_bits = max(64, -(-count * BLOOM_BITS_PER_DOMAIN // 64) * 64)
+    bloom = bytearray(num_bits // 8)
+    for value in hashes:
+        for position in bloom_positions(value, num_bits, num_hashes):
+            bloom[position >> 3] |= 1 << (position & 7)
+
+    temp_path = target_path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, count, num_bits, num_hashes, 0))
+        f.write(bloom)
+        hashes.tofile(f)
+    os.replace(temp_path, target_path)
+    return count
+
+class _Table:
+    """Archivo compilado abierto; se libera cuando deja de usarse"""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, version, self.count, self.num_bits, self.num_hashes, _ = HEADER.unpack_from(view)
+        bloom_end = HEADER.size + self.num_bits // 8
+        if magic != MAGIC or version != VERSION or len(view) != bloom_end + 8 * self.count:
+            view.release()
+            self._mmap.close()
+            raise ValueError(f"Lista de bloqueo no válida: {path}")
+        self.bloom = view[HEADER.size:bloom_end]
+        self.hashes = view[bloom_end:].cast('Q')
+
+    def contains(self, value: int) -> Tuple[bool, bool]:
+        """
+        Buscar un hash
+
+        Returns:
+            (está en la lista, lo descartó el filtro de Bloom)
+        """
+        # Igual que bloom_positions, sin generador: es el camino más frecuente
+        bloom = self.bloom
+        num_bits = self.num_bits
+        position = value & 0xFFFFFFFF
+        step = (value >> 32) | 1
+        for _ in range(self.num_hashes):
+            bit = position % num_bits
+            if not bloom[bit >> 3] & (1 << (bit & 7)):
+                return False, True
+            position += step
+        hashes = self.hashes
+        index = bisect.bisect_left(hashes, value)
+        return index < self.count and hashes[index] == value, False
+
+class DomainBlocklist:
+    """
+    Lista de bloqueo de dominios compartida por todas las ventanas de un perfil
+
+    La lista de origen (`domains.txt`) se compila a `domains.bin`, que se abre
+    mapeado en memoria: solo se leen del disco las páginas que tocan las
+    búsquedas. Cada RELOAD_CHECK_INTERVAL segundos se comprueba si alguno de
+    los dos archivos cambió y, si es así, se recarga en segundo plano sin
+    interrumpir las búsquedas.
+    """
+
+    DIRNAME = "blocklist"
+    SOURCE_FILENAME = "domains.txt"
+    COMPILED_FILENAME = "domains.bin"
+
+    _instances: Dict[str, "DomainBlocklist"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: str, source_path: Optional[str] = None,
+                 check_interval: float = RELOAD_CHECK_INTERVAL):
+        """
+        Args:
+            path: Ruta del archivo compilado
+            source_path: Lista de origen que se recompila al cambiar (opcional)
+            check_interval: Segundos entre comprobaciones de cambios
+        """
+        self.path = path
+        self.source_path = source_path
+        self.check_interval = check_interval
+        self._table: Optional[_Table] = None
+        self._signature = None
+        self._host_cache: Dict[str, bool] = {}
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self._reload_thread: Optional[threading.Thread] = None
+
+        # Métricas
+        self.lookups = 0
+        self.bloom_rejections = 0
+        self.reloads = 0
+
+    @classmethod
+    def for_data_dir(cls, data_dir: str) -> "DomainBlocklist":
+        """Obtener la instancia compartida para un directorio de datos"""
+        directory = os.path.join(data_dir, cls.DIRNAME)
+        path = os.path.join(directory, cls.COMPILED_FILENAME)
+        with cls._instances_lock:
+            instance = cls._instances.get(path)
+            if instance is None:
+                instance = cls(path, os.path.join(directory, cls.SOURCE_FILENAME))
+                cls._instances[path] = instance
+            return instance
+
+    @property
+    def count(self) -> int:
+        """Número de dominios cargados"""
+        table = self._table
+        return table.count if table else 0
+
+    @staticmethod
+    def _stat(path: Optional[str]) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(path)
+        except (OSError, TypeError):
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _current_signature(self) -> Tuple:
+        return (self._stat(self.path), self._stat(self.source_path))
+
+    def reload(self) -> bool:
+        """
+        Recompilar la lista de origen si es más reciente y abrir el archivo compilado
+
+        Returns:
+            True si hay una lista cargada
+        """
+        try:
+            compiled, source = self._current_signature()
+            if source is not None and (compiled is None or source[0] > compiled[0]):
+                with open(self.source_path, encoding='utf-8', errors='replace') as f:
+                    compile_blocklist(f, self.path)
+            signature = self._current_signature()
+            table = _Table(self.path) if signature[0] is not None else None
+        except (OSError, ValueError) as e:
+            print(f"Error al cargar la lista de bloqueo: {e}")
+            return self._table is not None
+
+        with self._lock:
+            # La tabla anterior se libera cuando terminan las búsquedas en curso
+            self._table = table
+            self._host_cache = {}
+            self._signature = signature
+            self.reloads += 1
+        return table is not None
+
+    def start_reload(self) -> threading.Thread:
+        """Recargar la lista en un hilo en segundo plano"""
+        with self._lock:
+            if self._reload_thread and self._reload_thread.is_alive():
+                return self._reload_thread
+            self._reload_thread = threading.Thread(
+                target=self.reload, name="domain-blocklist-reload", daemon=True)
+        self._reload_thread.start()
+        return self._reload_thread
+
+    def maybe_reload(self) -> Optional[threading.Thread]:
+        """
+        Recargar en segundo plano si alguno de los archivos cambió
+
+        Como mucho una comprobación cada check_interval segundos. Se llama
+        también con la lista vacía, para cargar una lista que aparece después
+        del arranque.
+
+        Returns:
+            Hilo de la recarga, o None si no hizo falta
+        """
+        now = time.monotonic()
+        if now < self._next_check:
+            return None
+        self._next_check = now + self.check_interval
+        if self._current_signature() != self._signature:
+            return self.start_reload()
+        return None
+
+    def contains(self, domain: str) -> bool:
+        """Comprobar si un dominio exacto está en la lista"""
+        table = self._table
+        if table is None:
+            return False
+        found, rejected = table.contains(domain_hash(domain))
+        self.bloom_rejections += rejected
+        return found
+
+    def is_blocked(self, host: str) -> bool:
+        """
+        Comprobar si un host o alguno de sus dominios padre está en la lista
+
+        Args:
+            host: Nombre de host en minúsculas
+
+        Returns:
+            True si el host está bloqueado
+        """
+        self.maybe_reload()
+        table = self._table
+        if table is None or not host:
+            return False
+        self.lookups += 1
+        cache = self._host_cache
+        blocked = cache.get(host)
+        if blocked is None:
+            blocked = self._lookup(table, host)
+            if len(cache) >= HOST_CACHE_SIZE:
+                cache.clear()
+            cache[host] = blocked
+        return blocked
+
+    def _lookup(self, table: _Table, host: str) -> bool:
+        host = host.rstrip('.')
+        # Se consultan el host y sus padres hasta el dominio registrable; los
+        # sufijos públicos (com, co.uk, github.io...) nunca. Una IP solo se
+        # consulta entera.
+        suffix = public_suffix(host)
+        stop = len(host) - len(suffix) if suffix else 1
+        start = 0
+        while start < stop:
+            found, rejected = table.contains(domain_hash(host[start:]))
+            if found:
+                return True
+            self.bloom_rejections += rejected
+            start = host.find('.', start) + 1
+            if not start:
+                break
+        return False
@@ -0,0 +1,109 @@
+"""
+Operaciones por lotes sobre el historial y los favoritos con soporte para deshacer
+Cada operación se ejecuta en una sola transacción y actualiza la vista sin reconsultar
+"""
+
+from typing import Callable, Dict, List
+
+from PyQt5.QtWidgets import QUndoCommand
+
+# Número de operaciones que se pueden deshacer en cada diálogo
+UNDO_LIMIT = 20
+
+class DeleteHistoryCommand(QUndoCommand):
+    """Eliminar entradas del historial y quitarlas del modelo"""
+
+    def __init__(self, db_manager, model, delete: Callable[[], List[Dict]], text: str):
+        """
+        Args:
+            db_manager: Instancia de DatabaseManager
+            model: HistoryListModel mostrado en el diálogo
+            delete: Función que elimina las entradas y devuelve las eliminadas
+            text: Descripción de la operación
+        """
+        super().__init__(text)
+        self.db_manager = db_manager
+        self.model = model
+        self.delete = delete
+        self.deleted: List[Dict] = []
+        self.removed = []
+
+    def redo(self):
+        if self.deleted:
+            # Rehacer: las entradas conservan sus IDs tras deshacer
+            self.db_manager.delete_history_entries(entry['id'] for entry in self.deleted)
+        else:
+            self.deleted = self.delete()
+            if not self.deleted:
+                self.setObsolete(True)
+                return
+        self.removed = self.model.remove_ids(entry['id'] for entry in self.deleted)
+
+    def undo(self):
+        restored = set(self.db_manager.restore_history_entries(self.deleted))
+        self.model.insert_entries([(row, entry) for row, entry in self.removed
+                                   if entry['id'] in restored])
+
+class SetFavoriteCommand(QUndoCommand):
+    """Marcar o desmarcar entradas como favoritas"""
+
+    def __init__(self, db_manager, model, entry_ids: List[int], is_favorite: bool, text: str):
+        """
+        Args:
+            db_manager: Instancia de DatabaseManager
+            model: HistoryListModel mostrado en el diálogo
+            entry_ids: IDs de las entradas
+            is_favorite: Nuevo estado de favorito
+            text: Descripción de la operación
+        """
+        super().__init__(text)
+        self.db_manager = db_manager
+        self.model = model
+        self.entry_ids = entry_ids
+        self.is_favorite = is_favorite
+        self.changed: List[int] = None
+
+    def redo(self):
+        if self.changed is None:
+            self.changed = self.db_manager.set_favorite(self.entry_ids, self.is_favorite)
+            if not self.changed:
+                self.setObsolete(True)
+                return
+        else:
+            self.db_manager.set_favorite(self.changed, self.is_favorite)
+        self.model.update_ids(self.changed, is_favorite=self.is_favorite)
+
+    def undo(self):
+        self.db_manager.set_favorite(self.changed, not self.is_favorite)
+        self.model.update_ids(self.changed, is_favorite=not self.is_favorite)
+
+class RemoveBookmarksCommand(QUndoCommand):
+    """Eliminar marcadores y carpetas del árbol de favoritos"""
+
+    def __init__(self, db_manager, model, bookmark_ids: List[int], text: str):
+        """
+        Args:
+            db_manager: Instancia de DatabaseManager
+            model: BookmarkTreeModel mostrado en el diálogo
+            bookmark_ids: IDs de los marcadores o carpetas seleccionados
+            text: Descripción de la operación
+        """
+        super().__init__(text)
+        self.db_manager = db_manager
+        self.model = model
+        self.bookmark_ids = bookmark_ids
+        self.deleted: List[Dict] = []
+
+    def redo(self):
+        self.deleted = self.db_manager.delete_bookmarks(self.bookmark_ids)
+        if not self.deleted:
+            self.setObsolete(True)
+            return
+        self.model.remove_ids(self.bookmark_ids)
+
+    def undo(self):
+        self.db_manager.restore_bookmarks(self.deleted)
+        deleted_ids = {row['id'] for row in self.deleted}
+        for parent_id in {row['parent_id'] for row in self.deleted
+                          if row['parent_id'] not in deleted_ids}:
+            self.model.reload_folder(parent_id)
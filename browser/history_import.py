@@ -0,0 +1,202 @@
+"""
+Importación masiva del historial de Firefox y de navegadores Chromium
+Lee places.sqlite / History desde una copia temporal y lo vuelca en nuestro esquema
+"""
+
+import glob
+import os
+import shutil
+import sqlite3
+import tempfile
+from contextlib import closing
+from typing import Callable, List, Optional, Tuple
+from urllib.request import pathname2url
+
+from .database import (HISTORY_MERGE_ON_CONFLICT, HISTORY_SECONDARY_INDEXES,
+                       register_url_functions)
+
+SOURCE_FIREFOX = "firefox"
+SOURCE_CHROMIUM = "chromium"
+
+# Diferencia en segundos entre 1601-01-01 (época de Chromium) y 1970-01-01
+CHROMIUM_EPOCH_OFFSET = 11644473600
+
+# Consultas de origen: (tabla, expresión de visit_time, filtro)
+# Las marcas de tiempo son enteros en microsegundos; se convierten con aritmética entera
+SOURCE_QUERIES = {
+    SOURCE_FIREFOX: (
+        "moz_places",
+        "datetime(last_visit_date / 1000000, 'unixepoch')",
+        "visit_count > 0 AND last_visit_date IS NOT NULL",
+    ),
+    SOURCE_CHROMIUM: (
+        "urls",
+        f"datetime(last_visit_time / 1000000 - {CHROMIUM_EPOCH_OFFSET}, 'unixepoch')",
+        "visit_count > 0 AND last_visit_time > 0",
+    ),
+}
+
+# Rutas habituales de los perfiles (patrones glob relativos a HOME)
+PROFILE_PATTERNS = {
+    SOURCE_FIREFOX: [
+        ".mozilla/firefox/*/places.sqlite",
+        "snap/firefox/common/.mozilla/firefox/*/places.sqlite",
+        "Library/Application Support/Firefox/Profiles/*/places.sqlite",
+        "AppData/Roaming/Mozilla/Firefox/Profiles/*/places.sqlite",
+    ],
+    SOURCE_CHROMIUM: [
+        ".config/chromium/*/History",
+        ".config/google-chrome/*/History",
+        ".config/BraveSoftware/Brave-Browser/*/History",
+        ".config/microsoft-edge/*/History",
+        "Library/Application Support/Google/Chrome/*/History",
+        "AppData/Local/Google/Chrome/User Data/*/History",
+    ],
+}
+
+def _sqlite_uri(path: str, read_only: bool = False) -> str:
+    """Construir una URI de SQLite para una ruta local"""
+    uri = "file:" + pathname2url(os.path.abspath(path))
+    return uri + "?mode=ro" if read_only else uri
+
+class BrowserHistoryImporter:
+    """Importador del historial de otros navegadores"""
+
+    def __init__(self, db_manager, batch_size: int = 50000):
+        """
+        Args:
+            db_manager: Instancia de DatabaseManager
+            batch_size: Filas de origen procesadas por transacción
+        """
+        self.db_manager = db_manager
+        self.batch_size = batch_size
+
+    @staticmethod
+    def find_profiles(home: str = None) -> List[Tuple[str, str]]:
+        """
+        Buscar bases de datos de historial en las rutas habituales
+
+        Returns:
+            Lista de tuplas (tipo de navegador, ruta)
+        """
+        home = home or os.path.expanduser("~")
+        found = []
+        for source, patterns in PROFILE_PATTERNS.items():
+            for pattern in patterns:
+                for path in sorted(glob.glob(os.path.join(home, pattern))):
+                    found.append((source, path))
+        return found
+
+    @staticmethod
+    def detect_source(path: str) -> Optional[str]:
+        """
+        Detectar si un archivo es un historial de Firefox o de Chromium
+
+        Falla (None) con el archivo de un navegador en ejecución, que lo
+        mantiene bloqueado: import_file lo usa sobre la copia temporal.
+        """
+        try:
+            with closing(sqlite3.connect(_sqlite_uri(path, read_only=True), uri=True)) as conn:
+                tables = {row[0] for row in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table'")}
+        except sqlite3.Error:
+            return None
+
+        if "moz_places" in tables:
+            return SOURCE_FIREFOX
+        if "urls" in tables and "visits" in tables:
+            return SOURCE_CHROMIUM
+        return None
+
+    @staticmethod
+    def _make_temp_copy(path: str, temp_dir: str) -> str:
+        """
+        Copiar la base de datos (y su WAL) a un directorio temporal
+
+        Los navegadores en ejecución bloquean el archivo, así que se trabaja
+        sobre una copia a la que se le integra el WAL antes de abrirla.
+        """
+        copy_path = os.path.join(temp_dir, "source.sqlite")
+        shutil.copyfile(path, copy_path)
+        if os.path.exists(path + "-wal"):
+            shutil.copyfile(path + "-wal", copy_path + "-wal")
+
+        with closing(sqlite3.connect(copy_path)) as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("PRAGMA journal_mode = DELETE")
+        return copy_path
+
+    def import_file(self, path: str, source: str = None,
+                    progress_callback: Optional[Callable[[int, int], None]] = None) -> int:
+        """
+        Importar un historial de Firefox o Chromium
+
+        Args:
+            path: Ruta a places.sqlite o History
+            source: SOURCE_FIREFOX o SOURCE_CHROMIUM; se detecta si es None
+            progress_callback: Función llamada con (filas procesadas, filas totales)
+
+        Returns:
+            Número de entradas insertadas o actualizadas
+        """
+        with tempfile.TemporaryDirectory(prefix="pybrowser-import-") as temp_dir:
+            copy_path = self._make_temp_copy(path, temp_dir)
+            # Se detecta en la copia: el navegador en ejecución bloquea el original
+            source = source or self.detect_source(copy_path)
+            if source not in SOURCE_QUERIES:
+                raise ValueError(f"No se reconoce el historial: {path}")
+            with closing(sqlite3.connect(_sqlite_uri(self.db_manager.db_path), uri=True)) as conn:
+                register_url_functions(conn)
+                conn.execute("ATTACH DATABASE ? AS src", (_sqlite_uri(copy_path, read_only=True),))
+                try:
+                    imported = self._import_attached(conn, source, progress_callback)
+                finally:
+                    conn.commit()
+                    conn.execute("DETACH DATABASE src")
+
+        # La carga masiva no pasa por add_history_entry: reconstruir el filtro
+        if imported:
+            self.db_manager.mark_history_changed()
+        if imported and self.db_manager.visited_filter:
+            self.db_manager.visited_filter.start_rebuild(self.db_manager)
+        return imported
+
+    def _import_attached(self, conn: sqlite3.Connection, source: str,
+                         progress_callback: Optional[Callable[[int, int], None]]) -> int:
+        """Copiar filas de la base adjunta `src` en lotes por rango de id"""
+        table, visit_time_sql, filter_sql = SOURCE_QUERIES[source]
+        min_id, max_id = conn.execute(f"SELECT MIN(id), MAX(id) FROM src.{table}").fetchone()
+        if min_id is None:
+            return 0
+
+        insert_sql = f"""
+            INSERT INTO history (url, title, visit_time, visit_count)
+            SELECT canonical_url(url), NULLIF(title, ''), {visit_time_sql}, visit_count
+            FROM src.{table}
+            WHERE id >= ? AND id < ? AND {filter_sql}
+                AND (url LIKE 'http://%' OR url LIKE 'https://%')
+        """ + HISTORY_MERGE_ON_CONFLICT
+
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA cache_size = -65536")
+
+        # Diferir los índices secundarios hasta terminar la carga
+        for index_name in HISTORY_SECONDARY_INDEXES:
+            conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+        conn.commit()
+
+        imported = 0
+        total = max_id - min_id + 1
+        try:
+            for start in range(min_id, max_id + 1, self.batch_size):
+                cursor = conn.execute(insert_sql, (start, start + self.batch_size))
+                imported += max(cursor.rowcount, 0)
+                conn.commit()
+                if progress_callback:
+                    progress_callback(min(start + self.batch_size - min_id, total), total)
+        finally:
+            for create_index_sql in HISTORY_SECONDARY_INDEXES.values():
+                conn.execute(create_index_sql)
+            conn.commit()
+
+        return imported
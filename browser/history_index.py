@@ -0,0 +1,302 @@
+"""
+Índice de búsqueda del historial en memoria
+Busca y ordena por relevancia una instantánea del historial sin la base de
+datos (herramientas sin conexión, o cuando la base de datos no está disponible)
+"""
+
+import heapq
+import math
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy
+    HAS_NUMPY = True
+except ImportError:
+    numpy = None
+    HAS_NUMPY = False
+
+# Separador de filas dentro de cada columna (no aparece en URLs ni títulos)
+ROW_SEPARATOR = '\x00'
+
+# Instantáneas a partir de las cuales se usa NumPy para puntuar y ordenar
+NUMPY_MIN_ENTRIES = 20000
+
+# Pesos de la puntuación de cada término
+TITLE_WEIGHT = 2.0       # el término aparece en el título
+URL_WEIGHT = 1.0         # el término aparece en la URL
+HOST_PREFIX_WEIGHT = 1.5 # el host (sin www.) empieza por el término
+FUZZY_WEIGHT = 0.5       # solo coincide como subsecuencia del título o el host (gthb -> github)
+
+# Pesos de la popularidad (log de visitas) y de lo reciente (0 a 1) de cada entrada
+VISITS_WEIGHT = 0.25
+RECENCY_WEIGHT = 0.5
+
+# Términos más cortos no se buscan como subsecuencia (casi todo coincidiría)
+FUZZY_MIN_LENGTH = 3
+
+# Con menos candidatos que entradas / CANDIDATE_RATIO, los términos siguientes
+# se comprueban fila a fila en los candidatos en vez de recorrer la columna
+CANDIDATE_RATIO = 8
+
+@lru_cache(maxsize=256)
+def _subsequence_pattern(term: str):
+    """Expresión que encuentra las letras del término en orden dentro de una fila"""
+    # Se ancla al separador con el que empieza la fila y cada hueco excluye la
+    # letra siguiente: solo se prueba la primera aparición de cada letra, un
+    # intento por fila
+    parts = [ROW_SEPARATOR]
+    for char in term:
+        parts.append(f'[^{re.escape(char)}{ROW_SEPARATOR}]*{re.escape(char)}')
+    return re.compile(''.join(parts))
+
+def _host(url: str) -> str:
+    """Host de una URL en minúsculas, sin www."""
+    host = url.partition('//')[2] if '//' in url else url
+    host = host.split('/', 1)[0].rpartition('@')[2]
+    return host[4:] if host.startswith('www.') else host
+
+class _Column:
+    """
+    Una columna de texto como una sola cadena, para buscar en todas las filas a la vez
+
+    Cada fila empieza por el separador: separador + término encuentra las
+    filas que empiezan por él, y cualquier posición se traduce a su fila
+    buscando en los inicios de fila.
+    """
+
+    def __init__(self, values: Sequence[str]):
+        self.text = ''.join(ROW_SEPARATOR + value for value in values)
+        # Inicio de cada fila, más el final del texto como centinela
+        self.offsets = [0]
+        self.offsets.extend(accumulate(len(value) + 1 for value in values))
+
+    def row(self, index: int) -> str:
+        """Texto de una fila"""
+        return self.text[self.offsets[index] + 1:self.offsets[index + 1]]
+
+    def rows_containing(self, term: str, candidates: Optional[List[int]] = None) -> List[int]:
+        """Filas (de entre los candidatos, si se indican) que contienen el término"""
+        if candidates is not None:
+            return [row for row in candidates if term in self.row(row)]
+        return self._scan(term)
+
+    def rows_starting_with(self, term: str, candidates: Optional[List[int]] = None) -> List[int]:
+        """Filas que empiezan por el término"""
+        if candidates is not None:
+            return [row for row in candidates if self.row(row).startswith(term)]
+        return self._scan(ROW_SEPARATOR + term)
+
+    def _scan(self, needle: str) -> List[int]:
+        # str.find recorre el texto en C; cada coincidencia salta a la fila siguiente
+        rows = []
+        find = self.text.find
+        offsets = self.offsets
+        position = find(needle)
+        while position >= 0:
+            row = bisect_right(offsets, position) - 1
+            rows.append(row)
+            position = find(needle, offsets[row + 1])
+        return rows
+
+    def rows_matching_subsequence(self, term: str,
+                                  candidates: Optional[List[int]] = None) -> List[int]:
+        """Filas que contienen las letras del término en orden"""
+        search = _subsequence_pattern(term).search
+        if candidates is not None:
+            return [row for row in candidates if search(ROW_SEPARATOR + self.row(row))]
+        rows = []
+        offsets = self.offsets
+        match = search(self.text)
+        while match is not None:
+            row = bisect_right(offsets, match.start()) - 1
+            rows.append(row)
+            match = search(self.text, offsets[row + 1])
+        return rows
+
+class HistorySearchIndex:
+    """
+    Índice de búsqueda sobre una instantánea del historial
+
+    Se construye una vez: las URLs, los títulos y los hosts se pasan a
+    minúsculas y se guardan por columnas, cada una como una sola cadena en
+    la que cada término se busca de una pasada. Las consultas tienen varios
+    términos que deben aparecer todos (AND), en la URL o en el título (o como
+    subsecuencia, si así no hay bastantes resultados). Los resultados se
+    ordenan por una puntuación que combina dónde coincide cada término, las
+    visitas y lo reciente de la entrada. Con instantáneas grandes y NumPy instalado, la puntuación y la
+    ordenación se hacen con arrays.
+    """
+
+    def __init__(self, entries: Sequence[Dict], use_numpy: Optional[bool] = None):
+        """
+        Args:
+            entries: Entradas del historial (url, title, visit_count, visit_time)
+            use_numpy: Forzar o desactivar NumPy (por defecto, según el tamaño)
+        """
+        self.entries = list(entries)
+        count = len(self.entries)
+        if use_numpy is None:
+            use_numpy = count >= NUMPY_MIN_ENTRIES
+        self.use_numpy = use_numpy and HAS_NUMPY
+
+        urls = [self._clean(entry.get('url')) for entry in self.entries]
+        titles = [self._clean(entry.get('title')) for entry in self.entries]
+        self._urls = _Column(urls)
+        self._titles = _Column(titles)
+        self._hosts = _Column([_host(url) for url in urls])
+
+        # Puntuación de cada entrada sin tener en cuenta la consulta
+        visits = [math.log1p(max(entry.get('visit_count') or 0, 0)) for entry in self.entries]
+        recency = [0.0] * count
+        by_time = sorted(range(count), key=lambda row: self.entries[row].get('visit_time') or '')
+        for rank, row in enumerate(by_time):
+            recency[row] = rank / (count - 1) if count > 1 else 1.0
+        base = [VISITS_WEIGHT * v + RECENCY_WEIGHT * r for v, r in zip(visits, recency)]
+        self._base_scores = numpy.array(base, dtype=numpy.float64) if self.use_numpy else base
+
+    @staticmethod
+    def _clean(value: Optional[str]) -> str:
+        # Las entradas sin título (None) se buscan como título vacío
+        return (value or '').lower().replace(ROW_SEPARATOR, ' ')
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def parse_query(query: str) -> List[str]:
+        """Dividir una consulta en términos en minúsculas, sin repetir"""
+        return list(dict.fromkeys(query.lower().split()))
+
+    def _candidates(self, rows) -> Optional[List[int]]:
+        """Filas que quedan, si son pocas para comprobarlas una a una"""
+        if len(rows) * CANDIDATE_RATIO > len(self.entries):
+            return None
+        return list(rows)
+
+    def _term_matches(self, term: str, fuzzy: bool, candidates: Optional[List[int]] = None
+                      ) -> Tuple[List[int], List[int], List[int], List[int]]:
+        """Filas con el término en el título, en la URL, al principio del host y como subsecuencia (título o host)"""
+        in_title = self._titles.rows_containing(term, candidates)
+        in_url = self._urls.rows_containing(term, candidates)
+        host_prefix = self._hosts.rows_starting_with(term, candidates)
+        subsequence = []
+        if fuzzy and len(term) >= FUZZY_MIN_LENGTH:
+            # En el título y el host: en las rutas largas casi todo es una subsecuencia
+            subsequence = (self._titles.rows_matching_subsequence(term, candidates) +
+                           self._hosts.rows_matching_subsequence(term, candidates))
+        return in_title, in_url, host_prefix, subsequence
+
+    def rank(self, query: str, limit: Optional[int] = None,
+             fuzzy: bool = True) -> List[Tuple[int, float]]:
+        """
+        Buscar y puntuar las entradas que coinciden con la consulta
+
+        Args:
+            query: Términos separados por espacios (deben aparecer todos)
+            limit: Número máximo de resultados (todos si es None)
+            fuzzy: Si las coincidencias exactas no llegan a `limit` (o no hay
+                ninguna), aceptar también términos que solo aparecen como subsecuencia
+
+        Returns:
+            Pares (fila, puntuación) de mayor a menor puntuación; a igual
+            puntuación, en el orden de la instantánea
+        """
+        terms = self.parse_query(query)
+        if not terms or not self.entries:
+            return []
+        # Los términos largos suelen ser los más selectivos: dejan menos candidatos
+        terms.sort(key=len, reverse=True)
+        rank_terms = self._rank_numpy if self.use_numpy else self._rank_python
+        ranked = rank_terms(terms, limit, False)
+        # La búsqueda por subsecuencia es más lenta y menos precisa: solo como respaldo
+        if (fuzzy and len(ranked) < (limit or 1) and
+                any(len(term) >= FUZZY_MIN_LENGTH for term in terms)):
+            ranked = rank_terms(terms, limit, True)
+        return ranked
+
+    def _rank_python(self, terms: List[str], limit: Optional[int],
+                     fuzzy: bool) -> List[Tuple[int, float]]:
+        scores: Optional[Dict[int, float]] = None
+        for term in terms:
+            candidates = None if scores is None else self._candidates(scores)
+            in_title, in_url, host_prefix, subsequence = self._term_matches(term, fuzzy, candidates)
+            exact = dict.fromkeys(in_url, URL_WEIGHT)
+            for row in in_title:
+                exact[row] = exact.get(row, 0.0) + TITLE_WEIGHT
+            # El host es parte de la URL: esas filas ya están en exact
+            for row in host_prefix:
+                exact[row] += HOST_PREFIX_WEIGHT
+            if subsequence:
+                # La coincidencia exacta sustituye a la de subsecuencia
+                term_scores = dict.fromkeys(subsequence, FUZZY_WEIGHT)
+                term_scores.update(exact)
+            else:
+                term_scores = exact
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {row: score + term_scores[row] for row, score in scores.items()
+                          if row in term_scores}
+            if not scores:
+                return []
+
+        base = self._base_scores
+        items = [(row, score + base[row]) for row, score in scores.items()]
+        key = lambda item: (-item[1], item[0])
+        if limit is not None:
+            return heapq.nsmallest(limit, items, key=key)
+        return sorted(items, key=key)
+
+    def _rank_numpy(self, terms: List[str], limit: Optional[int],
+                    fuzzy: bool) -> List[Tuple[int, float]]:
+        count = len(self.entries)
+        matched = numpy.ones(count, dtype=bool)
+        total = self._base_scores.copy()
+        candidates = None
+        for term in terms:
+            in_title, in_url, host_prefix, subsequence = self._term_matches(term, fuzzy, candidates)
+            term_scores = numpy.zeros(count, dtype=numpy.float64)
+            exact = numpy.zeros(count, dtype=bool)
+            for rows, weight in ((in_title, TITLE_WEIGHT), (in_url, URL_WEIGHT),
+                                 (host_prefix, HOST_PREFIX_WEIGHT)):
+                if rows:
+                    rows = numpy.asarray(rows, dtype=numpy.intp)
+                    term_scores[rows] += weight
+                    exact[rows] = True
+            term_matched = exact.copy()
+            if subsequence:
+                rows = numpy.asarray(subsequence, dtype=numpy.intp)
+                term_matched[rows] = True
+                fuzzy_only = term_matched & ~exact
+                term_scores[fuzzy_only] = FUZZY_WEIGHT
+            matched &= term_matched
+            rows = numpy.flatnonzero(matched)
+            if not len(rows):
+                return []
+            candidates = self._candidates(rows)
+            total += term_scores
+
+        rows = numpy.flatnonzero(matched)
+        # Orden estable: a igual puntuación se conserva el orden de la instantánea
+        order = numpy.argsort(-total[rows], kind='stable')
+        if limit is not None:
+            order = order[:limit]
+        return [(int(rows[i]), float(total[rows[i]])) for i in order]
+
+    def search(self, query: str, limit: Optional[int] = None, fuzzy: bool = True) -> List[Dict]:
+        """
+        Buscar entradas ordenadas por relevancia
+
+        Args:
+            query: Términos separados por espacios (deben aparecer todos)
+            limit: Número máximo de resultados
+            fuzzy: Aceptar términos que solo aparecen como subsecuencia
+
+        Returns:
+            Entradas de la instantánea, de más a menos relevante
+        """
+        return [self.entries[row] for row, _ in self.rank(query, limit, fuzzy)]
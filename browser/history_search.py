@@ -0,0 +1,164 @@
+"""
+Búsqueda incremental en el historial
+Controlador con espera entre pulsaciones, ejecución en segundo plano y cancelación
+"""
+
+import string
+import threading
+from typing import Dict, List, Optional
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+# Minúsculas solo en ASCII, como LIKE en SQLite: refinar en memoria debe dar
+# lo mismo que volver a buscar en la base de datos
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+def _fold(text: Optional[str]) -> str:
+    return (text or '').translate(ASCII_LOWER)
+
+class _SearchSignals(QObject):
+    """Señales emitidas desde el hilo de búsqueda"""
+
+    chunk = pyqtSignal(int, list)       # generación, resultados
+    finished = pyqtSignal(int, bool)    # generación, resultados completos
+
+class _SearchTask(QRunnable):
+    """Consulta de búsqueda ejecutada en el pool de hilos"""
+
+    def __init__(self, db_manager, generation: int, query: str, page_size: int,
+                 max_results: int, cancel_event: threading.Event, signals: _SearchSignals):
+        super().__init__()
+        self.db_manager = db_manager
+        self.generation = generation
+        self.query = query
+        self.page_size = page_size
+        self.max_results = max_results
+        self.cancel_event = cancel_event
+        self.signals = signals
+
+    def run(self):
+        count = 0
+        for rows in self.db_manager.iter_search_history(
+                self.query, self.page_size, self.max_results, self.cancel_event.is_set):
+            count += len(rows)
+            self.signals.chunk.emit(self.generation, rows)
+        if not self.cancel_event.is_set():
+            self.signals.finished.emit(self.generation, count < self.max_results)
+
+class HistorySearchController(QObject):
+    """
+    Coordina las búsquedas del diálogo de historial
+
+    Espera a que el usuario deje de escribir, ejecuta la consulta fuera del
+    hilo de la interfaz, descarta los resultados de búsquedas obsoletas y, si
+    el nuevo término contiene al anterior, filtra en memoria los resultados
+    previos en lugar de volver a consultar la base de datos.
+    """
+
+    search_started = pyqtSignal(str)
+    results_ready = pyqtSignal(list)
+    search_finished = pyqtSignal(str, int)
+
+    def __init__(self, db_manager, debounce_ms: int = 250, page_size: int = 200,
+                 max_results: int = 5000, parent=None):
+        """
+        Args:
+            db_manager: Instancia de DatabaseManager
+            debounce_ms: Espera tras la última pulsación antes de buscar
+            page_size: Resultados entregados por cada bloque
+            max_results: Número máximo de resultados por búsqueda
+        """
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.page_size = page_size
+        self.max_results = max_results
+
+        self._pending_query = ""
+        self._generation = 0
+        self._cancel_event: Optional[threading.Event] = None
+
+        # Resultados de la última búsqueda, para refinarlos en memoria
+        self._last_query: Optional[str] = None
+        self._last_results: List[Dict] = []
+        self._last_complete = False
+        self._current_query: Optional[str] = None
+        self._current_results: List[Dict] = []
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce_ms)
+        self._timer.timeout.connect(self.search_now)
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+
+        self._signals = _SearchSignals()
+        self._signals.chunk.connect(self._on_chunk)
+        self._signals.finished.connect(self._on_finished)
+
+    def set_query(self, text: str):
+        """Programar una búsqueda; cada pulsación reinicia la espera"""
+        self._pending_query = text.strip()
+        self._timer.start()
+
+    def search_now(self):
+        """Lanzar inmediatamente la búsqueda pendiente"""
+        self._timer.stop()
+        query = self._pending_query
+        self.cancel()
+        self._generation += 1
+        self._current_query = query
+        self._current_results = []
+        self.search_started.emit(query)
+
+        if not query:
+            self.search_finished.emit(query, 0)
+            return
+
+        if self._can_refine(query):
+            # Comparación literal: _ y % se escapan también en la consulta SQL
+            needle = _fold(query)
+            results = [entry for entry in self._last_results
+                       if needle in _fold(entry['url']) or needle in _fold(entry['title'])]
+            self._remember(query, results, complete=True)
+            for start in range(0, len(results), self.page_size):
+                self.results_ready.emit(results[start:start + self.page_size])
+            self.search_finished.emit(query, len(results))
+            return
+
+        self._cancel_event = threading.Event()
+        self._pool.start(_SearchTask(self.db_manager, self._generation, query, self.page_size,
+                                     self.max_results, self._cancel_event, self._signals))
+
+    def cancel(self):
+        """Cancelar la búsqueda en curso"""
+        if self._cancel_event:
+            self._cancel_event.set()
+            self._cancel_event = None
+
+    def invalidate(self):
+        """Olvidar los resultados anteriores (tras modificar el historial)"""
+        self._remember(None, [], complete=False)
+
+    def _can_refine(self, query: str) -> bool:
+        """Comprobar si la búsqueda puede resolverse con los resultados anteriores"""
+        return (self._last_complete and self._last_query is not None
+                and _fold(self._last_query) in _fold(query))
+
+    def _remember(self, query: str, results: List[Dict], complete: bool):
+        self._last_query = query
+        self._last_results = results
+        self._last_complete = complete
+
+    def _on_chunk(self, generation: int, rows: list):
+        if generation != self._generation:
+            return
+        self._current_results.extend(rows)
+        self.results_ready.emit(rows)
+
+    def _on_finished(self, generation: int, complete: bool):
+        if generation != self._generation:
+            return
+        self._cancel_event = None
+        self._remember(self._current_query, self._current_results, complete)
+        self.search_finished.emit(self._current_query, len(self._current_results))
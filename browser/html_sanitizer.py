@@ -0,0 +1,220 @@
+"""
+Sanitizador de HTML
+Limpia HTML en una sola pasada y por trozos con una lista de etiquetas y
+atributos permitidos
+"""
+
+import re
+from collections import Counter
+from html import escape
+from html.parser import HTMLParser
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+# Etiquetas que se conservan (con los atributos de ALLOWED_ATTRIBUTES)
+ALLOWED_TAGS = frozenset([
+    'a', 'abbr', 'b', 'blockquote', 'br', 'caption', 'cite', 'code', 'dd', 'del',
+    'details', 'dfn', 'div', 'dl', 'dt', 'em', 'figcaption', 'figure', 'h1', 'h2',
+    'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'ins', 'kbd', 'li', 'mark', 'ol', 'p',
+    'pre', 'q', 's', 'samp', 'small', 'span', 'strong', 'sub', 'summary', 'sup',
+    'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'time', 'tr', 'u', 'ul', 'var',
+])
+
+# Etiquetas que se eliminan junto con todo su contenido
+DROP_CONTENT_TAGS = frozenset([
+    'script', 'style', 'iframe', 'frame', 'frameset', 'object', 'embed', 'applet',
+    'noscript', 'noembed', 'noframes', 'template', 'svg', 'math', 'title', 'head',
+    'textarea', 'select', 'xmp', 'plaintext',
+])
+
+# Etiquetas cuyo contenido es texto (RCDATA y RAWTEXT): no se anidan, la
+# primera etiqueta de cierre las termina aunque el texto contenga otra apertura
+TEXT_CONTENT_TAGS = frozenset([
+    'textarea', 'title', 'script', 'style', 'xmp', 'iframe', 'noembed', 'noframes',
+])
+
+# Etiquetas sin cierre
+VOID_TAGS = frozenset(['br', 'hr', 'img', 'wbr'])
+
+# Atributos permitidos en cualquier etiqueta y por etiqueta. Los manejadores
+# de eventos (on*) y style nunca están en la lista.
+GLOBAL_ATTRIBUTES = frozenset(['title', 'lang', 'dir'])
+ALLOWED_ATTRIBUTES: Dict[str, FrozenSet[str]] = {
+    'a': frozenset(['href', 'rel', 'target']),
+    'img': frozenset(['src', 'alt', 'width', 'height']),
+    'blockquote': frozenset(['cite']),
+    'q': frozenset(['cite']),
+    'del': frozenset(['cite', 'datetime']),
+    'ins': frozenset(['cite', 'datetime']),
+    'time': frozenset(['datetime']),
+    'td': frozenset(['colspan', 'rowspan']),
+    'th': frozenset(['colspan', 'rowspan', 'scope']),
+    'ol': frozenset(['start', 'reversed']),
+    'details': frozenset(['open']),
+}
+
+# Atributos con URL y esquemas que se aceptan en ellos (sin esquema = relativa)
+URL_ATTRIBUTES = frozenset(['href', 'src', 'cite'])
+ALLOWED_SCHEMES = frozenset(['http', 'https', 'mailto', 'ftp'])
+
+# Solo imágenes de mapa de bits en línea (SVG puede llevar scripts)
+SAFE_DATA_URL = re.compile(r'data:image/(?:png|gif|jpeg|webp|bmp);', re.IGNORECASE)
+
+# Esquema de una URL, ignorando los espacios y caracteres de control que los
+# navegadores descartan (java\tscript:)
+URL_SCHEME = re.compile(r'([a-z][a-z0-9+.\-]*):', re.IGNORECASE)
+IGNORED_URL_CHARS = re.compile(r'[\x00-\x20\x7f]+')
+
+def is_safe_url_attribute(tag: str, value: str) -> bool:
+    """Comprobar si el valor de un atributo de URL no ejecuta código"""
+    cleaned = IGNORED_URL_CHARS.sub('', value)
+    scheme = URL_SCHEME.match(cleaned)
+    if scheme is None:
+        return True
+    name = scheme.group(1).lower()
+    if name == 'data':
+        return tag == 'img' and SAFE_DATA_URL.match(cleaned) is not None
+    return name in ALLOWED_SCHEMES
+
+class HTMLSanitizer(HTMLParser):
+    """
+    Sanitizador de HTML por trozos
+
+    `feed` acepta el documento en trozos tal como llega y devuelve el HTML
+    limpio que ya se puede emitir; `close` devuelve el resto y cierra las
+    etiquetas que quedaron abiertas. Cada trozo se tokeniza una sola vez.
+    Las etiquetas que no están en la lista se quitan conservando su texto,
+    las de DROP_CONTENT_TAGS se quitan con su contenido (aunque no se
+    cierren) y los comentarios, declaraciones y atributos no permitidos se
+    descartan.
+    """
+
+    def __init__(self, allowed_tags: Iterable[str] = ALLOWED_TAGS,
+                 allowed_attributes: Optional[Dict[str, FrozenSet[str]]] = None):
+        """
+        Args:
+            allowed_tags: Etiquetas que se conservan
+            allowed_attributes: Atributos permitidos por etiqueta (además de GLOBAL_ATTRIBUTES)
+        """
+        super().__init__(convert_charrefs=True)
+        self.allowed_tags = frozenset(allowed_tags)
+        self.allowed_attributes = (ALLOWED_ATTRIBUTES if allowed_attributes is None
+                                   else allowed_attributes)
+        self._out: List[str] = []
+        self._open: List[str] = []
+        # Cuántas veces está abierta cada etiqueta: comprobar un cierre no recorre la pila
+        self._open_counts: Counter = Counter()
+        # Profundidad dentro de etiquetas que se eliminan con su contenido
+        self._dropping = 0
+        self._dropping_tag: Optional[str] = None
+
+        # Métricas
+        self.removed_tags = 0
+        self.removed_attributes = 0
+
+    def feed(self, data: str) -> str:
+        """
+        Procesar un trozo del documento
+
+        Returns:
+            HTML limpio generado por este trozo
+        """
+        super().feed(data)
+        return self._take()
+
+    def close(self) -> str:
+        """
+        Terminar el documento
+
+        Returns:
+            HTML limpio pendiente, con el cierre de las etiquetas abiertas
+        """
+        super().close()
+        while self._open:
+            self._out.append(f"</{self._open.pop()}>")
+        self._open_counts.clear()
+        return self._take()
+
+    def _take(self) -> str:
+        out = ''.join(self._out)
+        self._out.clear()
+        return out
+
+    def _clean_attributes(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> str:
+        allowed = self.allowed_attributes.get(tag, frozenset())
+        parts = []
+        for name, value in attrs:
+            if name not in allowed and name not in GLOBAL_ATTRIBUTES:
+                self.removed_attributes += 1
+                continue
+            if value is None:
+                parts.append(f" {name}")
+                continue
+            if name in URL_ATTRIBUTES and not is_safe_url_attribute(tag, value):
+                self.removed_attributes += 1
+                continue
+            parts.append(f' {name}="{escape(value)}"')
+        if tag == 'a' and any(name == 'target' for name, _ in attrs):
+            # Un enlace que abre otra ventana no debe poder controlar esta
+            parts = [part for part in parts if not part.startswith(' rel=')]
+            parts.append(' rel="noopener noreferrer"')
+        return ''.join(parts)
+
+    def handle_starttag(self, tag, attrs):
+        if self._dropping:
+            if tag == self._dropping_tag and tag not in TEXT_CONTENT_TAGS:
+                self._dropping += 1
+            return
+        if tag in DROP_CONTENT_TAGS:
+            self.removed_tags += 1
+            self._dropping = 1
+            self._dropping_tag = tag
+            return
+        if tag not in self.allowed_tags:
+            self.removed_tags += 1
+            return
+        self._out.append(f"<{tag}{self._clean_attributes(tag, attrs)}>")
+        if tag not in VOID_TAGS:
+            self._open.append(tag)
+            self._open_counts[tag] += 1
+
+    def handle_startendtag(self, tag, attrs):
+        if self._dropping or tag in DROP_CONTENT_TAGS:
+            return
+        if tag not in self.allowed_tags:
+            self.removed_tags += 1
+            return
+        self._out.append(f"<{tag}{self._clean_attributes(tag, attrs)}>")
+        if tag not in VOID_TAGS:
+            self._out.append(f"</{tag}>")
+
+    def handle_endtag(self, tag):
+        if self._dropping:
+            if tag == self._dropping_tag:
+                self._dropping -= 1
+            return
+        if not self._open_counts[tag]:
+            return
+        # Cerrar también las etiquetas que quedaron abiertas dentro
+        while self._open:
+            open_tag = self._open.pop()
+            self._open_counts[open_tag] -= 1
+            self._out.append(f"</{open_tag}>")
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if not self._dropping:
+            self._out.append(escape(data, quote=False))
+
+def sanitize_html(html: str) -> str:
+    """
+    Limpiar un documento HTML completo
+
+    Args:
+        html: HTML sin confianza
+
+    Returns:
+        HTML con solo las etiquetas y atributos permitidos
+    """
+    sanitizer = HTMLSanitizer()
+    return sanitizer.feed(html) + sanitizer.close()
@@ -0,0 +1,455 @@
+"""
+Páginas internas pybrowser://
+Enrutador sin dependencias de Qt: genera el HTML de cada página y la API JSON paginada
+"""
+
+import html
+import json
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlsplit
+
+from .utils import URLUtils
+
+INTERNAL_SCHEME = "pybrowser"
+
+# Páginas disponibles y su título
+INTERNAL_PAGES = {
+    "history": "Historial",
+    "favorites": "Favoritos",
+    "cookies": "Cookies",
+}
+
+# Página de nueva pestaña: se genera en el servidor, sin scripts ni red
+NEW_TAB_PAGE = "newtab"
+NEW_TAB_TOP_SITES = 8
+NEW_TAB_RECENT = 10
+SEARCH_FORM_ACTION = "https://duckduckgo.com/"
+
+# Esquemas que se muestran como enlace; el resto (javascript:, data:...) como texto
+LINK_SCHEMES = frozenset({"http", "https"})
+
+# Aviso que sustituye a una página de un dominio bloqueado
+BLOCKED_PAGE = "blocked"
+
+# Tamaño de página de la API y máximo que se puede pedir
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 500
+
+CONTENT_TYPE_HTML = "text/html; charset=utf-8"
+CONTENT_TYPE_JSON = "application/json"
+
+STATUS_OK = 200
+STATUS_BAD_REQUEST = 400
+STATUS_NOT_FOUND = 404
+
+# Respuesta del enrutador: (estado, tipo de contenido, cuerpo)
+Response = Tuple[int, str, bytes]
+
+PAGE_STYLES = """
+body { font-family: sans-serif; margin: 0; background: #f5f5f5; color: #212529; }
+header { position: sticky; top: 0; background: #fff; padding: 12px 20px;
+         border-bottom: 1px solid #dee2e6; display: flex; gap: 12px; align-items: center; }
+h1 { font-size: 20px; margin: 0; flex: 1; }
+input { padding: 6px 10px; border: 1px solid #ced4da; border-radius: 4px; min-width: 260px; }
+ul { list-style: none; margin: 0; padding: 0 0 0 20px; }
+main > ul { padding: 8px 20px; }
+li { background: #fff; border-bottom: 1px solid #e9ecef; padding: 6px 10px; }
+li.folder > span { cursor: pointer; font-weight: bold; }
+.title { font-weight: bold; display: block; }
+.details, .url { color: #6c757d; font-size: 12px; word-break: break-all; }
+a { color: #0d6efd; text-decoration: none; }
+a.visited { color: #6f42c1; }
+#status { padding: 12px 20px; color: #6c757d; }
+"""
+
+# Lista con carga incremental: pide la siguiente página al acercarse al final
+PAGE_SCRIPT = """
+const list = document.getElementById('list');
+const statusLine = document.getElementById('status');
+const filter = document.getElementById('filter');
+let cursor = {}, loading = false, done = false, generation = 0, timer = null;
+
+function getJSON(path, params, callback) {
+    const xhr = new XMLHttpRequest();
+    xhr.open('GET', path + '?' + new URLSearchParams(params));
+    xhr.responseType = 'json';
+    xhr.onload = () => callback(xhr.response);
+    xhr.send();
+}
+
+function link(url, text) {
+    const a = document.createElement(/^https?:/.test(url) ? 'a' : 'span');
+    if (a.tagName === 'A') a.href = url;
+    a.textContent = text;
+    return a;
+}
+
+function line(className, text) {
+    const span = document.createElement('span');
+    span.className = className;
+    span.textContent = text;
+    return span;
+}
+
+function loadMore() {
+    if (loading || done) return;
+    loading = true;
+    const current = generation;
+    const params = Object.assign({}, cursor);
+    if (filter && filter.value.trim()) params[FILTER_PARAM] = filter.value.trim();
+    getJSON(API_PATH, params, (page) => {
+        if (current !== generation) return;
+        loading = false;
+        page.items.forEach((item) => list.appendChild(renderItem(item)));
+        cursor = page.next || {};
+        done = !page.next;
+        statusLine.textContent = done ? (list.children.length ? '' : 'Sin resultados') : 'Cargando...';
+        if (!done && sentinelVisible()) loadMore();
+    });
+}
+
+function sentinelVisible() {
+    return statusLine.getBoundingClientRect().top < window.innerHeight + 400;
+}
+
+function reset() {
+    generation++;
+    list.textContent = '';
+    cursor = {}; loading = false; done = false;
+    loadMore();
+}
+
+new IntersectionObserver((entries) => {
+    if (entries[0].isIntersecting) loadMore();
+}, {rootMargin: '400px'}).observe(statusLine);
+
+if (filter) filter.addEventListener('input', () => {
+    clearTimeout(timer);
+    timer = setTimeout(reset, 250);
+});
+"""
+
+RENDERERS = {
+    "history": """
+const API_PATH = '/api/page', FILTER_PARAM = 'q';
+function renderItem(entry) {
+    const li = document.createElement('li');
+    li.appendChild(link(entry.url, entry.title || 'Sin título')).className = 'title';
+    li.appendChild(line('url', entry.url));
+    li.appendChild(line('details', 'Visitado: ' + entry.visit_time + ' | Visitas: ' +
+                                   entry.visit_count + (entry.is_favorite ? ' ⭐' : '')));
+    return li;
+}
+""",
+    "favorites": """
+const API_PATH = '/api/children', FILTER_PARAM = null;
+function renderItem(entry) {
+    const li = document.createElement('li');
+    if (!entry.is_folder) {
+        // Los marcadores ya visitados se colorean como enlaces visitados
+        li.appendChild(link(entry.url, entry.title || 'Sin título')).className =
+            entry.visited ? 'title visited' : 'title';
+        li.appendChild(line('url', entry.url));
+        return li;
+    }
+    // Las carpetas se leen al abrirlas
+    li.className = 'folder';
+    const name = li.appendChild(line('', '📁 ' + (entry.title || 'Nueva carpeta')));
+    let children = null;
+    name.addEventListener('click', () => {
+        if (children) { children.hidden = !children.hidden; return; }
+        children = li.appendChild(document.createElement('ul'));
+        getJSON(API_PATH, {parent: entry.id}, (page) => {
+            page.items.forEach((item) => children.appendChild(renderItem(item)));
+        });
+    });
+    return li;
+}
+""",
+    "cookies": """
+const API_PATH = '/api/page', FILTER_PARAM = 'domain';
+function renderItem(cookie) {
+    const li = document.createElement('li');
+    li.appendChild(line('title', cookie.domain + ' — ' + cookie.name));
+    const value = cookie.value || '';
+    li.appendChild(line('url', value.length > 50 ? value.slice(0, 50) + '...' : value)).title = value;
+    li.appendChild(line('details', 'Ruta: ' + cookie.path + ' | Expira: ' + (cookie.expires || 'Sesión') +
+                                   ' | Segura: ' + (cookie.secure ? 'Sí' : 'No') +
+                                   ' | HTTP Only: ' + (cookie.http_only ? 'Sí' : 'No')));
+    return li;
+}
+""",
+}
+
+NEW_TAB_STYLES = """
+body { font-family: sans-serif; margin: 0; background: #f5f5f5; color: #212529; }
+main { max-width: 880px; margin: 0 auto; padding: 48px 20px; }
+form { display: flex; margin-bottom: 36px; }
+input { flex: 1; padding: 12px 16px; font-size: 16px; border: 1px solid #ced4da; border-radius: 24px; }
+h2 { font-size: 14px; color: #6c757d; text-transform: uppercase; margin: 24px 0 12px; }
+.sites { display: grid; grid-template-columns: repeat(4, 1fr); gap: 12px; }
+.site { display: block; background: #fff; border-radius: 8px; padding: 14px; text-align: center;
+        color: #212529; text-decoration: none; box-shadow: 0 1px 2px rgba(0,0,0,.1); overflow: hidden; }
+.site .letter { display: inline-block; width: 40px; height: 40px; line-height: 40px; border-radius: 50%;
+                background: #0d6efd; color: #fff; font-size: 18px; margin-bottom: 8px; }
+.site .name { display: block; font-size: 13px; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }
+ul { list-style: none; margin: 0; padding: 0; background: #fff; border-radius: 8px; }
+li { padding: 8px 14px; border-bottom: 1px solid #e9ecef; white-space: nowrap; overflow: hidden;
+     text-overflow: ellipsis; }
+a { color: #0d6efd; text-decoration: none; }
+.time { color: #6c757d; font-size: 12px; margin-right: 8px; }
+"""
+
+FILTER_PLACEHOLDERS = {
+    "history": "Buscar en historial...",
+    "cookies": "Filtrar por dominio...",
+}
+
+def internal_url(page: str) -> str:
+    """Construir la URL de una página interna"""
+    return f"{INTERNAL_SCHEME}://{page}"
+
+NEW_TAB_URL = internal_url(NEW_TAB_PAGE)
+
+def blocked_url(url: str) -> str:
+    """URL del aviso de página bloqueada para `url`"""
+    return f"{internal_url(BLOCKED_PAGE)}/?url={quote(url, safe='')}"
+
+def link_html(url: str, content: str, attributes: str = "") -> str:
+    """
+    Generar un enlace a una URL del historial
+
+    Args:
+        url: URL de destino
+        content: HTML ya escapado del contenido
+        attributes: Atributos adicionales ya escapados
+
+    Returns:
+        Un <a> si la URL es http(s); si no, un <span> que no se puede abrir
+    """
+    if urlsplit(url).scheme.lower() in LINK_SCHEMES:
+        return f'<a{attributes} href="{html.escape(url)}">{content}</a>'
+    return f'<span{attributes}>{content}</span>'
+
+def is_internal_url(url: str) -> bool:
+    """Comprobar si una URL es una página interna"""
+    return url.lower().startswith(INTERNAL_SCHEME + ":")
+
+class InternalPageRouter:
+    """
+    Resuelve las URLs pybrowser:// a HTML o JSON
+
+    El HTML es una página ligera que pide los datos a la API por páginas a
+    medida que el usuario se desplaza; ninguna respuesta lee más de una página.
+    """
+
+    def __init__(self, db_manager):
+        """
+        Args:
+            db_manager: Instancia de DatabaseManager
+        """
+        self.db_manager = db_manager
+        # HTML de la nueva pestaña y generación del historial con la que se creó
+        self._new_tab_cache: Tuple[int, bytes] = (-1, b"")
+        self.api_routes: Dict[Tuple[str, str], Callable[[Dict[str, str]], Dict]] = {
+            ("history", "/api/page"): self._history_page,
+            ("favorites", "/api/children"): self._favorites_children,
+            ("cookies", "/api/page"): self._cookies_page,
+        }
+
+    def handle(self, url: str) -> Response:
+        """
+        Resolver una URL interna
+
+        Args:
+            url: URL pybrowser:// solicitada
+
+        Returns:
+            Tupla (estado, tipo de contenido, cuerpo)
+        """
+        parts = urlsplit(url)
+        if parts.scheme.lower() != INTERNAL_SCHEME:
+            return self._error(STATUS_NOT_FOUND, "Esquema no soportado")
+        page = parts.netloc.lower()
+        path = parts.path.rstrip("/") or "/"
+
+        if path == "/":
+            if page == NEW_TAB_PAGE:
+                return STATUS_OK, CONTENT_TYPE_HTML, self.new_tab_page()
+            if page == BLOCKED_PAGE:
+                blocked = parse_qs(parts.query).get("url", [""])[-1]
+                return STATUS_OK, CONTENT_TYPE_HTML, self.render_blocked(blocked).encode("utf-8")
+            if page not in INTERNAL_PAGES:
+                return self._error(STATUS_NOT_FOUND, f"Página no encontrada: {page}")
+            return STATUS_OK, CONTENT_TYPE_HTML, self.render_page(page).encode("utf-8")
+
+        route = self.api_routes.get((page, path))
+        if route is None:
+            return self._error(STATUS_NOT_FOUND, f"Ruta no encontrada: {page}{path}")
+        params = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        try:
+            data = route(params)
+        except ValueError as e:
+            return self._error(STATUS_BAD_REQUEST, str(e))
+        return STATUS_OK, CONTENT_TYPE_JSON, json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+    def render_page(self, page: str) -> str:
+        """Generar el HTML de una página interna"""
+        title = INTERNAL_PAGES[page]
+        placeholder = FILTER_PLACEHOLDERS.get(page)
+        filter_input = (f'<input id="filter" type="search" placeholder="{placeholder}">'
+                        if placeholder else '')
+        return f"""<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>{PAGE_STYLES}</style>
+</head>
+<body>
+<header><h1>{title}</h1>{filter_input}</header>
+<main><ul id="list"></ul></main>
+<div id="status">Cargando...</div>
+<script>{RENDERERS[page]}{PAGE_SCRIPT}</script>
+</body>
+</html>
+"""
+
+    def new_tab_page(self) -> bytes:
+        """
+        Obtener el HTML de la nueva pestaña
+        
+        Se regenera solo cuando cambia la generación del historial.
+        """
+        generation = self.db_manager.history_generation
+        cached_generation, body = self._new_tab_cache
+        if cached_generation != generation:
+            body = self.render_new_tab().encode("utf-8")
+            self._new_tab_cache = (generation, body)
+        return body
+
+    def render_new_tab(self) -> str:
+        """Generar la nueva pestaña con los sitios más visitados y el historial reciente"""
+        tiles = []
+        for site in self.db_manager.get_top_sites(NEW_TAB_TOP_SITES):
+            name = site["title"] or URLUtils.get_domain(site["url"])
+            tiles.append(link_html(
+                site["url"],
+                f'<span class="letter">{html.escape(name[:1].upper())}</span>'
+                f'<span class="name">{html.escape(name)}</span>',
+                f' class="site" title="{html.escape(site["url"])}"'))
+        recent = []
+        for entry in self.db_manager.get_history_page(None, NEW_TAB_RECENT):
+            recent.append(
+                f'<li><span class="time">{html.escape(str(entry["visit_time"]))}</span>'
+                f'{link_html(entry["url"], html.escape(entry["title"] or entry["url"]))}</li>')
+
+        sections: List[str] = []
+        if tiles:
+            sections.append(f'<h2>Más visitados</h2><div class="sites">{"".join(tiles)}</div>')
+        if recent:
+            sections.append(f'<h2>Visitados recientemente</h2><ul>{"".join(recent)}</ul>')
+        return f"""<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>Nueva pestaña</title>
+<style>{NEW_TAB_STYLES}</style>
+</head>
+<body>
+<main>
+<form action="{SEARCH_FORM_ACTION}" method="get">
+<input name="q" type="search" placeholder="Buscar con DuckDuckGo" autofocus>
+</form>
+{"".join(sections)}
+</main>
+</body>
+</html>
+"""
+
+    @staticmethod
+    def render_blocked(url: str) -> str:
+        """Generar el aviso de una página bloqueada por la lista de dominios"""
+        return f"""<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>Página bloqueada</title>
+<style>{NEW_TAB_STYLES}</style>
+</head>
+<body>
+<main>
+<h1>Página bloqueada</h1>
+<p>El dominio de esta dirección está en la lista de sitios peligrosos:</p>
+<p><code>{html.escape(url)}</code></p>
+</main>
+</body>
+</html>
+"""
+
+    @staticmethod
+    def _error(status: int, message: str) -> Response:
+        return status, CONTENT_TYPE_JSON, json.dumps({"error": message}).encode("utf-8")
+
+    @staticmethod
+    def _limit(params: Dict[str, str]) -> int:
+        try:
+            limit = int(params.get("limit", API_PAGE_SIZE))
+        except ValueError:
+            raise ValueError("Parámetro limit no válido")
+        return max(1, min(limit, API_MAX_PAGE_SIZE))
+
+    def _history_page(self, params: Dict[str, str]) -> Dict:
+        """Página del historial con paginación por (visit_time, id)"""
+        limit = self._limit(params)
+        after = None
+        if "after_time" in params and "after_id" in params:
+            try:
+                after = (params["after_time"], int(params["after_id"]))
+            except ValueError:
+                raise ValueError("Parámetro after_id no válido")
+        entries = self.db_manager.get_history_page(after, limit, params.get("q") or None)
+        next_cursor = None
+        if len(entries) == limit:
+            last = entries[-1]
+            next_cursor = {"after_time": last["visit_time"], "after_id": last["id"]}
+        for entry in entries:
+            entry["is_favorite"] = bool(entry["is_favorite"])
+        return {"items": entries, "next": next_cursor}
+
+    def _favorites_children(self, params: Dict[str, str]) -> Dict:
+        """
+        Un nivel del árbol de marcadores (las carpetas se piden al abrirlas)
+        
+        visited indica si el marcador está en el historial; el filtro de URLs
+        visitadas responde sin consultar SQLite para los que no lo están.
+        """
+        parent: Optional[int] = None
+        if params.get("parent"):
+            try:
+                parent = int(params["parent"])
+            except ValueError:
+                raise ValueError("Parámetro parent no válido")
+        items = self.db_manager.get_bookmark_children(parent)
+        for item in items:
+            item["is_folder"] = bool(item["is_folder"])
+            item["has_children"] = bool(item["has_children"])
+            item["visited"] = not item["is_folder"] and self.db_manager.has_visited(item["url"])
+        return {"items": items, "next": None}
+
+    def _cookies_page(self, params: Dict[str, str]) -> Dict:
+        """Página de cookies con paginación por (domain, name, path)"""
+        limit = self._limit(params)
+        after = None
+        if all(key in params for key in ("after_domain", "after_name", "after_path")):
+            after = (params["after_domain"], params["after_name"], params["after_path"])
+        cookies = self.db_manager.get_cookie_page(after, limit, params.get("domain") or None)
+        next_cursor = None
+        if len(cookies) == limit:
+            last = cookies[-1]
+            next_cursor = {"after_domain": last["domain"], "after_name": last["name"],
+                           "after_path": last["path"]}
+        for cookie in cookies:
+            cookie["secure"] = bool(cookie["secure"])
+            cookie["http_only"] = bool(cookie["http_only"])
+        return {"items": cookies, "next": next_cursor}
@@ -0,0 +1,191 @@
+"""
+Extractor de enlaces
+Obtiene los enlaces de un documento HTML por trozos, a medida que se descarga
+"""
+
+import re
+from html.parser import HTMLParser
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional
+from urllib.parse import urljoin
+
+# Relaciones de <link> que apuntan a otros documentos
+NAVIGATION_LINK_RELS = frozenset([
+    'alternate', 'canonical', 'next', 'prev', 'previous', 'author', 'help',
+    'license', 'search', 'amphtml',
+])
+
+# Relaciones de <link> que cargan recursos de la página
+RESOURCE_LINK_RELS = frozenset([
+    'stylesheet', 'icon', 'apple-touch-icon', 'manifest', 'preload', 'prefetch',
+    'modulepreload', 'prerender',
+])
+
+# Atributos de recursos por etiqueta (además de srcset en img y source)
+RESOURCE_ATTRIBUTES = {
+    'img': ('src',),
+    'source': ('src',),
+    'script': ('src',),
+    'iframe': ('src',),
+    'embed': ('src',),
+    'video': ('src', 'poster'),
+    'audio': ('src',),
+    'track': ('src',),
+}
+
+# Valores que no son enlaces a otro recurso
+IGNORED_SCHEMES = ('javascript:', 'data:', 'about:', 'blob:')
+
+# URL absoluta: no hace falta urljoin
+ABSOLUTE_URL = re.compile(r'[a-zA-Z][a-zA-Z0-9+.\-]*://')
+
+def parse_srcset(value: str) -> Iterator[str]:
+    """
+    Obtener las URLs de un atributo srcset
+
+    Sigue el algoritmo de HTML: la URL es una secuencia sin espacios (las
+    comas finales la separan de la siguiente) y los descriptores (1x, 300w)
+    llegan hasta la siguiente coma, así que las URLs pueden contener comas.
+    """
+    length = len(value)
+    pos = 0
+    while pos < length:
+        while pos < length and (value[pos].isspace() or value[pos] == ','):
+            pos += 1
+        start = pos
+        while pos < length and not value[pos].isspace():
+            pos += 1
+        url = value[start:pos]
+        if not url:
+            break
+        if url.endswith(','):
+            url = url.rstrip(',')
+        else:
+            # Saltar los descriptores
+            comma = value.find(',', pos)
+            pos = length if comma < 0 else comma + 1
+        if url:
+            yield url
+
+class LinkExtractor(HTMLParser):
+    """
+    Extractor de enlaces por trozos
+
+    `feed` devuelve los enlaces nuevos de cada trozo, ya absolutos y sin
+    repetir (un diccionario hace de conjunto ordenado, así que cada enlace
+    cuesta O(1) aunque la página tenga decenas de miles). Respeta el primer
+    <base href>; los enlaces anteriores a él se resuelven con la URL de la
+    página. El contenido de <script> y <style> no se examina.
+    """
+
+    def __init__(self, base_url: str = '', include_resources: bool = False,
+                 link_rels: Optional[FrozenSet[str]] = None):
+        """
+        Args:
+            base_url: URL del documento
+            include_resources: Incluir también imágenes (src y srcset), scripts,
+                marcos, medios y los <link> de RESOURCE_LINK_RELS
+            link_rels: Relaciones de <link> que se incluyen (por defecto las de
+                NAVIGATION_LINK_RELS, más RESOURCE_LINK_RELS con include_resources)
+        """
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.include_resources = include_resources
+        if link_rels is None:
+            link_rels = NAVIGATION_LINK_RELS
+            if include_resources:
+                link_rels = link_rels | RESOURCE_LINK_RELS
+        self.link_rels = link_rels
+        self._base_seen = False
+        # Valor del atributo -> URL absoluta, para no resolver dos veces lo mismo
+        self._resolved: Dict[str, Optional[str]] = {}
+        # Conjunto ordenado de enlaces encontrados
+        self._links: Dict[str, None] = {}
+        self._new: List[str] = []
+
+    @property
+    def links(self) -> List[str]:
+        """Todos los enlaces encontrados hasta ahora, en orden de aparición"""
+        return list(self._links)
+
+    def feed(self, data: str) -> List[str]:
+        """
+        Procesar un trozo del documento
+
+        Returns:
+            Enlaces que aparecen por primera vez en este trozo
+        """
+        super().feed(data)
+        return self._take()
+
+    def close(self) -> List[str]:
+        """Terminar el documento y devolver los enlaces que quedaban pendientes"""
+        super().close()
+        return self._take()
+
+    def _take(self) -> List[str]:
+        new = self._new
+        self._new = []
+        return new
+
+    def _add(self, value: Optional[str]):
+        if not value:
+            return
+        link = self._resolved.get(value, False)
+        if link is False:
+            link = self._resolve(value)
+            self._resolved[value] = link
+        if link is not None and link not in self._links:
+            self._links[link] = None
+            self._new.append(link)
+
+    def _resolve(self, value: str) -> Optional[str]:
+        value = value.strip()
+        if not value or value.lower().startswith(IGNORED_SCHEMES):
+            return None
+        if ABSOLUTE_URL.match(value) or not self.base_url:
+            return value
+        return urljoin(self.base_url, value)
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a' or tag == 'area':
+            self._add(dict(attrs).get('href'))
+        elif tag == 'link':
+            attributes = dict(attrs)
+            rels = (attributes.get('rel') or '').lower().split()
+            if any(rel in self.link_rels for rel in rels):
+                self._add(attributes.get('href'))
+        elif tag == 'base':
+            href = dict(attrs).get('href')
+            if href and not self._base_seen:
+                # Solo cuenta el primer <base href>; los valores ya resueltos cambian
+                self._base_seen = True
+                self.base_url = urljoin(self.base_url, href.strip())
+                self._resolved.clear()
+        elif self.include_resources and tag in RESOURCE_ATTRIBUTES:
+            attributes = dict(attrs)
+            for name in RESOURCE_ATTRIBUTES[tag]:
+                self._add(attributes.get(name))
+            srcset = attributes.get('srcset')
+            if srcset:
+                for url in parse_srcset(srcset):
+                    self._add(url)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+def iter_links(chunks: Iterable[str], base_url: str = '', **options) -> Iterator[str]:
+    """
+    Obtener los enlaces de un documento a medida que llegan sus trozos
+
+    Args:
+        chunks: Trozos del documento (por ejemplo, de una descarga)
+        base_url: URL del documento
+        **options: Opciones de LinkExtractor (include_resources, link_rels)
+
+    Yields:
+        Enlaces absolutos sin repetir, en orden de aparición
+    """
+    extractor = LinkExtractor(base_url, **options)
+    for chunk in chunks:
+        yield from extractor.feed(chunk)
+    yield from extractor.close()
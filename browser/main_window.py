@@ -4,26 +4,36 @@ Incluye interfaz gráfica, navegación, y gestión de tabs
 """
 
 import os
-import re
-from urllib.parse import urlparse, urljoin
+import sqlite3
 from PyQt5.QtWidgets import (QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, 
                              QLineEdit, QPushButton, QTabWidget, QMenuBar, 
                              QMenu, QAction, QToolBar, QStatusBar, QMessageBox,
                              QDialog, QListWidget, QListWidgetItem, QLabel,
                              QDialogButtonBox, QSplitter, QTextEdit, QComboBox,
-                             QCheckBox, QSpinBox, QGroupBox, QFormLayout)
-from PyQt5.QtCore import Qt, QUrl, pyqtSignal, QTimer
+                             QCheckBox, QSpinBox, QGroupBox, QFormLayout,
+                             QFileDialog, QProgressDialog, QApplication,
+                             QInputDialog)
+from PyQt5.QtCore import Qt, QUrl, pyqtSignal, QTimer, QByteArray
 from PyQt5.QtGui import QIcon, QKeySequence, QFont
 from PyQt5.QtWebEngineWidgets import (QWebEngineView, QWebEnginePage, 
                                      QWebEngineProfile, QWebEngineSettings)
 
 from .database import DatabaseManager
 from .web_tab import WebTab
+from .internal_pages import INTERNAL_SCHEME, INTERNAL_PAGES, NEW_TAB_URL, internal_url
+from .scheme_handler import InternalSchemeHandler
+from .content_filter import ContentFilter
+from .request_interceptor import ContentBlockingInterceptor, PAGE_INTERCEPTORS
+from .tab_pool import SpareTabPool
+from .tab_lifecycle import TabLifecycleManager
+from .session import SessionStore, TabPlaceholder, parse_session, icon_from_base64
+from .omnibox import classify_input
+from .utils import URLUtils
 
 class MainWindow(QMainWindow):
     """Ventana principal del navegador"""
     
-    def __init__(self, data_dir: str):
+    def __init__(self, data_dir: str, restore_session: bool = True):
         super().__init__()
         self.data_dir = data_dir
         self.db_manager = DatabaseManager(data_dir)
@@ -38,9 +48,18 @@ class MainWindow(QMainWindow):
         self.setup_toolbar()
         self.setup_status_bar()
         self.setup_web_profile()
-        
-        # Crear la primera pestaña
-        self.add_new_tab("https://duckduckgo.com")
+        self.setup_content_filter()
+        self.setup_domain_blocklist()
+        self.setup_visited_filter()
+        self.setup_spare_tabs()
+        self.setup_tab_lifecycle()
+        self.setup_session(restore_session)
+        
+        # Reabrir la sesión anterior o crear la primera pestaña
+        if not (restore_session and self.restore_session()):
+            self.add_new_tab()
+        self.spare_tabs.start()
+        self.tab_lifecycle.start()
         
         # Timer para guardar historial automáticamente
         self.save_timer = QTimer()
@@ -141,6 +160,20 @@ class MainWindow(QMainWindow):
         
         file_menu.addSeparator()
         
+        export_action = QAction("Exportar datos...", self)
+        export_action.triggered.connect(self.export_user_data)
+        file_menu.addAction(export_action)
+        
+        import_action = QAction("Importar datos...", self)
+        import_action.triggered.connect(self.import_user_data)
+        file_menu.addAction(import_action)
+        
+        import_browser_action = QAction("Importar historial de otro navegador...", self)
+        import_browser_action.triggered.connect(self.import_browser_history)
+        file_menu.addAction(import_browser_action)
+        
+        file_menu.addSeparator()
+        
         quit_action = QAction("Salir", self)
         quit_action.setShortcut(QKeySequence.Quit)
         quit_action.triggered.connect(self.close)
@@ -185,6 +218,18 @@ class MainWindow(QMainWindow):
         cookies_action.triggered.connect(self.show_cookies)
         tools_menu.addAction(cookies_action)
         
+        filter_list_action = QAction("Cargar lista de filtros...", self)
+        filter_list_action.triggered.connect(self.load_filter_list)
+        tools_menu.addAction(filter_list_action)
+        
+        # Las mismas vistas como páginas internas en una pestaña
+        pages_menu = tools_menu.addMenu("Abrir en pestaña")
+        for page, title in INTERNAL_PAGES.items():
+            page_action = QAction(title, self)
+            page_action.triggered.connect(
+                lambda checked, url=internal_url(page): self.add_new_tab(url))
+            pages_menu.addAction(page_action)
+        
         tools_menu.addSeparator()
         
         settings_action = QAction("Configuración", self)
@@ -237,35 +282,261 @@ class MainWindow(QMainWindow):
         settings.setAttribute(QWebEngineSettings.PluginsEnabled, True)
         settings.setAttribute(QWebEngineSettings.LocalStorageEnabled, True)
         settings.setAttribute(QWebEngineSettings.AutoLoadImages, True)
+        
+        # Páginas internas pybrowser://
+        self.scheme_handler = InternalSchemeHandler(self.db_manager, self)
+        self.web_profile.installUrlSchemeHandler(INTERNAL_SCHEME.encode(), self.scheme_handler)
     
-    def add_new_tab(self, url: str = None):
-        """Agregar una nueva pestaña"""
-        if url is None:
-            url = "https://duckduckgo.com"
+    def setup_content_filter(self):
+        """Configurar el bloqueo de anuncios y rastreadores y cargar las listas en segundo plano"""
+        from .config import DEFAULT_CONFIG
+        
+        enabled = self.db_manager.get_setting(
+            "content_filter_enabled", str(DEFAULT_CONFIG["content_filter"]["enabled"]))
+        self.content_filter = None
+        if enabled != "True":
+            return
         
-        web_tab = WebTab(self.web_profile, self.db_manager)
+        self.content_filter = ContentFilter.for_data_dir(self.data_dir)
+        self.content_filter.ensure_loaded()
+        if not PAGE_INTERCEPTORS:
+            # Sin interceptores por página, uno para todo el perfil
+            self.request_interceptor = ContentBlockingInterceptor(self.content_filter, self)
+            self.web_profile.setRequestInterceptor(self.request_interceptor)
+    
+    def setup_domain_blocklist(self):
+        """Cargar en segundo plano la lista de dominios peligrosos (<data_dir>/blocklist)"""
+        from .domain_blocklist import DomainBlocklist
+        from .utils import SecurityUtils
+        
+        blocklist = DomainBlocklist.for_data_dir(self.data_dir)
+        if SecurityUtils.blocklist is not blocklist:
+            SecurityUtils.set_blocklist(blocklist)
+            blocklist.start_reload()
+    
+    def load_filter_list(self):
+        """Agregar una lista de filtros de estilo EasyList"""
+        if self.content_filter is None:
+            QMessageBox.information(self, "Listas de filtros",
+                                    "El bloqueo de contenido está desactivado")
+            return
+        filepath, _ = QFileDialog.getOpenFileName(
+            self, "Cargar lista de filtros", os.path.expanduser("~"),
+            "Listas de filtros (*.txt);;Todos los archivos (*)")
+        if not filepath:
+            return
+        try:
+            self.content_filter.add_list(filepath)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Error al cargar la lista de filtros: {e}")
+            return
+        self.content_filter.start_load()
+        self.status_bar.showMessage("Compilando listas de filtros...")
+    
+    def setup_visited_filter(self):
+        """Configurar el filtro de URLs visitadas y reconstruirlo en segundo plano"""
+        from .config import DEFAULT_CONFIG
+        from .visited_filter import VisitedURLFilter
+        
+        defaults = DEFAULT_CONFIG["visited_filter"]
+        capacity = int(self.db_manager.get_setting(
+            "visited_filter_capacity", str(defaults["capacity"])))
+        false_positive_rate = float(self.db_manager.get_setting(
+            "visited_filter_false_positive_rate", str(defaults["false_positive_rate"])))
+        max_memory_mb = int(self.db_manager.get_setting(
+            "visited_filter_max_memory_mb", str(defaults["max_memory_mb"])))
+        
+        self.visited_filter = VisitedURLFilter.for_data_dir(
+            self.data_dir, capacity, false_positive_rate, max_memory_mb)
+        self.db_manager.attach_visited_filter(self.visited_filter)
+        self.visited_filter.ensure_rebuilt(self.db_manager)
+    
+    def setup_spare_tabs(self):
+        """Configurar la reserva de pestañas precargadas"""
+        from .config import DEFAULT_CONFIG
+        
+        defaults = DEFAULT_CONFIG["tabs"]
+        size = int(self.db_manager.get_setting(
+            "spare_tab_pool_size", str(defaults["spare_pool_size"])))
+        min_available_mb = int(self.db_manager.get_setting(
+            "spare_tab_min_available_mb", str(defaults["spare_min_available_mb"])))
+        
+        self.spare_tabs = SpareTabPool(self.create_spare_tab, size, min_available_mb,
+                                       defaults["spare_refill_delay_ms"], self)
+    
+    def setup_tab_lifecycle(self):
+        """Configurar el congelado y descarte de pestañas inactivas"""
+        from .config import DEFAULT_CONFIG
+        
+        defaults = DEFAULT_CONFIG["tabs"]
+        freeze_after_s = int(self.db_manager.get_setting(
+            "tab_freeze_after_s", str(defaults["freeze_after_s"])))
+        discard_after_s = int(self.db_manager.get_setting(
+            "tab_discard_after_s", str(defaults["discard_after_s"])))
+        min_available_mb = int(self.db_manager.get_setting(
+            "tab_discard_min_available_mb", str(defaults["discard_min_available_mb"])))
+        
+        self.tab_lifecycle = TabLifecycleManager(
+            self.tab_widget, freeze_after_s, discard_after_s, min_available_mb,
+            defaults["lifecycle_check_interval_ms"], self)
+    
+    def setup_session(self, enabled: bool):
+        """
+        Configurar el guardado incremental de la sesión
+        
+        Args:
+            enabled: Si esta ventana guarda su sesión (solo la ventana principal)
+        """
+        from .config import DEFAULT_CONFIG
+        
+        debounce_ms = int(self.db_manager.get_setting(
+            "session_debounce_ms", str(DEFAULT_CONFIG["tabs"]["session_debounce_ms"])))
+        self.session_store = SessionStore(self.db_manager, self.tab_widget, debounce_ms,
+                                          enabled, self)
+    
+    def create_web_tab(self) -> WebTab:
+        """Crear una pestaña con las señales de la ventana conectadas"""
+        web_tab = WebTab(self.web_profile, self.db_manager, self.content_filter)
         
         # Conectar señales
         web_tab.urlChanged.connect(self.update_url_bar)
         web_tab.titleChanged.connect(self.update_tab_title)
         web_tab.loadProgress.connect(self.update_load_progress)
         web_tab.loadFinished.connect(self.update_navigation_buttons)
+        web_tab.iconChanged.connect(self.update_tab_icon)
+        
+        # Guardar en la sesión los cambios de URL, título, favicon e historial
+        for signal in (web_tab.urlChanged, web_tab.titleChanged, web_tab.loadFinished,
+                       web_tab.iconChanged):
+            signal.connect(self.session_store.mark_dirty)
+        
+        return web_tab
+    
+    def create_spare_tab(self) -> WebTab:
+        """Crear una pestaña de reserva con la página de nueva pestaña ya cargada"""
+        web_tab = self.create_web_tab()
+        web_tab.load(QUrl(NEW_TAB_URL))
+        web_tab.prewarmed_generation = self.db_manager.history_generation
+        return web_tab
+    
+    def add_new_tab(self, url: str = None):
+        """Agregar una nueva pestaña (por defecto, la página local de nueva pestaña)"""
+        if url is None:
+            from .config import DEFAULT_CONFIG
+            url = self.db_manager.get_setting("new_tab_url", DEFAULT_CONFIG["urls"]["new_tab"])
+        
+        # Usar una pestaña precargada si hay alguna en reserva
+        web_tab = self.spare_tabs.take()
+        prewarmed = web_tab is not None
+        if web_tab is None:
+            web_tab = self.create_web_tab()
         
         # Agregar la pestaña
         index = self.tab_widget.addTab(web_tab, "Nueva pestaña")
         self.tab_widget.setCurrentIndex(index)
         
-        # Navegar a la URL
-        web_tab.load(QUrl(url))
+        # Navegar a la URL (la pestaña precargada ya muestra la nueva pestaña)
+        if (prewarmed and url == NEW_TAB_URL
+                and web_tab.prewarmed_generation == self.db_manager.history_generation):
+            self.update_url_bar(web_tab.url())
+        else:
+            web_tab.load(QUrl(url))
+        if url == NEW_TAB_URL:
+            self.url_bar.setFocus()
         
         return web_tab
     
+    def restore_session(self) -> bool:
+        """
+        Reabrir las pestañas y la geometría guardadas al cerrar
+        
+        Solo se carga la pestaña activa; el resto quedan como TabPlaceholder
+        hasta que se seleccionan o las carga la cola en segundo plano.
+        
+        Returns:
+            True si se restauró alguna pestaña
+        """
+        geometry = self.db_manager.get_setting("window_geometry")
+        if geometry:
+            self.restoreGeometry(QByteArray.fromHex(geometry.encode()))
+        
+        tabs = self.session_store.load()
+        legacy = not tabs
+        if legacy:
+            # Sesiones guardadas antes de la tabla session_tabs
+            tabs = parse_session(self.db_manager.get_setting("open_tabs"))
+        if not tabs:
+            return False
+        
+        # Sin señales: añadir una pestaña no debe cargarla
+        active_index = 0
+        self.tab_widget.blockSignals(True)
+        for tab in tabs:
+            placeholder = TabPlaceholder(tab['url'], tab['title'], tab['icon'],
+                                         tab.get('history'), tab.get('id'))
+            index = self.tab_widget.addTab(placeholder, icon_from_base64(tab['icon']),
+                                           self._short_title(tab['title']))
+            self.tab_widget.setTabToolTip(index, tab['title'] or tab['url'])
+            if tab['active']:
+                active_index = index
+            if not legacy:
+                self.session_store.remember(placeholder, index, tab['active'])
+        self.tab_widget.setCurrentIndex(active_index)
+        self.tab_widget.blockSignals(False)
+        self.tab_changed(active_index)
+        if legacy:
+            self.session_store.mark_layout_changed()
+        
+        from .config import DEFAULT_CONFIG
+        interval_ms = int(self.db_manager.get_setting(
+            "session_restore_background_interval_ms",
+            str(DEFAULT_CONFIG["tabs"]["restore_background_interval_ms"])))
+        if interval_ms > 0 and len(tabs) > 1:
+            self.restore_timer = QTimer(self)
+            self.restore_timer.timeout.connect(self.restore_next_placeholder)
+            self.restore_timer.start(interval_ms)
+        return True
+    
+    def restore_next_placeholder(self):
+        """Cargar en segundo plano la siguiente pestaña restaurada pendiente"""
+        for i in range(self.tab_widget.count()):
+            if isinstance(self.tab_widget.widget(i), TabPlaceholder):
+                self.materialize_tab(i).restore()
+                return
+        self.restore_timer.stop()
+    
+    def materialize_tab(self, index: int) -> WebTab:
+        """
+        Sustituir una pestaña restaurada por una WebTab
+        
+        La WebTab queda con el estado guardado (URL e historial de navegación)
+        y se carga con restore, al activarla o desde la cola en segundo plano.
+        """
+        placeholder = self.tab_widget.widget(index)
+        web_tab = self.create_web_tab()
+        web_tab.session_id = placeholder.session_id
+        web_tab.set_saved_state(placeholder.url, placeholder.title or None,
+                                placeholder.history_data)
+        
+        was_current = self.tab_widget.currentIndex() == index
+        icon = self.tab_widget.tabIcon(index)
+        text = self.tab_widget.tabText(index)
+        self.tab_widget.blockSignals(True)
+        self.tab_widget.removeTab(index)
+        self.tab_widget.insertTab(index, web_tab, icon, text)
+        if was_current:
+            self.tab_widget.setCurrentIndex(index)
+        self.tab_widget.blockSignals(False)
+        placeholder.deleteLater()
+        return web_tab
+    
     def close_tab(self, index: int):
         """Cerrar una pestaña"""
         if self.tab_widget.count() > 1:
             widget = self.tab_widget.widget(index)
             self.tab_widget.removeTab(index)
             widget.deleteLater()
+            self.session_store.mark_layout_changed()
         else:
             self.close()
     
@@ -274,7 +545,12 @@ class MainWindow(QMainWindow):
         if index >= 0:
             current_tab = self.tab_widget.widget(index)
             if current_tab:
-                self.update_url_bar(current_tab.url())
+                # La URL se toma antes de restaurar: una pestaña descartada
+                # no tiene URL hasta que vuelve a cargar
+                self.update_url_bar(QUrl(current_tab.session_url()))
+                if isinstance(current_tab, TabPlaceholder):
+                    current_tab = self.materialize_tab(index)
+                self.tab_lifecycle.activate(current_tab)
                 self.update_navigation_buttons()
     
     def get_current_tab(self) -> WebTab:
@@ -291,33 +567,12 @@ class MainWindow(QMainWindow):
         if not current_tab:
             return
         
-        # Verificar si es una URL válida
-        if self.is_valid_url(url_text):
-            url = url_text
-            if not url.startswith(('http://', 'https://')):
-                url = 'https://' + url
-        else:
-            # Si no es una URL, buscar en DuckDuckGo
-            url = f"https://duckduckgo.com/?q={url_text}"
-        
-        current_tab.load(QUrl(url))
+        # Dirección (con o sin esquema, páginas internas incluidas) o búsqueda
+        current_tab.load(QUrl(classify_input(url_text).url))
     
     def is_valid_url(self, text: str) -> bool:
         """Verificar si el texto es una URL válida"""
-        url_pattern = re.compile(
-            r'^(?:http|ftp)s?://'  # http:// or https://
-            r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|'  # domain...
-            r'localhost|'  # localhost...
-            r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
-            r'(?::\d+)?'  # optional port
-            r'(?:/?|[/?]\S+)$', re.IGNORECASE)
-        
-        # También considerar URLs sin protocolo pero con dominio
-        domain_pattern = re.compile(
-            r'^(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)$', 
-            re.IGNORECASE)
-        
-        return bool(url_pattern.match(text)) or bool(domain_pattern.match(text))
+        return URLUtils.looks_like_url(text)
     
     def navigate_back(self):
         """Navegar hacia atrás"""
@@ -344,26 +599,55 @@ class MainWindow(QMainWindow):
         if current_tab:
             current_tab.load(QUrl(home_url))
     
+    def _is_background_tab(self) -> bool:
+        """Comprobar si la señal en curso viene de una pestaña que no es la actual"""
+        sender = self.sender()
+        return isinstance(sender, WebTab) and sender is not self.get_current_tab()
+    
     def update_url_bar(self, url: QUrl):
         """Actualizar la barra de direcciones"""
-        self.url_bar.setText(url.toString())
+        if self._is_background_tab():
+            return
+        # La nueva pestaña deja la barra vacía para escribir directamente
+        self.url_bar.setText('' if url.toString() == NEW_TAB_URL else url.toString())
         self.status_bar.showMessage(f"Cargando: {url.toString()}")
     
     def update_tab_title(self, title: str):
         """Actualizar el título de la pestaña"""
-        current_index = self.tab_widget.currentIndex()
+        sender = self.sender()
+        if isinstance(sender, WebTab):
+            # Las pestañas en reserva aún no están en el QTabWidget
+            current_index = self.tab_widget.indexOf(sender)
+        else:
+            current_index = self.tab_widget.currentIndex()
         if current_index >= 0:
-            # Limitar la longitud del título
-            if len(title) > 20:
-                title = title[:17] + "..."
-            self.tab_widget.setTabText(current_index, title or "Sin título")
+            self.tab_widget.setTabText(current_index, self._short_title(title))
+    
+    def _short_title(self, title: str) -> str:
+        """Limitar la longitud del título de una pestaña"""
+        if len(title) > 20:
+            title = title[:17] + "..."
+        return title or "Sin título"
+    
+    def update_tab_icon(self, icon):
+        """Actualizar el favicon de la pestaña que lo cambió"""
+        index = self.tab_widget.indexOf(self.sender())
+        if index >= 0:
+            self.tab_widget.setTabIcon(index, icon)
     
     def update_load_progress(self, progress: int):
         """Actualizar el progreso de carga"""
+        if self._is_background_tab():
+            return
         if progress < 100:
             self.status_bar.showMessage(f"Cargando... {progress}%")
         else:
-            self.status_bar.showMessage("Página cargada")
+            current_tab = self.get_current_tab()
+            blocked = current_tab.blocked_requests() if current_tab else 0
+            if blocked:
+                self.status_bar.showMessage(f"Página cargada ({blocked} peticiones bloqueadas)")
+            else:
+                self.status_bar.showMessage("Página cargada")
     
     def update_navigation_buttons(self):
         """Actualizar el estado de los botones de navegación"""
@@ -421,15 +705,105 @@ class MainWindow(QMainWindow):
         else:
             self.add_new_tab(url)
     
+    def _run_with_progress(self, label: str, task):
+        """Ejecutar una tarea larga mostrando el progreso sin congelar la interfaz"""
+        progress = QProgressDialog(label, None, 0, 0, self)
+        progress.setWindowTitle("PyWebBrowser")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+        
+        def on_progress(count: int):
+            progress.setLabelText(f"{label}\n{count} registros")
+            QApplication.processEvents()
+        
+        try:
+            return task(on_progress)
+        finally:
+            progress.close()
+    
+    def export_user_data(self):
+        """Exportar historial, favoritos y cookies a un archivo"""
+        from .data_transfer import DataExporter, FORMAT_NDJSON, FORMAT_BINARY
+        
+        filepath, selected_filter = QFileDialog.getSaveFileName(
+            self, "Exportar datos", "pybrowser-export.ndjson",
+            "NDJSON (*.ndjson);;Binario comprimido (*.pybx)")
+        if not filepath:
+            return
+        
+        fmt = FORMAT_BINARY if selected_filter.endswith("(*.pybx)") else FORMAT_NDJSON
+        exporter = DataExporter(self.db_manager)
+        try:
+            count = self._run_with_progress(
+                "Exportando datos...",
+                lambda callback: exporter.export_to_file(filepath, fmt, progress_callback=callback))
+            QMessageBox.information(self, "Exportación completada",
+                                    f"Se exportaron {count} registros")
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "Error", f"Error al exportar datos: {e}")
+    
+    def import_user_data(self):
+        """Importar datos exportados previamente"""
+        from .data_transfer import DataImporter
+        
+        filepath, _ = QFileDialog.getOpenFileName(
+            self, "Importar datos", "",
+            "Exportaciones de PyWebBrowser (*.ndjson *.pybx);;Todos los archivos (*)")
+        if not filepath:
+            return
+        
+        importer = DataImporter(self.db_manager)
+        try:
+            count = self._run_with_progress(
+                "Importando datos...",
+                lambda callback: importer.import_from_file(filepath, progress_callback=callback))
+            QMessageBox.information(self, "Importación completada",
+                                    f"Se importaron {count} registros")
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "Error", f"Error al importar datos: {e}")
+    
+    def import_browser_history(self):
+        """Importar el historial de Firefox o de un navegador Chromium"""
+        from .history_import import BrowserHistoryImporter
+        
+        other_file = "Otro archivo..."
+        profiles = BrowserHistoryImporter.find_profiles()
+        options = [f"{source}: {path}" for source, path in profiles] + [other_file]
+        choice, ok = QInputDialog.getItem(self, "Importar historial",
+                                          "Perfil de origen:", options, 0, False)
+        if not ok:
+            return
+        
+        source = None
+        if choice == other_file:
+            filepath, _ = QFileDialog.getOpenFileName(
+                self, "Importar historial", os.path.expanduser("~"),
+                "Historial (places.sqlite History);;Todos los archivos (*)")
+            if not filepath:
+                return
+        else:
+            source, filepath = profiles[options.index(choice)]
+        
+        importer = BrowserHistoryImporter(self.db_manager)
+        try:
+            count = self._run_with_progress(
+                "Importando historial...",
+                lambda callback: importer.import_file(
+                    filepath, source, progress_callback=lambda done, total: callback(done)))
+            QMessageBox.information(self, "Importación completada",
+                                    f"Se importaron {count} entradas del historial")
+        except (OSError, ValueError, sqlite3.Error) as e:
+            QMessageBox.critical(self, "Error", f"Error al importar historial: {e}")
+    
     def new_window(self):
         """Crear una nueva ventana del navegador"""
-        new_window = MainWindow(self.data_dir)
+        new_window = MainWindow(self.data_dir, restore_session=False)
         new_window.show()
     
     def auto_save(self):
         """Guardar automáticamente los datos"""
-        # Aquí se podrían agregar operaciones de guardado automático
-        pass
+        # Normalmente no hay nada pendiente: la sesión se guarda al cambiar
+        self.session_store.snapshot()
     
     def closeEvent(self, event):
         """Manejar el cierre de la ventana"""
@@ -439,16 +813,12 @@ class MainWindow(QMainWindow):
             geometry = self.saveGeometry()
             self.db_manager.save_setting("window_geometry", geometry.toHex().data().decode())
             
-            # Guardar las URLs abiertas
-            open_urls = []
-            for i in range(self.tab_widget.count()):
-                tab = self.tab_widget.widget(i)
-                if tab:
-                    open_urls.append(tab.url().toString())
+            # Escribir los últimos cambios de las pestañas abiertas
+            self.session_store.flush()
             
-            if open_urls:
-                import json
-                self.db_manager.save_setting("open_tabs", json.dumps(open_urls))
+            self.visited_filter.flush()
+            self.spare_tabs.clear()
+            self.tab_lifecycle.stop()
                 
         except Exception as e:
             print(f"Error al guardar configuraciones: {e}")
@@ -0,0 +1,489 @@
+"""
+Modelos de datos para las vistas del navegador
+Modelos Qt con carga bajo demanda desde la base de datos
+"""
+
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PyQt5.QtCore import (Qt, QAbstractListModel, QAbstractItemModel, QAbstractTableModel,
+                          QModelIndex, QSize, QRect)
+from PyQt5.QtGui import QFont, QFontMetrics
+from PyQt5.QtWidgets import QApplication, QStyledItemDelegate, QStyle, QStyleOptionViewItem
+
+# Rol para obtener el diccionario completo de una entrada
+EntryRole = Qt.UserRole
+
+# Longitud máxima del valor de una cookie mostrado en la tabla
+COOKIE_VALUE_DISPLAY_LENGTH = 50
+
+class HistoryListModel(QAbstractListModel):
+    """Modelo de lista del historial que se carga por páginas"""
+
+    def __init__(self, db_manager, page_size: int = 100, parent=None):
+        """
+        Args:
+            db_manager: Instancia de DatabaseManager
+            page_size: Entradas leídas por cada fetchMore
+        """
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.page_size = page_size
+        self.query: Optional[str] = None
+        self._entries: List[Dict] = []
+        self._exhausted = False
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._entries)
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._entries):
+            return None
+        entry = self._entries[index.row()]
+        if role == EntryRole:
+            return entry
+        if role == Qt.DisplayRole:
+            return entry['title'] or 'Sin título'
+        if role == Qt.ToolTipRole:
+            return entry['url']
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        """Leer la siguiente página desde la base de datos"""
+        if parent.isValid() or self._exhausted:
+            return
+        after = None
+        if self._entries:
+            last = self._entries[-1]
+            after = (last['visit_time'], last['id'])
+
+        rows = self.db_manager.get_history_page(after, self.page_size, self.query)
+        if len(rows) < self.page_size:
+            self._exhausted = True
+        self.append_entries(rows)
+
+    def set_query(self, query: Optional[str]):
+        """Reiniciar el modelo con un nuevo filtro de búsqueda"""
+        self.beginResetModel()
+        self.query = query or None
+        self._entries = []
+        self._exhausted = False
+        self.endResetModel()
+
+    def begin_results(self, query: str):
+        """
+        Vaciar el modelo para recibir resultados de búsqueda en bloques
+        
+        En este modo no se leen páginas con fetchMore: los resultados llegan
+        mediante append_entries.
+        """
+        self.beginResetModel()
+        self.query = query
+        self._entries = []
+        self._exhausted = True
+        self.endResetModel()
+
+    def append_entries(self, rows: List[Dict]):
+        """Agregar un bloque de entradas al final de la lista"""
+        if not rows:
+            return
+        first = len(self._entries)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._entries.extend(rows)
+        self.endInsertRows()
+
+    def entry(self, row: int) -> Dict:
+        """Obtener la entrada de una fila"""
+        return self._entries[row]
+
+    def remove_row(self, row: int):
+        """Quitar una fila sin volver a consultar la base de datos"""
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._entries[row]
+        self.endRemoveRows()
+
+    def update_entry(self, row: int, **changes):
+        """Actualizar campos de una fila y notificar a la vista"""
+        self._entries[row].update(changes)
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def remove_ids(self, entry_ids: Iterable[int]) -> List[Tuple[int, Dict]]:
+        """
+        Quitar las filas de varias entradas, agrupando las filas contiguas
+        
+        Returns:
+            Pares (fila, entrada) quitados, en orden ascendente, para insert_entries
+        """
+        ids = set(entry_ids)
+        rows = [row for row, entry in enumerate(self._entries) if entry['id'] in ids]
+        removed = [(row, self._entries[row]) for row in rows]
+        
+        # Quitar de abajo hacia arriba para no desplazar las filas pendientes
+        end = len(rows) - 1
+        while end >= 0:
+            start = end
+            while start > 0 and rows[start - 1] == rows[start] - 1:
+                start -= 1
+            self.beginRemoveRows(QModelIndex(), rows[start], rows[end])
+            del self._entries[rows[start]:rows[end] + 1]
+            self.endRemoveRows()
+            end = start - 1
+        return removed
+    
+    def insert_entries(self, pairs: List[Tuple[int, Dict]]):
+        """Volver a insertar filas quitadas con remove_ids en sus posiciones"""
+        for row, entry in sorted(pairs, key=lambda pair: pair[0]):
+            row = min(row, len(self._entries))
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._entries.insert(row, entry)
+            self.endInsertRows()
+    
+    def update_ids(self, entry_ids: Iterable[int], **changes):
+        """Actualizar campos de varias entradas y notificar un único rango a la vista"""
+        ids = set(entry_ids)
+        rows = [row for row, entry in enumerate(self._entries) if entry['id'] in ids]
+        if not rows:
+            return
+        for row in rows:
+            self._entries[row].update(changes)
+        self.dataChanged.emit(self.index(rows[0]), self.index(rows[-1]))
+
+class HistoryItemDelegate(QStyledItemDelegate):
+    """Dibuja las entradas del historial (título, URL y detalles) al pintarlas"""
+
+    LINES = 3
+    PADDING = 6
+
+    def sizeHint(self, option: QStyleOptionViewItem, index: QModelIndex) -> QSize:
+        line_height = QFontMetrics(option.font).lineSpacing()
+        return QSize(option.rect.width(), line_height * self.LINES + self.PADDING * 2)
+
+    def paint(self, painter, option: QStyleOptionViewItem, index: QModelIndex):
+        entry = index.data(EntryRole)
+        if entry is None:
+            return
+
+        # Fondo y estado de selección según el estilo actual
+        style_option = QStyleOptionViewItem(option)
+        self.initStyleOption(style_option, index)
+        style_option.text = ''
+        widget = option.widget
+        style = widget.style() if widget else None
+        if style:
+            style.drawControl(QStyle.CE_ItemViewItem, style_option, painter, widget)
+
+        selected = option.state & QStyle.State_Selected
+        text_color = option.palette.highlightedText() if selected else option.palette.text()
+        line_height = QFontMetrics(option.font).lineSpacing()
+        rect = option.rect.adjusted(self.PADDING, self.PADDING, -self.PADDING, -self.PADDING)
+
+        details = f"Visitado: {entry['visit_time']} | Visitas: {entry['visit_count']}"
+        if entry['is_favorite']:
+            details += " ⭐"
+        lines = [entry['title'] or 'Sin título', entry['url'], details]
+
+        painter.save()
+        painter.setPen(text_color.color())
+        for i, text in enumerate(lines):
+            font = QFont(option.font)
+            font.setBold(i == 0)
+            painter.setFont(font)
+            line_rect = QRect(rect.left(), rect.top() + i * line_height, rect.width(), line_height)
+            elided = QFontMetrics(font).elidedText(text, Qt.ElideRight, line_rect.width())
+            painter.drawText(line_rect, Qt.AlignLeft | Qt.AlignVCenter, elided)
+        painter.restore()
+
+class BookmarkNode:
+    """Nodo del árbol de marcadores"""
+
+    def __init__(self, entry: Optional[Dict], parent: Optional["BookmarkNode"] = None, row: int = 0):
+        """
+        Args:
+            entry: Fila de get_bookmark_children, o None para la raíz
+            parent: Nodo padre
+            row: Fila dentro del padre
+        """
+        self.entry = entry
+        self.parent = parent
+        self.row = row
+        # None mientras la carpeta no se haya leído
+        self.children: Optional[List["BookmarkNode"]] = None
+
+    @property
+    def id(self) -> Optional[int]:
+        return self.entry['id'] if self.entry else None
+
+    @property
+    def is_folder(self) -> bool:
+        return self.entry is None or bool(self.entry['is_folder'])
+
+class BookmarkTreeModel(QAbstractItemModel):
+    """Árbol de marcadores que lee cada carpeta al expandirla"""
+
+    HEADERS = ["Título", "URL"]
+
+    def __init__(self, db_manager, parent=None):
+        """
+        Args:
+            db_manager: Instancia de DatabaseManager
+        """
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self._root = BookmarkNode(None)
+        # Nodos leídos por id, para localizar carpetas sin recorrer el árbol
+        self._nodes: Dict[int, BookmarkNode] = {}
+
+    def _node(self, index: QModelIndex) -> BookmarkNode:
+        return index.internalPointer() if index.isValid() else self._root
+
+    def _index_of(self, node: BookmarkNode) -> QModelIndex:
+        if node is self._root:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, node)
+
+    def index(self, row: int, column: int, parent=QModelIndex()) -> QModelIndex:
+        node = self._node(parent)
+        if node.children is None or not 0 <= row < len(node.children):
+            return QModelIndex()
+        return self.createIndex(row, column, node.children[row])
+
+    def parent(self, index: QModelIndex) -> QModelIndex:
+        if not index.isValid():
+            return QModelIndex()
+        return self._index_of(index.internalPointer().parent)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.column() > 0:
+            return 0
+        node = self._node(parent)
+        return len(node.children) if node.children else 0
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return len(self.HEADERS)
+
+    def hasChildren(self, parent=QModelIndex()) -> bool:
+        node = self._node(parent)
+        if not node.is_folder:
+            return False
+        if node.children is None:
+            return node is self._root or bool(node.entry['has_children'])
+        return bool(node.children)
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        node = self._node(parent)
+        return node.is_folder and node.children is None
+
+    def fetchMore(self, parent=QModelIndex()):
+        """Leer un nivel de carpeta desde la base de datos"""
+        node = self._node(parent)
+        if not self.canFetchMore(parent):
+            return
+        rows = self.db_manager.get_bookmark_children(node.id)
+        if not rows:
+            node.children = []
+            return
+        self.beginInsertRows(parent, 0, len(rows) - 1)
+        node.children = [BookmarkNode(row, node, i) for i, row in enumerate(rows)]
+        for child in node.children:
+            self._nodes[child.id] = child
+        self.endInsertRows()
+
+    def headerData(self, section: int, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        entry = node.entry
+        if role == EntryRole:
+            return entry
+        if role == Qt.DisplayRole:
+            if index.column() == 0:
+                return entry['title'] or ('Nueva carpeta' if node.is_folder else 'Sin título')
+            return entry['url'] or ''
+        if role == Qt.ToolTipRole:
+            return entry['url']
+        if role == Qt.DecorationRole and index.column() == 0:
+            icon = QStyle.SP_DirIcon if node.is_folder else QStyle.SP_FileIcon
+            return QApplication.style().standardIcon(icon)
+        return None
+
+    def entry(self, index: QModelIndex) -> Optional[Dict]:
+        """Obtener la fila de un índice (None para la raíz)"""
+        return self._node(index).entry
+
+    def _renumber(self, node: BookmarkNode):
+        for i, child in enumerate(node.children):
+            child.row = i
+
+    def _forget(self, node: BookmarkNode):
+        """Olvidar un nodo y sus descendientes leídos"""
+        self._nodes.pop(node.id, None)
+        for child in node.children or []:
+            self._forget(child)
+
+    def append_entry(self, parent: QModelIndex, entry: Dict):
+        """Agregar una fila nueva al final de una carpeta"""
+        node = self._node(parent)
+        if node.children is None:
+            # La carpeta se leerá completa al expandirla
+            if node.entry:
+                node.entry['has_children'] = 1
+            return
+        row = len(node.children)
+        self.beginInsertRows(parent, row, row)
+        child = BookmarkNode(entry, node, row)
+        node.children.append(child)
+        self._nodes[child.id] = child
+        self.endInsertRows()
+
+    def remove_ids(self, bookmark_ids: Iterable[int]):
+        """Quitar las filas leídas de varios marcadores o carpetas"""
+        nodes = [self._nodes[bookmark_id] for bookmark_id in bookmark_ids
+                 if bookmark_id in self._nodes]
+        for node in sorted(nodes, key=lambda node: node.row, reverse=True):
+            parent = node.parent
+            if node.id not in self._nodes or node not in parent.children:
+                continue
+            self.beginRemoveRows(self._index_of(parent), node.row, node.row)
+            del parent.children[node.row]
+            self._renumber(parent)
+            self._forget(node)
+            self.endRemoveRows()
+
+    def reload_folder(self, folder_id: Optional[int]):
+        """Volver a leer una carpeta ya expandida"""
+        node = self._root if folder_id is None else self._nodes.get(folder_id)
+        if node is None or node.children is None:
+            return
+        parent = self._index_of(node)
+        if node.children:
+            self.beginRemoveRows(parent, 0, len(node.children) - 1)
+            for child in node.children:
+                self._forget(child)
+            node.children = []
+            self.endRemoveRows()
+        node.children = None
+        self.fetchMore(parent)
+
+class CookieTableModel(QAbstractTableModel):
+    """
+    Tabla de cookies virtual
+    
+    Solo guarda los IDs en el orden mostrado; las filas se leen por bloques
+    cuando la vista pide celdas visibles y se formatean al pintarlas.
+    """
+
+    HEADERS = ["Dominio", "Nombre", "Valor", "Ruta", "Expira", "Segura", "HTTP Only"]
+    COLUMNS = ['domain', 'name', 'value', 'path', 'expires', 'secure', 'http_only']
+
+    def __init__(self, db_manager, block_size: int = 256, max_blocks: int = 32, parent=None):
+        """
+        Args:
+            db_manager: Instancia de DatabaseManager
+            block_size: Filas leídas por consulta
+            max_blocks: Bloques conservados en caché
+        """
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        self.domain_prefix: Optional[str] = None
+        self.sort_column = 0
+        self.sort_order = Qt.AscendingOrder
+        self._ids = array('q')
+        self._blocks: "OrderedDict[int, Dict[int, Tuple]]" = OrderedDict()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._ids)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section: int, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def _row(self, row: int) -> Optional[Tuple]:
+        """Obtener una fila, leyendo su bloque si no está en caché"""
+        block_index = row // self.block_size
+        block = self._blocks.get(block_index)
+        if block is None:
+            start = block_index * self.block_size
+            block = self.db_manager.get_cookies_by_ids(self._ids[start:start + self.block_size])
+            self._blocks[block_index] = block
+            if len(self._blocks) > self.max_blocks:
+                self._blocks.popitem(last=False)
+        else:
+            self._blocks.move_to_end(block_index)
+        return block.get(self._ids[row])
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        cookie = self._row(index.row())
+        if cookie is None:
+            return None
+        value = cookie[index.column()]
+        column = self.COLUMNS[index.column()]
+
+        if role == Qt.ToolTipRole:
+            return value if column == 'value' else None
+        if column == 'value':
+            value = value or ''
+            if len(value) > COOKIE_VALUE_DISPLAY_LENGTH:
+                return value[:COOKIE_VALUE_DISPLAY_LENGTH] + "..."
+            return value
+        if column == 'expires':
+            return str(value) if value else "Sesión"
+        if column in ('secure', 'http_only'):
+            return "Sí" if value else "No"
+        return value
+
+    def sort(self, column: int, order=Qt.AscendingOrder):
+        """Ordenar en SQL por la columna indicada"""
+        self.sort_column = column
+        self.sort_order = order
+        self.reload()
+
+    def set_domain_prefix(self, prefix: Optional[str]):
+        """Filtrar por prefijo de dominio"""
+        self.domain_prefix = prefix or None
+        self.reload()
+
+    def reload(self):
+        """Volver a leer los IDs con el filtro y el orden actuales"""
+        self.beginResetModel()
+        self._ids = self.db_manager.get_cookie_ids(
+            self.domain_prefix, self.COLUMNS[self.sort_column],
+            self.sort_order == Qt.DescendingOrder)
+        self._blocks.clear()
+        self.endResetModel()
+
+    def cookie_id(self, row: int) -> int:
+        """Obtener el ID de la cookie de una fila"""
+        return self._ids[row]
+
+    def remove_rows(self, rows: Iterable[int]):
+        """Quitar varias filas sin volver a consultar la base de datos"""
+        rows = sorted(set(rows))
+        end = len(rows) - 1
+        while end >= 0:
+            start = end
+            while start > 0 and rows[start - 1] == rows[start] - 1:
+                start -= 1
+            self.beginRemoveRows(QModelIndex(), rows[start], rows[end])
+            del self._ids[rows[start]:rows[end] + 1]
+            # Los bloques están indexados por posición
+            self._blocks.clear()
+            self.endRemoveRows()
+            end = start - 1
@@ -0,0 +1,134 @@
+"""
+Clasificador de navegaciones
+Decide qué cambios de URL de una pestaña cuentan como visitas para el historial
+"""
+
+from typing import List, Optional
+
+# Tipos de navegación (independientes de Qt)
+NAV_LINK = "link"
+NAV_TYPED = "typed"
+NAV_FORM = "form"
+NAV_BACK_FORWARD = "back_forward"
+NAV_RELOAD = "reload"
+NAV_REDIRECT = "redirect"
+NAV_OTHER = "other"
+
+# Navegaciones que pueden ser redirecciones iniciadas por la propia página
+REDIRECT_LIKE_TYPES = (NAV_REDIRECT, NAV_OTHER)
+
+class PendingNavigation:
+    """Navegación de marco principal solicitada pero aún no confirmada"""
+
+    def __init__(self, url: str, nav_type: str):
+        self.url = url
+        self.nav_type = nav_type
+        self.redirects: List[str] = []
+
+class NavigationClassifier:
+    """
+    Clasifica las navegaciones de una pestaña
+
+    Solo cuentan como visita las navegaciones entre documentos que terminan de
+    cargar. Los cambios de URL dentro del mismo documento (fragmentos,
+    history.pushState) no pasan por la solicitud de navegación y se ignoran;
+    las cadenas de redirecciones se colapsan en una visita a la URL final.
+    """
+
+    def __init__(self, count_reloads: bool = False):
+        """
+        Args:
+            count_reloads: Si las recargas cuentan como nuevas visitas
+        """
+        self.count_reloads = count_reloads
+        self._pending: Optional[PendingNavigation] = None
+        self._committed: Optional[PendingNavigation] = None
+        self._awaiting_load = False
+
+        # Métricas
+        self.visits_recorded = 0
+        self.same_document_changes = 0
+        self.redirects_collapsed = 0
+
+    def navigation_requested(self, url: str, nav_type: str, is_main_frame: bool):
+        """
+        Registrar una solicitud de navegación (acceptNavigationRequest)
+
+        Args:
+            url: URL solicitada
+            nav_type: Uno de los tipos NAV_*
+            is_main_frame: Si la navegación es del marco principal
+        """
+        if not is_main_frame:
+            return
+
+        if self._pending and nav_type == NAV_REDIRECT:
+            # Redirección de servidor: la cadena continúa con la nueva URL
+            self._pending.redirects.append(self._pending.url)
+            self._pending.url = url
+            self.redirects_collapsed += 1
+            return
+
+        if self._awaiting_load and nav_type in REDIRECT_LIKE_TYPES:
+            # Redirección de cliente antes de terminar la carga: el documento
+            # intermedio no cuenta como visita
+            pending = PendingNavigation(url, self._committed.nav_type)
+            pending.redirects = self._committed.redirects + [self._committed.url]
+            self._pending = pending
+            self._awaiting_load = False
+            self.redirects_collapsed += 1
+            return
+
+        self._pending = PendingNavigation(url, nav_type)
+
+    def url_changed(self, url: str) -> bool:
+        """
+        Registrar un cambio de URL de la página
+
+        Returns:
+            True si es la confirmación de una navegación entre documentos;
+            False si es un cambio dentro del mismo documento
+        """
+        if self._pending is None or self._is_fragment_change(url):
+            self._pending = None
+            self.same_document_changes += 1
+            return False
+
+        self._committed = self._pending
+        self._committed.url = url
+        self._pending = None
+        self._awaiting_load = True
+        return True
+
+    def _is_fragment_change(self, url: str) -> bool:
+        """Comprobar si la URL solo cambia el fragmento del documento actual"""
+        if self._committed is None or "#" not in url:
+            return False
+        return url.split("#", 1)[0] == self._committed.url.split("#", 1)[0]
+
+    def load_finished(self, url: str, ok: bool) -> Optional[str]:
+        """
+        Registrar el final de una carga
+
+        Args:
+            url: URL actual de la página
+            ok: Si la carga terminó correctamente
+
+        Returns:
+            La URL que debe guardarse como visita, o None
+        """
+        if ok and not self._awaiting_load and self._pending:
+            # Navegación a la misma URL (recarga, enlace a la propia página):
+            # no hubo cambio de URL que la confirmara
+            self.url_changed(url)
+        if not self._awaiting_load:
+            return None
+        self._awaiting_load = False
+
+        if not ok:
+            return None
+        if self._committed.nav_type == NAV_RELOAD and not self.count_reloads:
+            return None
+
+        self.visits_recorded += 1
+        return self._committed.url
@@ -0,0 +1,127 @@
+"""
+Clasificador de la barra de direcciones
+Decide si el texto escrito es una dirección o una búsqueda y a qué URL lleva
+"""
+
+import re
+from functools import lru_cache
+from urllib.parse import quote_plus
+
+from .config import DEFAULT_CONFIG
+from .public_suffix import is_known_tld
+
+# Tipos de intención (independientes de Qt)
+INTENT_URL = "url"              # URL con esquema explícito
+INTENT_DOMAIN = "domain"        # dominio con un TLD conocido: https://
+INTENT_IP = "ip"                # dirección IPv4 o IPv6: http://
+INTENT_LOCALHOST = "localhost"  # localhost y *.localhost: http://
+INTENT_INTRANET = "intranet"    # nombre sin TLD conocido con puerto, ruta o punto final: http://
+INTENT_SEARCH = "search"
+
+# Plantilla de búsqueda por defecto ({query} se sustituye por los términos)
+SEARCH_TEMPLATE = DEFAULT_CONFIG["urls"]["search_engine"]
+
+# Esquemas que se aceptan sin // (los demás solo con ://). pybrowser es el de
+# las páginas internas (internal_pages.INTERNAL_SCHEME). javascript: no se
+# incluye a propósito: escrito en la barra se busca en lugar de ejecutarse.
+OPAQUE_SCHEMES = frozenset(['about', 'data', 'mailto', 'view-source', 'blob', 'pybrowser'])
+
+# Textos distintos recordados (el mismo texto se clasifica en cada pulsación)
+CLASSIFY_CACHE_SIZE = 1024
+
+# Esquema al principio del texto
+SCHEME_RE = re.compile(r'([a-z][a-z0-9+.\-]*):(//)?', re.IGNORECASE)
+
+# Dirección sin esquema compilada al cargar el módulo: credenciales, host
+# (IPv6 entre corchetes o etiquetas), puerto y el resto de la URL
+ADDRESS_RE = re.compile(r'''
+    (?P<userinfo>[^\s/?#@]*@)?
+    (?P<host>\[[0-9a-f:.]+\]|[\w\-]+(?:\.[\w\-]+)*(?P<dot>\.)?)
+    (?::(?P<port>\d{1,5}))?
+    (?P<rest>[/?#]\S*)?
+''', re.IGNORECASE | re.VERBOSE)
+
+# Host de una URL con esquema (vacío en about:, data:...)
+URL_HOST_RE = re.compile(r'[^:]*:(?://(?:[^/?#@]*@)?(\[[^\]]*\]|[^:/?#]*))?')
+
+IPV4_RE = re.compile(r'(?:(?:25[0-5]|2[0-4]\d|1?\d?\d)\.){3}(?:25[0-5]|2[0-4]\d|1?\d?\d)')
+
+class NavigationIntent:
+    """Resultado de clasificar el texto de la barra de direcciones"""
+
+    def __init__(self, kind: str, text: str, url: str, host: str = '', query: str = ''):
+        """
+        Args:
+            kind: Uno de los tipos INTENT_*
+            text: Texto escrito, sin espacios a los lados
+            url: URL a la que hay que navegar
+            host: Host de destino, para preconectar (vacío en las búsquedas)
+            query: Términos de búsqueda (solo en INTENT_SEARCH)
+        """
+        self.kind = kind
+        self.text = text
+        self.url = url
+        self.host = host
+        self.query = query
+
+    @property
+    def is_search(self) -> bool:
+        """Si el texto se va a buscar en lugar de abrir como dirección"""
+        return self.kind == INTENT_SEARCH
+
+    def __repr__(self) -> str:
+        return f"NavigationIntent({self.kind!r}, {self.url!r})"
+
+def search_intent(text: str, search_template: str = SEARCH_TEMPLATE) -> NavigationIntent:
+    """Construir la intención de buscar un texto"""
+    return NavigationIntent(INTENT_SEARCH, text,
+                            search_template.replace('{query}', quote_plus(text)), query=text)
+
+@lru_cache(maxsize=CLASSIFY_CACHE_SIZE)
+def classify_input(text: str, search_template: str = SEARCH_TEMPLATE) -> NavigationIntent:
+    """
+    Clasificar el texto de la barra de direcciones
+
+    Con esquema (https://..., about:blank, pybrowser:history) es una URL tal
+    cual. Sin esquema es una dirección si el host es una IP, localhost, un
+    dominio con un TLD conocido o un nombre de la intranet seguido de puerto,
+    ruta o punto final (intranet/, nas:5000, router.); lo demás se busca.
+
+    Args:
+        text: Texto escrito por el usuario
+        search_template: URL de búsqueda con {query}
+
+    Returns:
+        La intención de navegación
+    """
+    text = text.strip()
+    scheme = SCHEME_RE.match(text)
+    # "localhost:8080" o "nas:5000" no tienen esquema: son un host con puerto
+    if scheme is not None and (scheme.group(2) or scheme.group(1).lower() in OPAQUE_SCHEMES):
+        host = URL_HOST_RE.match(text).group(1) or ''
+        return NavigationIntent(INTENT_URL, text, text, host.lower().strip('[]'))
+
+    match = ADDRESS_RE.fullmatch(text)
+    if match is None or (match.group('userinfo') and not match.group('rest')):
+        # Usuario@host sin esquema ni ruta es una dirección de correo
+        return search_intent(text, search_template)
+    host = match.group('host').lower()
+
+    if host.startswith('['):
+        kind = INTENT_IP
+    elif IPV4_RE.fullmatch(host):
+        kind = INTENT_IP
+    elif host == 'localhost' or host.endswith('.localhost'):
+        kind = INTENT_LOCALHOST
+    elif '.' in host.rstrip('.') and is_known_tld(host.rstrip('.').rpartition('.')[2]):
+        kind = INTENT_DOMAIN
+    elif match.group('port') or match.group('rest') or match.group('dot'):
+        # Solo números ("3.14/2") es una operación, no una dirección
+        if host.replace('.', '').isdigit():
+            return search_intent(text, search_template)
+        kind = INTENT_INTRANET
+    else:
+        return search_intent(text, search_template)
+
+    scheme = 'https' if kind == INTENT_DOMAIN else 'http'
+    return NavigationIntent(kind, text, f"{scheme}://{text}", host.strip('[]').rstrip('.'))
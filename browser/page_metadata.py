@@ -0,0 +1,276 @@
+"""
+Metadatos de páginas
+Lee el título, la descripción, la URL canónica, los favicons y la codificación
+de la cabecera (<head>) de un documento sin procesar el resto
+"""
+
+import codecs
+import html
+import re
+from html.parser import HTMLParser
+from typing import BinaryIO, Iterable, List, Optional, Union
+from urllib.parse import urljoin
+
+# Bytes que se leen como máximo buscando el final de <head>
+HEAD_BYTE_BUDGET = 32 * 1024
+
+# Tamaño de los trozos leídos de un flujo
+READ_CHUNK_SIZE = 4096
+
+# La declaración de codificación debe estar en los primeros 1024 bytes (HTML)
+CHARSET_PRESCAN_BYTES = 1024
+
+DEFAULT_CHARSET = 'utf-8'
+
+# Marcas de orden de bytes, de más larga a más corta
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+
+# <meta charset="..."> o <meta http-equiv="Content-Type" content="...; charset=...">
+META_CHARSET_RE = re.compile(rb'<meta\s[^>]*?charset\s*=\s*["\']?\s*([a-zA-Z0-9_.:\-]+)', re.IGNORECASE)
+CONTENT_TYPE_CHARSET_RE = re.compile(r'charset\s*=\s*["\']?([a-zA-Z0-9_.:\-]+)', re.IGNORECASE)
+
+# Etiquetas que solo pueden aparecer en <head>: cualquier otra abre el cuerpo
+HEAD_TAGS = frozenset(['html', 'head', 'title', 'meta', 'link', 'base', 'script',
+                       'style', 'noscript', 'template'])
+
+# Relaciones de <link> que son favicons
+ICON_RELS = frozenset(['icon', 'apple-touch-icon', 'apple-touch-icon-precomposed', 'mask-icon'])
+
+class PageMetadata:
+    """Metadatos de la cabecera de una página"""
+
+    def __init__(self):
+        self.title: Optional[str] = None
+        self.description: Optional[str] = None
+        self.canonical_url: Optional[str] = None
+        self.icons: List[str] = []
+        self.charset: Optional[str] = None
+        # Bytes leídos para obtenerlos
+        self.bytes_read = 0
+
+    def to_dict(self) -> dict:
+        """Convertir a diccionario"""
+        return {
+            'title': self.title,
+            'description': self.description,
+            'canonical_url': self.canonical_url,
+            'icons': list(self.icons),
+            'charset': self.charset,
+        }
+
+def _lookup_charset(name: Optional[str]) -> Optional[str]:
+    """Nombre normalizado de una codificación, o None si Python no la conoce"""
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name.strip()).name
+    except LookupError:
+        return None
+
+def detect_charset(prefix: bytes, content_type: Optional[str] = None) -> str:
+    """
+    Determinar la codificación de un documento
+
+    Por orden: marca de orden de bytes, charset de la cabecera Content-Type y
+    declaración <meta> en los primeros 1024 bytes.
+
+    Args:
+        prefix: Primeros bytes del documento
+        content_type: Cabecera Content-Type de la respuesta, si se conoce
+
+    Returns:
+        Nombre de la codificación (utf-8 si no se declara ninguna)
+    """
+    for bom, charset in BOMS:
+        if prefix.startswith(bom):
+            return charset
+    if content_type:
+        match = CONTENT_TYPE_CHARSET_RE.search(content_type)
+        charset = _lookup_charset(match.group(1)) if match else None
+        if charset:
+            return charset
+    match = META_CHARSET_RE.search(prefix[:CHARSET_PRESCAN_BYTES])
+    charset = _lookup_charset(match.group(1).decode('ascii')) if match else None
+    # Una página que declara UTF-16 en ASCII no puede estar en UTF-16
+    if charset and not charset.startswith('utf-16'):
+        return charset
+    return DEFAULT_CHARSET
+
+class HeadMetadataParser(HTMLParser):
+    """
+    Analizador de la cabecera de un documento
+
+    Se detiene (`done`) al cerrar </head> o al encontrar la primera etiqueta
+    del cuerpo. Las entidades del título y de los atributos se decodifican
+    todas con html.unescape, no solo las básicas.
+    """
+
+    def __init__(self, base_url: str = ''):
+        """
+        Args:
+            base_url: URL del documento, para resolver la canónica y los favicons
+        """
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.metadata = PageMetadata()
+        self.done = False
+        self._in_title = False
+        self._title_parts: List[str] = []
+        self._og_title: Optional[str] = None
+        self._og_description: Optional[str] = None
+
+    def _resolve(self, href: str) -> str:
+        href = href.strip()
+        return urljoin(self.base_url, href) if self.base_url else href
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag not in HEAD_TAGS:
+            self.done = True
+            return
+        if tag == 'title':
+            # Como en los navegadores, el título es texto hasta </title> (<b> no es una etiqueta)
+            self._in_title = True
+            self.set_cdata_mode('title')
+            return
+
+        attributes = dict(attrs)
+        if tag == 'meta':
+            self._handle_meta(attributes)
+        elif tag == 'link':
+            href = attributes.get('href')
+            rels = set((attributes.get('rel') or '').lower().split())
+            if href and 'canonical' in rels and self.metadata.canonical_url is None:
+                self.metadata.canonical_url = self._resolve(href)
+            if href and rels & ICON_RELS:
+                icon = self._resolve(href)
+                if icon not in self.metadata.icons:
+                    self.metadata.icons.append(icon)
+        elif tag == 'base' and attributes.get('href'):
+            self.base_url = self._resolve(attributes['href'])
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag == 'title':
+            self._in_title = False
+
+    def _handle_meta(self, attributes: dict):
+        charset = attributes.get('charset')
+        if charset is None and (attributes.get('http-equiv') or '').lower() == 'content-type':
+            match = CONTENT_TYPE_CHARSET_RE.search(attributes.get('content') or '')
+            charset = match.group(1) if match else None
+        if charset and self.metadata.charset is None:
+            self.metadata.charset = _lookup_charset(charset)
+
+        content = attributes.get('content')
+        if content is None:
+            return
+        name = (attributes.get('name') or '').lower()
+        prop = (attributes.get('property') or '').lower()
+        if name == 'description' and self.metadata.description is None:
+            self.metadata.description = content.strip()
+        elif prop == 'og:description' and self._og_description is None:
+            self._og_description = content.strip()
+        elif prop == 'og:title' and self._og_title is None:
+            self._og_title = content.strip()
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self._in_title = False
+        elif tag == 'head':
+            self.done = True
+
+    def handle_data(self, data):
+        if self._in_title and not self.done:
+            self._title_parts.append(data)
+
+    def finish(self) -> PageMetadata:
+        """Completar los metadatos con lo leído (og:title y og:description como respaldo)"""
+        metadata = self.metadata
+        title = ' '.join(html.unescape(''.join(self._title_parts)).split())
+        metadata.title = title or self._og_title or None
+        if metadata.description is None:
+            metadata.description = self._og_description
+        return metadata
+
+def extract_head_metadata(source: Union[BinaryIO, Iterable[bytes]], base_url: str = '',
+                          content_type: Optional[str] = None,
+                          max_bytes: int = HEAD_BYTE_BUDGET) -> PageMetadata:
+    """
+    Leer los metadatos de la cabecera de un documento en bytes
+
+    Lee por trozos y se detiene al terminar <head> o al llegar a `max_bytes`,
+    así que de una respuesta solo se descargan los primeros KB.
+
+    Args:
+        source: Flujo binario con read() (respuesta HTTP, archivo) o iterable de trozos
+        base_url: URL del documento
+        content_type: Cabecera Content-Type, para la codificación
+        max_bytes: Bytes máximos que se leen
+
+    Returns:
+        Los metadatos encontrados
+    """
+    if hasattr(source, 'read'):
+        chunks = iter(lambda: source.read(READ_CHUNK_SIZE), b'')
+    else:
+        chunks = iter(source)
+
+    parser = HeadMetadataParser(base_url)
+    decoder = None
+    pending = b''
+    bytes_read = 0
+    for chunk in chunks:
+        chunk = chunk[:max_bytes - bytes_read]
+        bytes_read += len(chunk)
+        if decoder is None:
+            # La codificación se decide con el primer KB (o lo que haya)
+            pending += chunk
+            if len(pending) < CHARSET_PRESCAN_BYTES and bytes_read < max_bytes:
+                continue
+            charset = detect_charset(pending, content_type)
+            decoder = codecs.getincrementaldecoder(charset)(errors='replace')
+            parser.metadata.charset = charset
+            chunk, pending = pending, b''
+        parser.feed(decoder.decode(chunk))
+        if parser.done or bytes_read >= max_bytes:
+            break
+
+    if decoder is None:
+        charset = detect_charset(pending, content_type)
+        decoder = codecs.getincrementaldecoder(charset)(errors='replace')
+        parser.metadata.charset = charset
+        parser.feed(decoder.decode(pending))
+    parser.feed(decoder.decode(b'', final=True))
+    parser.close()
+    parser.metadata.bytes_read = bytes_read
+    return parser.finish()
+
+def extract_head_metadata_from_text(html: str, base_url: str = '',
+                                    max_chars: int = HEAD_BYTE_BUDGET) -> PageMetadata:
+    """
+    Leer los metadatos de la cabecera de un documento ya decodificado
+
+    Args:
+        html: Documento HTML
+        base_url: URL del documento
+        max_chars: Caracteres máximos que se analizan
+
+    Returns:
+        Los metadatos encontrados
+    """
+    parser = HeadMetadataParser(base_url)
+    end = min(len(html), max_chars)
+    position = 0
+    while position < end and not parser.done:
+        chunk = html[position:min(position + READ_CHUNK_SIZE, end)]
+        parser.feed(chunk)
+        position += len(chunk)
+    parser.close()
+    parser.metadata.bytes_read = position
+    return parser.finish()
@@ -0,0 +1,203 @@
+"""
+Lista de sufijos públicos (Public Suffix List)
+Obtiene el sufijo público y el dominio registrable de un host sin conexión,
+con un trie compilado de antemano (tools/build_psl.py) que se carga al primer uso
+"""
+
+import ipaddress
+import json
+import os
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+# Trie compilado que se distribuye con el navegador
+TRIE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "public_suffix_trie.json")
+
+# Lista de origen del sistema, usada si falta el trie compilado
+SYSTEM_PSL_PATHS = (
+    "/usr/share/publicsuffix/public_suffix_list.dat",
+    "/usr/share/publicsuffix/effective_tld_names.dat",
+)
+
+# Cada nodo del trie es un diccionario etiqueta -> nodo, empezando por la
+# etiqueta de más a la derecha; la clave vacía (nunca es una etiqueta) guarda
+# si el nodo termina una regla normal o una excepción (!regla)
+FLAG_KEY = ""
+RULE = 1
+EXCEPTION = 2
+WILDCARD = "*"
+
+# Hosts distintos recordados por cada función
+CACHE_SIZE = 65536
+
+_trie: Optional[Dict] = None
+_trie_lock = threading.Lock()
+
+def _label_forms(label: str) -> Iterable[str]:
+    """Etiqueta tal cual y, si no es ASCII, también en punycode"""
+    yield label
+    if not label.isascii():
+        try:
+            yield label.encode('idna').decode('ascii')
+        except UnicodeError:
+            pass
+
+def compile_rules(lines: Iterable[str]) -> Dict:
+    """
+    Compilar las reglas de la lista de sufijos públicos en un trie
+
+    Incluye las secciones ICANN y privada, como los navegadores. Las reglas
+    con caracteres no ASCII se añaden también en punycode.
+
+    Args:
+        lines: Líneas del archivo public_suffix_list.dat
+
+    Returns:
+        Raíz del trie
+    """
+    root: Dict = {}
+    for line in lines:
+        # Cada regla es la primera palabra de la línea
+        rule = line.strip().split(' ', 1)[0].lower()
+        if not rule or rule.startswith('//'):
+            continue
+        flag = RULE
+        if rule.startswith('!'):
+            flag = EXCEPTION
+            rule = rule[1:]
+
+        nodes = [root]
+        for label in reversed(rule.split('.')):
+            nodes = [node.setdefault(form, {}) for node in nodes
+                     for form in _label_forms(label)]
+        for node in nodes:
+            node[FLAG_KEY] = flag
+    return root
+
+def _load_trie() -> Dict:
+    """Cargar el trie compilado, o compilarlo de la lista del sistema si falta"""
+    global _trie
+    with _trie_lock:
+        if _trie is not None:
+            return _trie
+        try:
+            with open(TRIE_PATH, encoding='utf-8') as f:
+                _trie = json.load(f)
+            return _trie
+        except (OSError, ValueError) as e:
+            print(f"Error al cargar la lista de sufijos públicos: {e}")
+
+        for path in SYSTEM_PSL_PATHS:
+            try:
+                with open(path, encoding='utf-8') as f:
+                    _trie = compile_rules(f)
+                return _trie
+            except OSError:
+                continue
+        # Sin lista solo queda la regla por defecto (*): el sufijo es la última etiqueta
+        _trie = {}
+        return _trie
+
+def _suffix_labels(labels: List[str]) -> int:
+    """
+    Contar las etiquetas del sufijo público de un host
+
+    Recorre el trie de derecha a izquierda, una etiqueta por nodo.
+
+    Args:
+        labels: Etiquetas del host en minúsculas, ninguna vacía
+
+    Returns:
+        Número de etiquetas del sufijo (al menos 1, la regla por defecto *)
+    """
+    node = _trie if _trie is not None else _load_trie()
+    count = index = len(labels)
+    suffix = 1
+    while index:
+        index -= 1
+        child = node.get(labels[index])
+        if child is None:
+            wildcard = node.get(WILDCARD)
+            if wildcard is not None and wildcard.get(FLAG_KEY) == RULE:
+                return count - index
+            return suffix
+        flag = child.get(FLAG_KEY)
+        if flag == EXCEPTION:
+            # La excepción gana a cualquier otra regla: el sufijo es su padre
+            return count - index - 1
+        if flag == RULE:
+            suffix = count - index
+        else:
+            wildcard = node.get(WILDCARD)
+            if wildcard is not None and wildcard.get(FLAG_KEY) == RULE:
+                suffix = count - index
+        node = child
+    return suffix
+
+def _host_labels(host: str) -> Optional[List[str]]:
+    """Etiquetas del host en minúsculas, o None si no es un nombre de dominio (IP o etiquetas vacías)"""
+    if ':' in host or host[:1] == '[':
+        return None
+    labels = host.lower().split('.')
+    if not labels[-1] and len(labels) > 1:
+        # Punto final (nombre absoluto)
+        labels.pop()
+    if '' in labels:
+        return None
+    if labels[-1][-1].isdigit():
+        # Un dominio nunca acaba en número: es una dirección IPv4
+        try:
+            ipaddress.IPv4Address('.'.join(labels))
+            return None
+        except ValueError:
+            pass
+    return labels
+
+def is_known_tld(label: str) -> bool:
+    """Comprobar si una etiqueta es un dominio de primer nivel de la lista (com, uk, xn--p1ai...)"""
+    node = _trie if _trie is not None else _load_trie()
+    return label.lower() in node
+
+@lru_cache(maxsize=CACHE_SIZE)
+def public_suffix(host: str) -> str:
+    """
+    Obtener el sufijo público de un host (com, co.uk, github.io...)
+
+    Args:
+        host: Nombre de host, sin puerto
+
+    Returns:
+        El sufijo en minúsculas, o cadena vacía si el host es una IP o no es válido
+    """
+    labels = _host_labels(host)
+    if labels is None:
+        return ""
+    return '.'.join(labels[-_suffix_labels(labels):])
+
+@lru_cache(maxsize=CACHE_SIZE)
+def registrable_domain(host: str) -> str:
+    """
+    Obtener el dominio registrable de un host (eTLD+1)
+
+    Es la parte del host que identifica al sitio: el sufijo público más una
+    etiqueta (www.bbc.co.uk -> bbc.co.uk). Los hosts de una sola etiqueta
+    (localhost, nombres de la intranet) y las IPs se devuelven tal cual.
+
+    Args:
+        host: Nombre de host, sin puerto
+
+    Returns:
+        El dominio registrable en minúsculas, o cadena vacía si el host es
+        él mismo un sufijo público o no es válido
+    """
+    labels = _host_labels(host)
+    if labels is None:
+        host = host.lower().rstrip('.')
+        return host if host and '..' not in host and host[0] != '.' else ""
+    if len(labels) == 1:
+        return labels[0]
+    suffix = _suffix_labels(labels)
+    if suffix >= len(labels):
+        return ""
+    return '.'.join(labels[-suffix - 1:])
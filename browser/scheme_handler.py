@@ -0,0 +1,94 @@
+"""
+Manejador del esquema pybrowser:// para QtWebEngine
+Resuelve las peticiones en un hilo del pool y responde desde el hilo de la interfaz
+"""
+
+from PyQt5.QtCore import QBuffer, QByteArray, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtWebEngineCore import (QWebEngineUrlRequestJob, QWebEngineUrlScheme,
+                                   QWebEngineUrlSchemeHandler)
+
+from .internal_pages import INTERNAL_SCHEME, InternalPageRouter, STATUS_OK, STATUS_NOT_FOUND
+
+def register_internal_scheme():
+    """
+    Registrar el esquema pybrowser://
+
+    Debe llamarse antes de crear la QApplication.
+    """
+    scheme = QWebEngineUrlScheme(INTERNAL_SCHEME.encode())
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+    flags = QWebEngineUrlScheme.SecureScheme | QWebEngineUrlScheme.LocalScheme
+    # XMLHttpRequest solo funciona en esquemas con CORS (Qt 5.14+)
+    if hasattr(QWebEngineUrlScheme, "CorsEnabled"):
+        flags |= QWebEngineUrlScheme.CorsEnabled
+    scheme.setFlags(flags)
+    QWebEngineUrlScheme.registerScheme(scheme)
+
+class _ResponseSignals(QObject):
+    """Señales emitidas desde el hilo que resuelve la petición"""
+
+    finished = pyqtSignal(int, int, str, bytes)    # petición, estado, tipo, cuerpo
+
+class _RouteTask(QRunnable):
+    """Resolución de una URL interna en el pool de hilos"""
+
+    def __init__(self, router: InternalPageRouter, request_id: int, url: str,
+                 signals: _ResponseSignals):
+        super().__init__()
+        self.router = router
+        self.request_id = request_id
+        self.url = url
+        self.signals = signals
+
+    def run(self):
+        status, content_type, body = self.router.handle(self.url)
+        self.signals.finished.emit(self.request_id, status, content_type, body)
+
+class InternalSchemeHandler(QWebEngineUrlSchemeHandler):
+    """Sirve las páginas pybrowser:// sin bloquear la interfaz"""
+
+    def __init__(self, db_manager, parent=None):
+        """
+        Args:
+            db_manager: Instancia de DatabaseManager
+        """
+        super().__init__(parent)
+        self.router = InternalPageRouter(db_manager)
+        self._jobs = {}
+        self._next_request_id = 0
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(2)
+        self._signals = _ResponseSignals()
+        self._signals.finished.connect(self._reply)
+
+    def requestStarted(self, job: QWebEngineUrlRequestJob):
+        # Solo las propias páginas internas (o la barra de direcciones) pueden pedirlas
+        if hasattr(job, "initiator"):
+            initiator = job.initiator()
+            if not initiator.isEmpty() and initiator.scheme() != INTERNAL_SCHEME:
+                job.fail(QWebEngineUrlRequestJob.RequestDenied)
+                return
+
+        request_id = self._next_request_id
+        self._next_request_id += 1
+        self._jobs[request_id] = job
+        # La petición puede cancelarse (pestaña cerrada) antes de responder
+        job.destroyed.connect(lambda: self._jobs.pop(request_id, None))
+        self._pool.start(_RouteTask(self.router, request_id, job.requestUrl().toString(),
+                                    self._signals))
+
+    def _reply(self, request_id: int, status: int, content_type: str, body: bytes):
+        job = self._jobs.pop(request_id, None)
+        if job is None:
+            return
+        if status == STATUS_NOT_FOUND:
+            job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+            return
+        if status != STATUS_OK:
+            job.fail(QWebEngineUrlRequestJob.RequestFailed)
+            return
+
+        buffer = QBuffer(job)
+        buffer.setData(QByteArray(body))
+        job.reply(content_type.encode(), buffer)
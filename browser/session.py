@@ -0,0 +1,280 @@
+"""
+Sesión del navegador
+Guarda las pestañas abiertas de forma incremental y las reabre sin cargarlas
+hasta que se seleccionan
+"""
+
+import base64
+import json
+from typing import Dict, List, Optional, Set, Tuple
+
+from PyQt5.QtCore import QBuffer, QByteArray, QIODevice, QObject, QRunnable, QThreadPool, QTimer
+from PyQt5.QtGui import QIcon, QPixmap
+from PyQt5.QtWidgets import QWidget
+
+# Tamaño del favicon guardado en la sesión
+SESSION_ICON_SIZE = 16
+
+def parse_session(data: Optional[str]) -> List[Dict]:
+    """
+    Leer la lista de pestañas del ajuste open_tabs (sesiones anteriores a session_tabs)
+
+    Acepta una lista de URLs o una lista de objetos con url, title, active e
+    icon. Si ninguna pestaña está marcada como activa, la activa es la primera.
+
+    Args:
+        data: JSON guardado, o None si no hay sesión
+
+    Returns:
+        Lista de pestañas con las claves url, title, active e icon
+    """
+    if not data:
+        return []
+    try:
+        items = json.loads(data)
+    except ValueError:
+        return []
+    if not isinstance(items, list):
+        return []
+
+    tabs = []
+    for item in items:
+        if isinstance(item, str):
+            item = {'url': item}
+        if not isinstance(item, dict) or not item.get('url'):
+            continue
+        tabs.append({
+            'url': item['url'],
+            'title': item.get('title') or '',
+            'active': bool(item.get('active')),
+            'icon': item.get('icon'),
+        })
+
+    if tabs and not any(tab['active'] for tab in tabs):
+        tabs[0]['active'] = True
+    return tabs
+
+def icon_to_base64(icon: QIcon) -> Optional[str]:
+    """Codificar un favicon como PNG en base64, o None si está vacío"""
+    if icon.isNull():
+        return None
+    buffer = QBuffer()
+    buffer.open(QIODevice.WriteOnly)
+    icon.pixmap(SESSION_ICON_SIZE, SESSION_ICON_SIZE).save(buffer, "PNG")
+    return base64.b64encode(bytes(buffer.data())).decode()
+
+def icon_from_base64(data: Optional[str]) -> QIcon:
+    """Decodificar un favicon guardado con icon_to_base64"""
+    if not data:
+        return QIcon()
+    pixmap = QPixmap()
+    try:
+        pixmap.loadFromData(QByteArray(base64.b64decode(data)), "PNG")
+    except ValueError:
+        return QIcon()
+    return QIcon(pixmap)
+
+class TabPlaceholder(QWidget):
+    """
+    Pestaña restaurada que aún no se ha cargado
+
+    Solo guarda la URL, el título y el favicon; no crea vista web ni renderer.
+    La ventana la sustituye por una WebTab la primera vez que se selecciona.
+    """
+
+    def __init__(self, url: str, title: str = '', icon_data: Optional[str] = None,
+                 history_data: Optional[bytes] = None, session_id: Optional[int] = None,
+                 parent=None):
+        """
+        Args:
+            url: URL de la pestaña
+            title: Título guardado
+            icon_data: Favicon en PNG base64 (ver icon_to_base64)
+            history_data: Historial de navegación serializado (ver WebTab.serialize_history)
+            session_id: ID de la pestaña en la tabla session_tabs
+        """
+        super().__init__(parent)
+        self.url = url
+        self.title = title
+        self.icon_data = icon_data
+        self.history_data = history_data
+        self.session_id = session_id
+
+    def session_url(self) -> str:
+        """URL de la pestaña"""
+        return self.url
+
+    def is_discarded(self) -> bool:
+        """Una pestaña sin cargar cuenta como descartada"""
+        return True
+
+class _SessionWriteTask(QRunnable):
+    """Escritura de un lote de cambios de la sesión fuera del hilo de la interfaz"""
+
+    def __init__(self, db_manager, tabs: List[Tuple], layout: List[Tuple], closed_ids: List[int]):
+        super().__init__()
+        self.db_manager = db_manager
+        self.tabs = tabs
+        self.layout = layout
+        self.closed_ids = closed_ids
+
+    def run(self):
+        self.db_manager.save_session_tabs(self.tabs, self.layout, self.closed_ids)
+
+class SessionStore(QObject):
+    """
+    Guarda las pestañas de una ventana en la tabla session_tabs
+
+    Las pestañas avisan con `mark_dirty` cuando cambian su URL, título,
+    favicon o historial, y la ventana avisa con `mark_layout_changed` cuando
+    se mueven, cierran o cambia la actual. Los avisos se agrupan durante
+    `debounce_ms` y solo se escriben las filas que cambiaron, en un único
+    hilo de escritura; si no hay avisos, `snapshot` no hace nada.
+    """
+
+    def __init__(self, db_manager, tab_widget, debounce_ms: int = 1000,
+                 enabled: bool = True, parent=None):
+        """
+        Args:
+            db_manager: Instancia de DatabaseManager
+            tab_widget: QTabWidget con las pestañas de la ventana
+            debounce_ms: Espera para agrupar cambios antes de escribir
+            enabled: Si es False no se guarda nada (ventanas secundarias)
+        """
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.tab_widget = tab_widget
+        self.enabled = enabled
+
+        # Última fila escrita de cada pestaña: (position, is_active, url, title, icon, history)
+        self._written: Dict[int, Tuple] = {}
+        self._dirty: Set[QObject] = set()
+        self._layout_changed = False
+        self._next_id = 1
+
+        # Métricas
+        self.snapshots = 0
+        self.rows_written = 0
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce_ms)
+        self._timer.timeout.connect(self.snapshot)
+
+        # Un solo hilo mantiene el orden de las escrituras
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+
+        if enabled:
+            tab_widget.currentChanged.connect(self.mark_layout_changed)
+            tab_widget.tabBar().tabMoved.connect(self.mark_layout_changed)
+
+    def load(self) -> List[Dict]:
+        """
+        Leer la sesión guardada
+
+        Returns:
+            Pestañas en orden con las claves id, url, title, active, icon e history
+        """
+        tabs = []
+        for row in self.db_manager.get_session_tabs():
+            self._written[row['id']] = None
+            self._next_id = max(self._next_id, row['id'] + 1)
+            if row['url']:
+                tabs.append({
+                    'id': row['id'],
+                    'url': row['url'],
+                    'title': row['title'] or '',
+                    'active': bool(row['is_active']),
+                    'icon': row['icon'],
+                    'history': row['history'],
+                })
+        if tabs and not any(tab['active'] for tab in tabs):
+            tabs[0]['active'] = True
+        return tabs
+
+    def remember(self, tab, position: int, is_active: bool):
+        """Dar por escrita una pestaña restaurada tal como se leyó"""
+        self._written[tab.session_id] = (position, is_active, tab.url, tab.title,
+                                         tab.icon_data, tab.history_data)
+
+    def assign_id(self, tab) -> int:
+        """Asignar un ID de sesión a una pestaña que aún no lo tiene"""
+        if tab.session_id is None:
+            tab.session_id = self._next_id
+            self._next_id += 1
+        return tab.session_id
+
+    def mark_dirty(self, *args):
+        """Marcar como modificado el contenido de la pestaña que emitió la señal"""
+        self.mark_tab_dirty(self.sender())
+
+    def mark_tab_dirty(self, tab):
+        """Marcar como modificado el contenido de una pestaña"""
+        if not self.enabled:
+            return
+        self._dirty.add(tab)
+        self._schedule()
+
+    def mark_layout_changed(self, *args):
+        """Marcar que cambió el orden, la pestaña actual o se cerró alguna"""
+        if not self.enabled:
+            return
+        self._layout_changed = True
+        self._schedule()
+
+    def _schedule(self):
+        # No se reinicia: los cambios continuos se escriben como mucho una vez por intervalo
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def snapshot(self):
+        """Escribir en segundo plano los cambios pendientes de la sesión"""
+        self._timer.stop()
+        if not self.enabled or (not self._dirty and not self._layout_changed):
+            return
+
+        current = self.tab_widget.currentWidget()
+        tabs, layout, open_ids = [], [], set()
+        for position in range(self.tab_widget.count()):
+            tab = self.tab_widget.widget(position)
+            tab_id = self.assign_id(tab)
+            open_ids.add(tab_id)
+            is_active = tab is current
+            written = self._written.get(tab_id)
+
+            if written is None or tab in self._dirty:
+                row = (position, is_active) + self._tab_content(tab, position)
+                if row != written:
+                    tabs.append((tab_id,) + row)
+                    self._written[tab_id] = row
+            elif written[:2] != (position, is_active):
+                layout.append((position, is_active, tab_id))
+                self._written[tab_id] = (position, is_active) + written[2:]
+
+        closed_ids = [tab_id for tab_id in self._written if tab_id not in open_ids]
+        for tab_id in closed_ids:
+            del self._written[tab_id]
+        self._dirty.clear()
+        self._layout_changed = False
+
+        if tabs or layout or closed_ids:
+            self.snapshots += 1
+            self.rows_written += len(tabs) + len(layout) + len(closed_ids)
+            self._pool.start(_SessionWriteTask(self.db_manager, tabs, layout, closed_ids))
+
+    def _tab_content(self, tab, position: int) -> Tuple:
+        """Obtener (url, title, icon, history) de una pestaña"""
+        if isinstance(tab, TabPlaceholder):
+            return (tab.url, tab.title, tab.icon_data, tab.history_data)
+        if tab.saved_state is not None:
+            history = tab.saved_state['history']
+        else:
+            history = tab.serialize_history()
+        return (tab.session_url(), tab.current_title or '',
+                icon_to_base64(self.tab_widget.tabIcon(position)), history)
+
+    def flush(self):
+        """Escribir los cambios pendientes y esperar a que terminen (al cerrar)"""
+        self.snapshot()
+        self._pool.waitForDone()
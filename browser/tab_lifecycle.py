@@ -0,0 +1,154 @@
+"""
+Ciclo de vida de las pestañas en segundo plano
+Congela y descarta las pestañas inactivas para liberar memoria y las restaura al activarlas
+"""
+
+import os
+from typing import Dict, Optional
+
+from PyQt5.QtCore import QObject, QTimer
+
+from .tab_pool import available_memory_mb
+
+# Intervalo de revisión mientras falta memoria
+PRESSURE_CHECK_INTERVAL_MS = 2000
+
+def process_rss_kb(pid: int) -> Optional[int]:
+    """
+    Leer la memoria residente de un proceso
+
+    Returns:
+        KB residentes según /proc/<pid>/status, o None si no se puede saber
+    """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+class TabLifecycleManager(QObject):
+    """
+    Congela y descarta las pestañas que llevan tiempo sin usarse
+
+    Una pestaña en segundo plano se congela tras `freeze_after_s` segundos y se
+    descarta tras `discard_after_s`. Si la memoria disponible baja de
+    `min_available_mb`, se descarta la pestaña usada hace más tiempo en cada
+    revisión hasta que se recupere. La pestaña actual nunca se toca y las
+    descartadas se restauran al activarlas (ver `activate`).
+    """
+
+    def __init__(self, tab_widget, freeze_after_s: int = 300, discard_after_s: int = 1800,
+                 min_available_mb: int = 512, check_interval_ms: int = 30000, parent=None):
+        """
+        Args:
+            tab_widget: QTabWidget con las pestañas (WebTab) de la ventana
+            freeze_after_s: Inactividad antes de congelar (0 desactiva)
+            discard_after_s: Inactividad antes de descartar (0 desactiva)
+            min_available_mb: Memoria libre por debajo de la cual se descarta antes
+            check_interval_ms: Intervalo entre revisiones
+        """
+        super().__init__(parent)
+        self.tab_widget = tab_widget
+        self.freeze_after_s = freeze_after_s
+        self.discard_after_s = discard_after_s
+        self.min_available_mb = min_available_mb
+        self.check_interval_ms = check_interval_ms
+
+        # Métricas
+        self.frozen = 0
+        self.discarded = 0
+        self.restored = 0
+        self.reclaimed_kb = 0
+
+        # Renderers de pestañas descartadas que aún no han terminado: PID -> KB
+        self._pending_reclaim: Dict[int, int] = {}
+
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.check)
+
+    def start(self):
+        """Empezar a revisar las pestañas periódicamente"""
+        self._timer.start(self.check_interval_ms)
+
+    def stop(self):
+        """Dejar de revisar las pestañas"""
+        self._timer.stop()
+
+    def activate(self, tab):
+        """
+        Marcar una pestaña como activa y restaurarla si estaba descartada
+
+        Args:
+            tab: WebTab que pasa a ser la actual
+        """
+        tab.mark_active()
+        if tab.restore():
+            self.restored += 1
+
+    def metrics(self) -> Dict[str, int]:
+        """Obtener las métricas de pestañas congeladas, descartadas y memoria recuperada"""
+        self._collect_reclaimed()
+        return {
+            'frozen': self.frozen,
+            'discarded': self.discarded,
+            'restored': self.restored,
+            'reclaimed_kb': self.reclaimed_kb,
+        }
+
+    def check(self):
+        """Congelar o descartar las pestañas en segundo plano según su inactividad"""
+        self._collect_reclaimed()
+
+        current = self.tab_widget.currentWidget()
+        if current is not None:
+            # La inactividad de una pestaña cuenta desde que deja de ser la actual
+            current.mark_active()
+        candidates = []
+        for i in range(self.tab_widget.count()):
+            tab = self.tab_widget.widget(i)
+            if tab is not current and not tab.is_discarded() and tab.can_sleep():
+                candidates.append(tab)
+        # Las usadas hace más tiempo primero
+        candidates.sort(key=lambda tab: tab.last_active)
+
+        under_pressure = self._under_memory_pressure()
+        if under_pressure and candidates:
+            # La memoria de un renderer se libera cuando su proceso termina, así
+            # que se descarta una pestaña por revisión y se revisa antes
+            self._discard(candidates.pop(0))
+        self._timer.setInterval(PRESSURE_CHECK_INTERVAL_MS if under_pressure
+                                else self.check_interval_ms)
+
+        for tab in candidates:
+            idle = tab.idle_seconds()
+            if self.discard_after_s and idle >= self.discard_after_s:
+                self._discard(tab)
+            elif self.freeze_after_s and idle >= self.freeze_after_s and not tab.is_frozen():
+                if tab.freeze():
+                    self.frozen += 1
+
+    def _under_memory_pressure(self) -> bool:
+        available = available_memory_mb()
+        return available is not None and available < self.min_available_mb
+
+    def _discard(self, tab):
+        # renderProcessPid solo existe a partir de Qt 5.15
+        page = tab.page()
+        pid = page.renderProcessPid() if hasattr(page, "renderProcessPid") else 0
+        rss_kb = process_rss_kb(pid) if pid > 0 else None
+
+        if not tab.discard():
+            return
+        self.discarded += 1
+        if rss_kb:
+            self._pending_reclaim[pid] = rss_kb
+
+    def _collect_reclaimed(self):
+        # Un renderer puede servir a varias pestañas del mismo sitio: su memoria
+        # solo cuenta como recuperada cuando el proceso termina
+        for pid in list(self._pending_reclaim):
+            if not os.path.exists(f"/proc/{pid}"):
+                self.reclaimed_kb += self._pending_reclaim.pop(pid)
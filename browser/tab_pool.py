@@ -0,0 +1,111 @@
+"""
+Reserva de pestañas precargadas
+Mantiene WebTabs ya inicializadas para que abrir una pestaña nueva sea inmediato
+"""
+
+from typing import Callable, List, Optional
+
+from PyQt5.QtCore import QObject, QTimer
+
+# Espera máxima entre reintentos mientras hay poca memoria
+MAX_BACKOFF_MS = 60000
+
+def available_memory_mb() -> Optional[int]:
+    """
+    Leer la memoria disponible del sistema
+
+    Returns:
+        MB disponibles según /proc/meminfo, o None si no se puede saber
+    """
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+class SpareTabPool(QObject):
+    """
+    Reserva de pestañas creadas de antemano
+
+    Las pestañas se crean con `factory` (perfil y señales ya conectados) y se
+    reponen con temporizadores de baja prioridad, una por vuelta del bucle de
+    eventos. Si la memoria disponible baja del umbral, la reserva se vacía y
+    los reintentos se espacian.
+    """
+
+    def __init__(self, factory: Callable[[], QObject], size: int = 1,
+                 min_available_mb: int = 512, refill_delay_ms: int = 1000, parent=None):
+        """
+        Args:
+            factory: Función que crea una pestaña lista para usar
+            size: Número de pestañas en reserva (0 desactiva la reserva)
+            min_available_mb: Memoria libre mínima para mantener pestañas en reserva
+            refill_delay_ms: Espera antes de reponer tras entregar una pestaña
+        """
+        super().__init__(parent)
+        self.factory = factory
+        self.size = max(size, 0)
+        self.min_available_mb = min_available_mb
+        self.refill_delay_ms = refill_delay_ms
+        self._spares: List[QObject] = []
+        self._backoff_ms = refill_delay_ms
+
+        # Métricas
+        self.hits = 0
+        self.misses = 0
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._refill_one)
+
+    def take(self) -> Optional[QObject]:
+        """
+        Entregar una pestaña de la reserva
+
+        Returns:
+            La pestaña, o None si la reserva está vacía
+        """
+        self._schedule_refill(self.refill_delay_ms)
+        if not self._spares:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._spares.pop(0)
+
+    def start(self):
+        """Empezar a llenar la reserva"""
+        self._schedule_refill(self.refill_delay_ms)
+
+    def clear(self):
+        """Vaciar la reserva y liberar sus pestañas"""
+        self._timer.stop()
+        while self._spares:
+            self._spares.pop().deleteLater()
+
+    def _under_memory_pressure(self) -> bool:
+        available = available_memory_mb()
+        return available is not None and available < self.min_available_mb
+
+    def _schedule_refill(self, delay_ms: int):
+        if self.size and not self._timer.isActive():
+            self._timer.start(delay_ms)
+
+    def _refill_one(self):
+        if len(self._spares) >= self.size:
+            return
+
+        if self._under_memory_pressure():
+            # Liberar la reserva y volver a intentarlo más tarde
+            self.clear()
+            self._backoff_ms = min(self._backoff_ms * 2, MAX_BACKOFF_MS)
+            self._schedule_refill(self._backoff_ms)
+            return
+
+        self._backoff_ms = self.refill_delay_ms
+        self._spares.append(self.factory())
+        if len(self._spares) < self.size:
+            # Un temporizador de 0 ms se ejecuta cuando no quedan eventos pendientes
+            self._schedule_refill(0)
@@ -6,62 +6,182 @@ import os
 import re
 import json
 import hashlib
-from urllib.parse import urlparse, urljoin, quote
+from functools import lru_cache
+from urllib.parse import urlsplit, urlunsplit, quote, unquote
 from typing import Optional, Dict, List, Tuple
 from datetime import datetime, timedelta
 
+from .history_index import HistorySearchIndex
+from .html_sanitizer import sanitize_html
+from .link_extractor import LinkExtractor
+from .omnibox import classify_input
+from .page_metadata import extract_head_metadata_from_text
+from .public_suffix import registrable_domain
+
+# Parámetros de seguimiento que no identifican el recurso
+TRACKING_PARAMS = frozenset([
+    'fbclid', 'gclid', 'dclid', 'gbraid', 'wbraid', 'msclkid', 'yclid',
+    'mc_cid', 'mc_eid', 'igshid', '_ga', '_gl', '_hsenc', '_hsmi',
+    'mkt_tok', 'oly_anon_id', 'oly_enc_id', 'vero_id', 'twclid', 'ttclid',
+])
+TRACKING_PARAM_PREFIXES = ('utm_',)
+
+# Puertos por defecto de cada esquema
+DEFAULT_PORTS = {'http': 80, 'https': 443, 'ftp': 21}
+
+# URLs que ya están en forma canónica (host en minúsculas, sin puerto, query ni fragmento)
+CANONICAL_URL_FAST_PATH = re.compile(r'https?://[a-z0-9-]+(?:\.[a-z0-9-]+)*/[^?#\s]*')
+
+# URLs distintas cuyo análisis se recuerda (ver URLUtils.parse)
+PARSED_URL_CACHE_SIZE = 8192
+
+class ParsedURL:
+    """
+    URL ya analizada
+    
+    Se obtiene con URLUtils.parse, que guarda las últimas en caché: no se debe
+    modificar.
+    """
+    
+    def __init__(self, url: str):
+        """
+        Args:
+            url: URL a analizar
+        """
+        self.url = url
+        try:
+            parts = urlsplit(url)
+            host = parts.hostname or ''
+        except ValueError:
+            parts = None
+            host = ''
+        try:
+            self.port = parts.port if parts is not None else None
+        except ValueError:
+            self.port = None
+        
+        self.scheme = parts.scheme.lower() if parts is not None else ''
+        self.netloc = parts.netloc if parts is not None else ''
+        self.host = host.rstrip('.')
+        # Dominio registrable (sitio): ver URLUtils.get_domain
+        self.domain = URLUtils.get_site(self.host) if self.host else ''
+        self.is_secure = self.scheme == 'https'
+        self.is_valid = bool(self.scheme and self.netloc)
+    
+    @property
+    def base_url(self) -> str:
+        """Protocolo y dominio, con puerto y credenciales si los tiene"""
+        if not self.scheme and not self.netloc:
+            return ""
+        return f"{self.scheme}://{self.netloc}"
+
 class URLUtils:
     """Utilidades para manejo de URLs"""
     
     @staticmethod
-    def is_valid_url(url: str) -> bool:
-        """Verificar si una URL es válida"""
-        try:
-            result = urlparse(url)
-            return all([result.scheme, result.netloc])
-        except:
-            return False
+    @lru_cache(maxsize=PARSED_URL_CACHE_SIZE)
+    def parse(url: str) -> ParsedURL:
+        """
+        Analizar una URL una sola vez
+        
+        Los helpers de URLUtils, las pestañas y la ventana piden las mismas
+        URLs una y otra vez: el resultado se comparte entre todos ellos.
+        """
+        return ParsedURL(url)
     
     @staticmethod
-    def normalize_url(url: str) -> str:
-        """Normalizar una URL"""
+    @lru_cache(maxsize=8192)
+    def canonicalize_url(url: str) -> str:
+        """
+        Obtener la forma canónica de una URL para deduplicar el historial
+        
+        Elimina el fragmento y los parámetros de seguimiento, pasa el host a
+        minúsculas, quita el puerto por defecto y ordena los parámetros.
+        Las URLs que no son http(s) se devuelven sin cambios.
+        """
+        if CANONICAL_URL_FAST_PATH.fullmatch(url):
+            return url
+        
         url = url.strip()
+        try:
+            parts = urlsplit(url)
+            port = parts.port
+        except ValueError:
+            return url
         
-        # Si no tiene esquema, agregar https
-        if not url.startswith(('http://', 'https://', 'ftp://')):
-            # Verificar si parece un dominio
-            if '.' in url and not url.startswith('www.'):
-                url = 'https://' + url
-            elif url.startswith('www.'):
-                url = 'https://' + url
-            else:
-                # Buscar en DuckDuckGo
-                return f"https://duckduckgo.com/?q={quote(url)}"
+        scheme = parts.scheme.lower()
+        if scheme not in ('http', 'https') or not parts.hostname:
+            return url
+        
+        host = parts.hostname.rstrip('.')
+        if ':' in host:
+            host = f"[{host}]"
+        if port is not None and port != DEFAULT_PORTS.get(scheme):
+            host = f"{host}:{port}"
+        if parts.username is not None:
+            userinfo = parts.username
+            if parts.password is not None:
+                userinfo += ':' + parts.password
+            host = f"{userinfo}@{host}"
         
-        return url
+        # Filtrar y ordenar parámetros sin recodificar sus valores
+        params = []
+        for param in parts.query.split('&'):
+            if not param:
+                continue
+            key = unquote(param.split('=', 1)[0]).lower()
+            if key in TRACKING_PARAMS or key.startswith(TRACKING_PARAM_PREFIXES):
+                continue
+            params.append(param)
+        params.sort(key=lambda param: param.split('=', 1)[0])
+        
+        return urlunsplit((scheme, host, parts.path or '/', '&'.join(params), ''))
+    
+    @staticmethod
+    def is_valid_url(url: str) -> bool:
+        """Verificar si una URL es válida (tiene protocolo y dominio)"""
+        return URLUtils.parse(url).is_valid
+    
+    @staticmethod
+    def looks_like_url(text: str) -> bool:
+        """Verificar si el texto de la barra de direcciones es una dirección y no una búsqueda"""
+        return not classify_input(text).is_search
+    
+    @staticmethod
+    def normalize_url(url: str) -> str:
+        """Convertir el texto de la barra de direcciones en la URL a cargar (ver classify_input)"""
+        return classify_input(url).url
     
     @staticmethod
     def get_domain(url: str) -> str:
-        """Obtener el dominio de una URL"""
-        try:
-            parsed = urlparse(url)
-            return parsed.netloc.lower()
-        except:
-            return ""
+        """
+        Obtener el dominio registrable (sitio) de una URL
+        
+        Sin puerto, credenciales ni subdominios: https://user@www.bbc.co.uk:8080/
+        pertenece a bbc.co.uk. Es la clave con la que se agrupan el historial,
+        las cookies y las listas de bloqueo.
+        """
+        return URLUtils.parse(url).domain
+    
+    @staticmethod
+    def get_site(host: str) -> str:
+        """Obtener el dominio registrable de un host, o el propio host si es un sufijo público"""
+        return registrable_domain(host) or host.lower()
+    
+    @staticmethod
+    def get_hostname(url: str) -> str:
+        """Obtener el nombre de host de una URL, sin puerto ni credenciales"""
+        return URLUtils.parse(url).host
     
     @staticmethod
     def get_base_url(url: str) -> str:
         """Obtener la URL base (protocolo + dominio)"""
-        try:
-            parsed = urlparse(url)
-            return f"{parsed.scheme}://{parsed.netloc}"
-        except:
-            return ""
+        return URLUtils.parse(url).base_url
     
     @staticmethod
     def is_secure(url: str) -> bool:
         """Verificar si la URL usa HTTPS"""
-        return url.startswith('https://')
+        return URLUtils.parse(url).is_secure
     
     @staticmethod
     def create_search_url(query: str, engine: str = "duckduckgo") -> str:
@@ -134,32 +254,51 @@ class DataUtils:
 class SecurityUtils:
     """Utilidades para seguridad"""
     
+    # Lista de bloqueo de dominios (DomainBlocklist) que instala la aplicación
+    blocklist = None
+    
+    # Dominios bloqueados si no hay ninguna lista cargada
+    FALLBACK_MALICIOUS_DOMAINS = frozenset(['malware.com', 'phishing.com'])
+    
+    @staticmethod
+    def set_blocklist(blocklist):
+        """Usar una lista de bloqueo de dominios en is_safe_url"""
+        SecurityUtils.blocklist = blocklist
+    
     @staticmethod
     def is_safe_url(url: str) -> bool:
-        """Verificar si una URL es segura"""
-        # Lista de dominios conocidos como maliciosos (esto debería ser más completo)
-        malicious_domains = [
-            'malware.com',
-            'phishing.com',
-            # Agregar más dominios maliciosos conocidos
-        ]
+        """Verificar si una URL es segura (su host ni sus dominios padre están bloqueados)"""
+        host = URLUtils.get_hostname(url)
+        blocklist = SecurityUtils.blocklist
+        if blocklist is not None:
+            # Comprobar cambios antes de mirar count: una lista vacía también se recarga
+            blocklist.maybe_reload()
+            if blocklist.count:
+                return not blocklist.is_blocked(host)
         
-        domain = URLUtils.get_domain(url)
-        return domain.lower() not in malicious_domains
+        while host:
+            if host in SecurityUtils.FALLBACK_MALICIOUS_DOMAINS:
+                return False
+            host = host.partition('.')[2]
+        return True
     
     @staticmethod
     def sanitize_html(html: str) -> str:
-        """Sanitizar HTML básico"""
-        # Eliminar scripts y elementos potencialmente peligrosos
-        dangerous_tags = ['script', 'object', 'embed', 'iframe']
-        for tag in dangerous_tags:
-            html = re.sub(f'<{tag}[^>]*>.*?</{tag}>', '', html, flags=re.IGNORECASE | re.DOTALL)
+        """
+        Sanitizar HTML con la lista de etiquetas y atributos permitidos
         
-        return html
+        Para documentos que llegan por trozos, usar html_sanitizer.HTMLSanitizer.
+        """
+        return sanitize_html(html)
 
 class CookieUtils:
     """Utilidades para manejo de cookies"""
     
+    @staticmethod
+    def get_cookie_site(domain: str) -> str:
+        """Obtener el dominio registrable del dominio de una cookie (.www.example.com -> example.com)"""
+        return URLUtils.get_site(domain.lstrip('.'))
+    
     @staticmethod
     def parse_cookie_string(cookie_string: str) -> Dict[str, str]:
         """Parsear string de cookie"""
@@ -195,18 +334,13 @@ class HistoryUtils:
     
     @staticmethod
     def extract_page_title(html: str) -> Optional[str]:
-        """Extraer título de una página HTML"""
-        title_match = re.search(r'<title[^>]*>(.*?)</title>', html, re.IGNORECASE | re.DOTALL)
-        if title_match:
-            title = title_match.group(1).strip()
-            # Decodificar entidades HTML básicas
-            title = title.replace('&amp;', '&')
-            title = title.replace('&lt;', '<')
-            title = title.replace('&gt;', '>')
-            title = title.replace('&quot;', '"')
-            title = title.replace('&#39;', "'")
-            return title
-        return None
+        """
+        Extraer título de una página HTML
+        
+        Solo analiza la cabecera (ver page_metadata.extract_head_metadata, que
+        también obtiene la descripción, la URL canónica y los favicons).
+        """
+        return extract_head_metadata_from_text(html).title
     
     @staticmethod
     def group_history_by_date(history_entries: List[Dict]) -> Dict[str, List[Dict]]:
@@ -234,22 +368,22 @@ class HistoryUtils:
         return grouped
     
     @staticmethod
-    def search_history_entries(entries: List[Dict], query: str) -> List[Dict]:
-        """Buscar en entradas de historial"""
-        if not query:
+    def search_history_entries(entries: List[Dict], query: str,
+                               limit: Optional[int] = None) -> List[Dict]:
+        """
+        Buscar en entradas de historial
+
+        Todos los términos de la consulta deben aparecer en la URL o en el
+        título (o, con menos puntuación, como subsecuencia). Para varias
+        búsquedas sobre las mismas entradas, construir un HistorySearchIndex
+        una vez y reutilizarlo.
+
+        Returns:
+            Las entradas que coinciden, de más a menos relevante
+        """
+        if not query or not query.strip():
             return entries
-        
-        query = query.lower()
-        results = []
-        
-        for entry in entries:
-            url = entry.get('url', '').lower()
-            title = entry.get('title', '').lower()
-            
-            if query in url or query in title:
-                results.append(entry)
-        
-        return results
+        return HistorySearchIndex(entries).search(query, limit)
 
 class FileUtils:
     """Utilidades para manejo de archivos"""
@@ -356,24 +490,17 @@ class NetworkUtils:
     
     @staticmethod
     def extract_links_from_html(html: str, base_url: str = '') -> List[str]:
-        """Extraer links de HTML"""
-        links = []
-        
-        # Buscar tags <a> con href
-        link_pattern = r'<a[^>]+href=["\']([^"\']+)["\'][^>]*>'
-        matches = re.findall(link_pattern, html, re.IGNORECASE)
-        
-        for match in matches:
-            if base_url and not match.startswith(('http://', 'https://')):
-                # Convertir a URL absoluta
-                link = urljoin(base_url, match)
-            else:
-                link = match
-            
-            if link not in links:
-                links.append(link)
+        """
+        Extraer los enlaces de un documento HTML, absolutos y sin repetir
         
-        return links
+        Respeta <base href> e incluye <area> y los <link> de navegación
+        (canonical, alternate...). Para documentos que llegan por trozos o
+        para incluir recursos (img, srcset...), usar link_extractor.LinkExtractor.
+        """
+        extractor = LinkExtractor(base_url)
+        extractor.feed(html)
+        extractor.close()
+        return extractor.links
 
 # Funciones de conveniencia
 def format_url(url: str) -> str:
@@ -385,7 +512,7 @@ def is_secure_connection(url: str) -> bool:
     return URLUtils.is_secure(url)
 
 def extract_domain(url: str) -> str:
-    """Extraer dominio de URL"""
+    """Extraer el dominio registrable de una URL"""
     return URLUtils.get_domain(url)
 
 def format_timestamp(timestamp: str) -> str:
@@ -0,0 +1,269 @@
+"""
+Filtro de Bloom persistente de URLs visitadas
+Responde "¿he visitado esta URL?" sin consultar SQLite cuando la respuesta es negativa
+"""
+
+import hashlib
+import math
+import mmap
+import os
+import sqlite3
+import struct
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .utils import URLUtils
+
+# Cabecera del archivo: magia, versión, número de bits, número de funciones hash
+# La versión 2 indexa URLs canónicas; los filtros anteriores se descartan
+HEADER = struct.Struct("<4sIQI")
+MAGIC = b"PYBF"
+VERSION = 2
+
+class BloomFilter:
+    """Filtro de Bloom respaldado por un archivo mapeado en memoria"""
+
+    def __init__(self, path: str, num_bits: int, num_hashes: int):
+        """
+        Abrir el filtro en `path`, creándolo vacío si no existe o no coincide
+
+        Args:
+            path: Ruta del archivo del filtro
+            num_bits: Tamaño del array de bits
+            num_hashes: Número de funciones hash
+        """
+        self.path = path
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        size = HEADER.size + (num_bits + 7) // 8
+
+        if not self._header_matches(path, num_bits, num_hashes, size):
+            with open(path, "wb") as f:
+                f.write(HEADER.pack(MAGIC, VERSION, num_bits, num_hashes))
+                f.truncate(size)
+
+        self._file = open(path, "r+b")
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+
+    @staticmethod
+    def _header_matches(path: str, num_bits: int, num_hashes: int, size: int) -> bool:
+        """Comprobar si un archivo existente tiene los mismos parámetros"""
+        try:
+            if os.path.getsize(path) != size:
+                return False
+            with open(path, "rb") as f:
+                header = HEADER.unpack(f.read(HEADER.size))
+            return header == (MAGIC, VERSION, num_bits, num_hashes)
+        except (OSError, struct.error):
+            return False
+
+    @classmethod
+    def open_existing(cls, path: str) -> Optional["BloomFilter"]:
+        """
+        Abrir un filtro persistido con los parámetros de su cabecera
+
+        Returns:
+            El filtro, o None si el archivo no existe o no es válido
+        """
+        try:
+            with open(path, "rb") as f:
+                magic, version, num_bits, num_hashes = HEADER.unpack(f.read(HEADER.size))
+        except (OSError, struct.error):
+            return None
+        if magic != MAGIC or version != VERSION:
+            return None
+        if os.path.getsize(path) != HEADER.size + (num_bits + 7) // 8:
+            return None
+        return cls(path, num_bits, num_hashes)
+
+    @staticmethod
+    def optimal_parameters(capacity: int, false_positive_rate: float,
+                           max_bytes: int = None) -> Tuple[int, int]:
+        """
+        Calcular el número de bits y de funciones hash
+
+        Args:
+            capacity: Número de elementos esperados
+            false_positive_rate: Tasa de falsos positivos deseada (0-1)
+            max_bytes: Límite opcional de memoria del array de bits
+
+        Returns:
+            Tupla (num_bits, num_hashes)
+        """
+        capacity = max(capacity, 1)
+        num_bits = int(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2))
+        if max_bytes:
+            num_bits = min(num_bits, max_bytes * 8)
+        num_bits = max(num_bits, 64)
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        return num_bits, num_hashes
+
+    def _positions(self, key: bytes):
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield HEADER.size * 8 + (h1 + i * h2) % self.num_bits
+
+    def add(self, key: bytes):
+        """Agregar una clave al filtro"""
+        mm = self._mmap
+        for bit in self._positions(key):
+            byte_index = bit >> 3
+            mm[byte_index] = mm[byte_index] | (1 << (bit & 7))
+
+    def __contains__(self, key: bytes) -> bool:
+        mm = self._mmap
+        for bit in self._positions(key):
+            if not mm[bit >> 3] & (1 << (bit & 7)):
+                return False
+        return True
+
+    def flush(self):
+        """Escribir los cambios pendientes a disco"""
+        self._mmap.flush()
+
+    def close(self):
+        """Cerrar el mapeo y el archivo"""
+        self._mmap.close()
+        self._file.close()
+
+class VisitedURLFilter:
+    """Filtro de URLs visitadas compartido por todas las ventanas de un perfil"""
+
+    FILENAME = "visited_urls.bloom"
+
+    _instances: Dict[str, "VisitedURLFilter"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: str, capacity: int, false_positive_rate: float,
+                 max_memory_mb: int):
+        """
+        Args:
+            path: Ruta del archivo persistente
+            capacity: Número de URLs esperadas
+            false_positive_rate: Tasa de falsos positivos deseada
+            max_memory_mb: Memoria máxima del filtro en MB
+        """
+        self.path = path
+        self.capacity = capacity
+        self.false_positive_rate = false_positive_rate
+        self.max_bytes = max_memory_mb * 1024 * 1024
+
+        self._lock = threading.Lock()
+        self._pending: Optional[List[bytes]] = None
+        self._rebuild_thread: Optional[threading.Thread] = None
+
+        # Un filtro persistido de la sesión anterior es válido desde el arranque
+        self._filter = BloomFilter.open_existing(path)
+        self.ready = self._filter is not None
+        if self._filter is None:
+            num_bits, num_hashes = BloomFilter.optimal_parameters(
+                capacity, false_positive_rate, self.max_bytes)
+            self._filter = BloomFilter(path, num_bits, num_hashes)
+
+    @classmethod
+    def for_data_dir(cls, data_dir: str, capacity: int = 1000000,
+                     false_positive_rate: float = 0.01,
+                     max_memory_mb: int = 16) -> "VisitedURLFilter":
+        """Obtener la instancia compartida para un directorio de datos"""
+        path = os.path.join(data_dir, cls.FILENAME)
+        with cls._instances_lock:
+            instance = cls._instances.get(path)
+            if instance is None:
+                instance = cls(path, capacity, false_positive_rate, max_memory_mb)
+                cls._instances[path] = instance
+            return instance
+
+    @staticmethod
+    def _key(url: str) -> bytes:
+        return URLUtils.canonicalize_url(url).encode("utf-8")
+
+    def add(self, url: str):
+        """Registrar una URL visitada"""
+        key = self._key(url)
+        with self._lock:
+            self._filter.add(key)
+            if self._pending is not None:
+                self._pending.append(key)
+
+    def add_many(self, urls: Iterable[str]):
+        """Registrar varias URLs visitadas"""
+        for url in urls:
+            self.add(url)
+
+    def might_contain(self, url: str) -> bool:
+        """
+        Comprobar si una URL puede estar en el historial
+
+        Returns:
+            False si la URL seguro que no se ha visitado; True si es posible
+            (o si el filtro aún no está listo)
+        """
+        if not self.ready:
+            return True
+        key = self._key(url)
+        with self._lock:
+            return key in self._filter
+
+    def start_rebuild(self, db_manager) -> threading.Thread:
+        """
+        Reconstruir el filtro desde la base de datos en un hilo en segundo plano
+
+        Las URLs agregadas durante la reconstrucción se aplican también al filtro nuevo.
+        """
+        with self._lock:
+            if self._rebuild_thread and self._rebuild_thread.is_alive():
+                return self._rebuild_thread
+            self._pending = []
+            self._rebuild_thread = threading.Thread(
+                target=self._rebuild, args=(db_manager,),
+                name="visited-filter-rebuild", daemon=True)
+        self._rebuild_thread.start()
+        return self._rebuild_thread
+
+    def ensure_rebuilt(self, db_manager):
+        """Reconstruir el filtro una sola vez por proceso"""
+        if self._rebuild_thread is None:
+            self.start_rebuild(db_manager)
+
+    def _rebuild(self, db_manager):
+        temp_path = self.path + ".tmp"
+        new_filter = None
+        try:
+            capacity = max(self.capacity, int(db_manager.count_history() * 1.2))
+            num_bits, num_hashes = BloomFilter.optimal_parameters(
+                capacity, self.false_positive_rate, self.max_bytes)
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            new_filter = BloomFilter(temp_path, num_bits, num_hashes)
+            for url in db_manager.iter_history_urls():
+                new_filter.add(self._key(url))
+
+            with self._lock:
+                for key in self._pending:
+                    new_filter.add(key)
+                new_filter.flush()
+                new_filter.close()
+                self._filter.close()
+                os.replace(temp_path, self.path)
+                self._filter = BloomFilter(self.path, num_bits, num_hashes)
+                self._pending = None
+                self.ready = True
+        except (OSError, ValueError, sqlite3.Error) as e:
+            # Un filtro a medias daría falsos negativos: se descarta y, si el filtro
+            # no estaba listo, las consultas siguen yendo a SQLite
+            print(f"Error al reconstruir el filtro de URLs visitadas: {e}")
+            with self._lock:
+                self._pending = None
+            if new_filter is not None:
+                new_filter.close()
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def flush(self):
+        """Escribir el filtro a disco"""
+        with self._lock:
+            self._filter.flush()
@@ -3,10 +3,56 @@ WebTab - Clase para manejar cada pestaña del navegador
 Incluye el motor web y la integración con la base de datos
 """
 
+import time
+from typing import Optional
+
 from PyQt5.QtWidgets import QWidget, QVBoxLayout
-from PyQt5.QtCore import QUrl, pyqtSignal
+from PyQt5.QtCore import QByteArray, QDataStream, QIODevice, QTimer, QUrl, pyqtSignal
 from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEnginePage, QWebEngineProfile
-from urllib.parse import urlparse
+
+from .request_interceptor import ContentBlockingInterceptor, PAGE_INTERCEPTORS
+from .internal_pages import blocked_url
+from .omnibox import classify_input
+from .utils import SecurityUtils, URLUtils
+from .navigation import (NavigationClassifier, NAV_LINK, NAV_TYPED, NAV_FORM,
+                         NAV_BACK_FORWARD, NAV_RELOAD, NAV_REDIRECT, NAV_OTHER)
+
+# Traducción de los tipos de navegación de QtWebEngine
+NAVIGATION_TYPES = {
+    QWebEnginePage.NavigationTypeLinkClicked: NAV_LINK,
+    QWebEnginePage.NavigationTypeTyped: NAV_TYPED,
+    QWebEnginePage.NavigationTypeFormSubmitted: NAV_FORM,
+    QWebEnginePage.NavigationTypeBackForward: NAV_BACK_FORWARD,
+    QWebEnginePage.NavigationTypeReload: NAV_RELOAD,
+    QWebEnginePage.NavigationTypeOther: NAV_OTHER,
+}
+# NavigationTypeRedirect solo existe a partir de Qt 5.14
+if hasattr(QWebEnginePage, 'NavigationTypeRedirect'):
+    NAVIGATION_TYPES[QWebEnginePage.NavigationTypeRedirect] = NAV_REDIRECT
+
+# Esquemas que nunca se guardan en el historial
+NON_HISTORY_SCHEMES = ('about:', 'chrome:', 'data:', 'pybrowser:')
+
+# Estados del ciclo de vida de la página (Qt 5.14+)
+HAS_LIFECYCLE_STATES = hasattr(QWebEnginePage, 'LifecycleState')
+
+class BrowserPage(QWebEnginePage):
+    """Página web que informa de sus navegaciones al clasificador"""
+    
+    def __init__(self, profile: QWebEngineProfile, classifier: NavigationClassifier, parent=None):
+        super().__init__(profile, parent)
+        self.classifier = classifier
+    
+    def acceptNavigationRequest(self, url: QUrl, nav_type, is_main_frame: bool) -> bool:
+        """Registrar la navegación solicitada y aceptarla salvo si el dominio está bloqueado"""
+        if (is_main_frame and url.scheme() in ('http', 'https')
+                and not SecurityUtils.is_safe_url(url.toString())):
+            # No se puede navegar desde dentro de esta llamada
+            QTimer.singleShot(0, lambda: self.load(QUrl(blocked_url(url.toString()))))
+            return False
+        self.classifier.navigation_requested(
+            url.toString(), NAVIGATION_TYPES.get(nav_type, NAV_OTHER), is_main_frame)
+        return super().acceptNavigationRequest(url, nav_type, is_main_frame)
 
 class WebTab(QWebEngineView):
     """Pestaña del navegador web"""
@@ -17,47 +63,75 @@ class WebTab(QWebEngineView):
     loadProgress = pyqtSignal(int)
     loadFinished = pyqtSignal(bool)
     
-    def __init__(self, profile: QWebEngineProfile, db_manager):
+    def __init__(self, profile: QWebEngineProfile, db_manager, content_filter=None):
         super().__init__()
         self.db_manager = db_manager
+        self.profile = profile
         
-        # Configurar la página web con el perfil personalizado
-        self.web_page = QWebEnginePage(profile, self)
-        self.setPage(self.web_page)
+        # Bloqueo de contenido por pestaña (con Qt < 5.13 lo hace el perfil)
+        self.request_interceptor = None
+        if content_filter is not None and PAGE_INTERCEPTORS:
+            self.request_interceptor = ContentBlockingInterceptor(content_filter, self)
         
-        # Conectar señales internas
-        self.page().titleChanged.connect(self.on_title_changed)
-        self.page().urlChanged.connect(self.on_url_changed)
-        self.page().loadProgress.connect(self.on_load_progress)
-        self.page().loadFinished.connect(self.on_load_finished)
+        # Clasificador que decide qué navegaciones cuentan como visitas
+        self.navigation = NavigationClassifier()
+        
+        # Configurar la página web con el perfil personalizado
+        self.install_page(BrowserPage(profile, self.navigation, self))
         
         # Variables de estado
         self.current_url = None
         self.current_title = None
+        self.is_loading = False
+        
+        # Última visita guardada y su título, para no repetir escrituras
+        self.recorded_url = None
+        self.recorded_title = None
+        
+        # Ciclo de vida: última activación y estado guardado al descartar sin
+        # soporte de Qt para estados de ciclo de vida
+        self.last_active = time.monotonic()
+        self.saved_state: Optional[dict] = None
+        self.session_id: Optional[int] = None
+        self._restoring = False
+        self._pending_scroll = None
+    
+    def install_page(self, page: BrowserPage):
+        """Usar una página nueva en la pestaña y conectar sus señales"""
+        self.web_page = page
+        self.setPage(page)
+        if self.request_interceptor is not None:
+            page.setUrlRequestInterceptor(self.request_interceptor)
+        
+        # Conectar señales internas
+        page.titleChanged.connect(self.on_title_changed)
+        page.urlChanged.connect(self.on_url_changed)
+        page.loadStarted.connect(self.on_load_started)
+        page.loadProgress.connect(self.on_load_progress)
+        page.loadFinished.connect(self.on_load_finished)
         
     def on_title_changed(self, title: str):
         """Manejar el cambio de título de la página"""
         self.current_title = title
         self.titleChanged.emit(title)
         
-        # Actualizar en la base de datos si tenemos URL
-        if self.current_url:
-            self.db_manager.add_history_entry(self.current_url, title)
+        # Actualizar solo el título de la visita ya guardada
+        if (title and self.recorded_url and self.recorded_url == self.current_url
+                and title != self.recorded_title):
+            self.db_manager.update_history_title(self.recorded_url, title)
+            self.recorded_title = title
     
     def on_url_changed(self, url: QUrl):
         """Manejar el cambio de URL"""
-        url_string = url.toString()
-        self.current_url = url_string
+        self.current_url = url.toString()
         self.urlChanged.emit(url)
         
-        # Agregar al historial solo si es una URL válida
-        if url_string and not url_string.startswith(('about:', 'chrome:', 'data:')):
-            # Si ya tenemos título, actualizar inmediatamente
-            if self.current_title:
-                self.db_manager.add_history_entry(url_string, self.current_title)
-            else:
-                # Agregar sin título por ahora
-                self.db_manager.add_history_entry(url_string)
+        # Las visitas se guardan al terminar la carga; aquí solo se clasifica
+        self.navigation.url_changed(self.current_url)
+    
+    def on_load_started(self):
+        """Manejar el inicio de la carga"""
+        self.is_loading = True
     
     def on_load_progress(self, progress: int):
         """Manejar el progreso de carga"""
@@ -65,39 +139,209 @@ class WebTab(QWebEngineView):
     
     def on_load_finished(self, success: bool):
         """Manejar la finalización de la carga"""
+        self.is_loading = False
         self.loadFinished.emit(success)
         
-        # Si la carga fue exitosa y tenemos URL y título, actualizar historial
-        if success and self.current_url and self.current_title:
-            self.db_manager.add_history_entry(self.current_url, self.current_title)
+        # Guardar una sola visita por navegación entre documentos
+        visit_url = self.navigation.load_finished(self.current_url, success)
+        if self._restoring:
+            # Restaurar una pestaña descartada no es una visita nueva
+            self._restoring = False
+            if success and self._pending_scroll:
+                self.page().runJavaScript("window.scrollTo(%d, %d);" % self._pending_scroll)
+            self._pending_scroll = None
+        elif visit_url and not visit_url.startswith(NON_HISTORY_SCHEMES):
+            self.db_manager.add_history_entry(visit_url, self.current_title or None)
+            self.recorded_url = visit_url
+            self.recorded_title = self.current_title
     
     def load_url(self, url_string: str):
-        """Cargar una URL específica"""
-        if not url_string.startswith(('http://', 'https://')):
-            url_string = 'https://' + url_string
+        """Cargar una URL o buscar el texto, como en la barra de direcciones"""
+        self.load(QUrl(classify_input(url_string).url))
+    
+    def session_url(self) -> str:
+        """URL de la pestaña, también si está descartada"""
+        if self.saved_state is not None:
+            return self.saved_state['url']
+        return self.url().toString()
+    
+    def mark_active(self):
+        """Registrar que la pestaña acaba de usarse"""
+        self.last_active = time.monotonic()
+    
+    def idle_seconds(self) -> float:
+        """Segundos desde la última vez que se usó la pestaña"""
+        return time.monotonic() - self.last_active
+    
+    def is_frozen(self) -> bool:
+        """Comprobar si la página está congelada"""
+        return (HAS_LIFECYCLE_STATES and
+                self.page().lifecycleState() == QWebEnginePage.LifecycleState.Frozen)
+    
+    def is_discarded(self) -> bool:
+        """Comprobar si la página está descartada"""
+        if self.saved_state is not None:
+            return True
+        return (HAS_LIFECYCLE_STATES and
+                self.page().lifecycleState() == QWebEnginePage.LifecycleState.Discarded)
+    
+    def can_sleep(self) -> bool:
+        """Comprobar si la pestaña puede congelarse o descartarse sin que se note"""
+        page = self.page()
+        if self.is_loading or page.recentlyAudible():
+            return False
+        if HAS_LIFECYCLE_STATES:
+            # Qt recomienda Active mientras la página es visible o tiene
+            # actividad que no debe interrumpirse
+            return page.recommendedState() != QWebEnginePage.LifecycleState.Active
+        return not self.isVisible()
+    
+    def freeze(self) -> bool:
+        """
+        Congelar la página (sin JavaScript ni temporizadores; conserva el renderer)
+        
+        Returns:
+            True si la página quedó congelada
+        """
+        if not HAS_LIFECYCLE_STATES:
+            return False
+        page = self.page()
+        if page.lifecycleState() == QWebEnginePage.LifecycleState.Active:
+            page.setLifecycleState(QWebEnginePage.LifecycleState.Frozen)
+        return page.lifecycleState() == QWebEnginePage.LifecycleState.Frozen
+    
+    def discard(self) -> bool:
+        """
+        Descartar la página y liberar su renderer
+        
+        Con Qt 5.14+ se usa el estado Discarded; en versiones anteriores se
+        guardan la URL, el título, el desplazamiento y el historial de la
+        pestaña y se sustituye la página por una vacía.
         
-        self.load(QUrl(url_string))
+        Returns:
+            True si la página quedó descartada
+        """
+        if self.is_discarded():
+            return False
+        
+        if HAS_LIFECYCLE_STATES:
+            page = self.page()
+            # Qt solo permite descartar páginas congeladas
+            if self.freeze():
+                page.setLifecycleState(QWebEnginePage.LifecycleState.Discarded)
+            return page.lifecycleState() == QWebEnginePage.LifecycleState.Discarded
+        
+        url = self.current_url or self.url().toString()
+        if not url:
+            return False
+        scroll = self.page().scrollPosition()
+        self.saved_state = {
+            'url': url,
+            'title': self.current_title,
+            'scroll': (int(scroll.x()), int(scroll.y())),
+            'history': self.serialize_history(),
+        }
+        
+        # Una página sin cargar no arranca ningún renderer
+        old_page = self.web_page
+        self.install_page(BrowserPage(self.profile, self.navigation, self))
+        old_page.deleteLater()
+        return True
+    
+    def set_saved_state(self, url: str, title: str = None, history: bytes = None):
+        """
+        Dejar la pestaña sin cargar con un estado guardado; se carga con restore
+        
+        Args:
+            url: URL de la pestaña
+            title: Título guardado
+            history: Historial serializado con serialize_history
+        """
+        self.saved_state = {'url': url, 'title': title, 'scroll': None, 'history': history}
+        self.current_title = title
+    
+    def restore(self) -> bool:
+        """
+        Restaurar la página si estaba congelada o descartada
+        
+        Returns:
+            True si la página estaba descartada y ha vuelto a cargarse
+        """
+        if self.saved_state is None:
+            if not HAS_LIFECYCLE_STATES:
+                return False
+            page = self.page()
+            was_discarded = self.is_discarded()
+            if page.lifecycleState() != QWebEnginePage.LifecycleState.Active:
+                # Una página descartada se recarga sola al activarse
+                self._restoring = was_discarded
+                page.setLifecycleState(QWebEnginePage.LifecycleState.Active)
+            return was_discarded
+        
+        state, self.saved_state = self.saved_state, None
+        self._restoring = True
+        self._pending_scroll = state['scroll']
+        if not (state.get('history') and self.restore_history(state['history'])):
+            self.load(QUrl(state['url']))
+        return True
+    
+    def serialize_history(self) -> Optional[bytes]:
+        """
+        Serializar el historial de navegación de la pestaña
+        
+        Returns:
+            Los bytes de QWebEngineHistory, o None si no se puede serializar
+        """
+        data = QByteArray()
+        stream = QDataStream(data, QIODevice.WriteOnly)
+        try:
+            stream << self.history()
+        except TypeError:
+            return None
+        return bytes(data)
+    
+    def restore_history(self, data: bytes) -> bool:
+        """
+        Restaurar un historial serializado con serialize_history
+        
+        Al restaurarlo, la pestaña navega a la entrada actual del historial.
+        
+        Returns:
+            True si el historial se restauró
+        """
+        stream = QDataStream(QByteArray(data), QIODevice.ReadOnly)
+        try:
+            stream >> self.history()
+        except TypeError:
+            return False
+        return stream.status() == QDataStream.Ok
     
     def get_domain(self) -> str:
-        """Obtener el dominio de la URL actual"""
+        """Obtener el dominio registrable (sitio) de la URL actual"""
         if self.current_url:
-            parsed = urlparse(self.current_url)
-            return parsed.netloc
+            return URLUtils.parse(self.current_url).domain
         return ""
     
     def is_secure(self) -> bool:
         """Verificar si la conexión actual es segura (HTTPS)"""
         if self.current_url:
-            return self.current_url.startswith('https://')
+            return URLUtils.parse(self.current_url).is_secure
         return False
     
+    def blocked_requests(self) -> int:
+        """Número de peticiones bloqueadas en esta pestaña"""
+        return self.request_interceptor.blocked if self.request_interceptor else 0
+    
     def get_page_info(self) -> dict:
         """Obtener información de la página actual"""
+        parsed = URLUtils.parse(self.current_url or '')
         return {
             'url': self.current_url,
             'title': self.current_title,
-            'domain': self.get_domain(),
-            'secure': self.is_secure(),
+            'domain': parsed.domain,
+            'secure': parsed.is_secure,
             'can_go_back': self.history().canGoBack(),
-            'can_go_forward': self.history().canGoForward()
+            'can_go_forward': self.history().canGoForward(),
+            'blocked_requests': self.blocked_requests(),
+            'bytes_saved': self.request_interceptor.bytes_saved if self.request_interceptor else 0
         }
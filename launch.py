@@ -48,6 +48,7 @@ def main():
             # Importar y ejecutar navegador completo
             from browser.main_window import MainWindow
             from browser.database import DatabaseManager
+            from browser.scheme_handler import register_internal_scheme
             from PyQt5.QtWidgets import QApplication
             from PyQt5.QtCore import QCoreApplication
             
@@ -56,6 +57,7 @@ def main():
             QCoreApplication.setApplicationVersion("1.0")
             QCoreApplication.setOrganizationName("PyBrowser")
             
+            register_internal_scheme()
             app = QApplication(sys.argv)
             
             # Configurar directorio de datos
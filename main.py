@@ -12,6 +12,7 @@ from PyQt5.QtCore import QCoreApplication
 # Importar los módulos del navegador
 from browser.main_window import MainWindow
 from browser.database import DatabaseManager
+from browser.scheme_handler import register_internal_scheme
 
 def main():
     """Función principal para inicializar el navegador"""
@@ -20,6 +21,9 @@ def main():
     QCoreApplication.setApplicationVersion("1.0")
     QCoreApplication.setOrganizationName("PyBrowser")
     
+    # Los esquemas propios se registran antes de crear la aplicación
+    register_internal_scheme()
+    
     # Crear la aplicación Qt
     app = QApplication(sys.argv)
     
@@ -3,6 +3,7 @@
 Navegador Web Simplificado - Versión básica para sistemas sin QtWebEngine
 """
 
+import io
 import sys
 import os
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, 
@@ -12,18 +13,19 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout
 from PyQt5.QtCore import Qt, QUrl, QThread, pyqtSignal
 from PyQt5.QtGui import QFont
 import urllib.request
-import urllib.parse
 import json
 import re
 from html.parser import HTMLParser
 
+from browser.omnibox import classify_input
+from browser.page_metadata import extract_head_metadata
+
 class SimpleHTMLParser(HTMLParser):
-    """Parser simple para extraer texto de HTML"""
+    """Parser simple para extraer texto de HTML (el título se lee con extract_head_metadata)"""
     
     def __init__(self):
         super().__init__()
         self.text_content = []
-        self.title = ""
         self.in_title = False
         
     def handle_starttag(self, tag, attrs):
@@ -39,9 +41,7 @@ class SimpleHTMLParser(HTMLParser):
             self.text_content.append('\n\n')
             
     def handle_data(self, data):
-        if self.in_title:
-            self.title += data.strip()
-        else:
+        if not self.in_title:
             self.text_content.append(data)
     
     def get_text(self):
@@ -59,11 +59,8 @@ class WebLoader(QThread):
         
     def run(self):
         try:
-            # Verificar si es una búsqueda de DuckDuckGo
-            if not self.url.startswith(('http://', 'https://')):
-                # Es una búsqueda, redirigir a DuckDuckGo
-                search_query = urllib.parse.quote(self.url)
-                self.url = f"https://duckduckgo.com/?q={search_query}"
+            # Dirección o búsqueda en DuckDuckGo, con las mismas reglas que la barra del navegador
+            self.url = classify_input(self.url).url
             
             # Crear request con headers
             req = urllib.request.Request(
@@ -78,13 +75,18 @@ class WebLoader(QThread):
             # Abrir URL
             with urllib.request.urlopen(req, timeout=10) as response:
                 # Leer contenido
-                html_content = response.read().decode('utf-8', errors='ignore')
+                raw_content = response.read()
+                
+                # Título y codificación de la cabecera (solo los primeros KB)
+                metadata = extract_head_metadata(io.BytesIO(raw_content), self.url,
+                                                 response.headers.get('Content-Type'))
+                html_content = raw_content.decode(metadata.charset, errors='replace')
                 
                 # Parsear HTML
                 parser = SimpleHTMLParser()
                 parser.feed(html_content)
                 
-                title = parser.title or self.url
+                title = metadata.title or self.url
                 text_content = parser.get_text()
                 
                 # Emitir señal con el contenido
@@ -0,0 +1,133 @@
+"""
+Pruebas del motor de bloqueo de contenido con reglas de estilo EasyList
+
+Uso: python -m pytest tests
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser.content_filter import ContentFilter
+
+RULES = [
+    "! Comentario",
+    "example.com##.banner",
+    "||ads.example^",
+    "||cdn.example^$script",
+    "/banner^",
+    "||tracker.example^$third-party",
+    "/promo.$domain=news.example|~sports.news.example",
+    "@@||ads.example/allowed/*",
+    "@@||good.example^",
+    # Regex literales: \W no debe convertirse en \w al pasar a minúsculas
+    r"/\/ad[0-9]+\.(gif|png)/",
+    r"/\Wpixel\W/",
+    "/AdServer/$match-case",
+    "/Metrics.js$match-case",
+    # Se ignoran: regex no válida y opción no soportada
+    "/[/",
+    "||popup.example^$popup",
+]
+
+PAGE = "https://site.example/"
+
+class ContentFilterTest(unittest.TestCase):
+    """Listas de filtros en un directorio temporal"""
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.lists_dir = self._temp_dir.name
+        self.list_path = os.path.join(self.lists_dir, "easylist.txt")
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def _write_list(self, lines, mtime: float = None):
+        with open(self.list_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        if mtime is not None:
+            os.utime(self.list_path, (mtime, mtime))
+
+    def _load(self) -> ContentFilter:
+        content_filter = ContentFilter(self.lists_dir)
+        self.assertTrue(content_filter.load())
+        return content_filter
+
+    def _check(self, content_filter: ContentFilter, cases):
+        for url, page_url, resource_type, expected in cases:
+            with self.subTest(url=url, page_url=page_url, resource_type=resource_type):
+                self.assertEqual(content_filter.should_block(url, page_url, resource_type), expected)
+
+    def test_compile_lines(self):
+        block, allow = ContentFilter.compile_lines(RULES)
+        self.assertEqual(block.hosts, {"ads.example"})
+        self.assertEqual(allow.hosts, {"good.example"})
+        # Comentarios, reglas cosméticas, regex no válidas y opciones no soportadas no cuentan
+        self.assertEqual(len(block.rules), 8)
+        self.assertEqual(len(allow.rules), 1)
+
+    def test_should_block(self):
+        self._write_list(RULES)
+        self._check(self._load(), [
+            # ||host^: el host y sus subdominios, no dominios que solo se parecen
+            ("https://ads.example/a.js", PAGE, "script", True),
+            ("https://sub.ads.example/a.js", PAGE, "script", True),
+            ("https://notads.example/a.js", PAGE, "script", False),
+            ("https://ads.example.org/a.js", PAGE, "script", False),
+            # Opciones de tipo
+            ("https://cdn.example/lib.js", PAGE, "script", True),
+            ("https://cdn.example/logo.png", PAGE, "image", False),
+            # ^ separa tokens: /banner/ y /banner? sí, /banners no
+            ("https://site.example/banner/1.png", PAGE, "image", True),
+            ("https://site.example/banner?size=2", PAGE, "image", True),
+            ("https://site.example/banner", PAGE, "image", True),
+            ("https://site.example/banners/1.png", PAGE, "image", False),
+            # $third-party
+            ("https://tracker.example/t.gif", PAGE, "image", True),
+            ("https://cdn.tracker.example/t.gif", "https://www.tracker.example/", "image", False),
+            # $domain= con exclusión de un subdominio
+            ("https://site.example/promo.js", "https://news.example/", "script", True),
+            ("https://site.example/promo.js", "https://sports.news.example/", "script", False),
+            ("https://site.example/promo.js", PAGE, "script", False),
+            # Excepciones @@ sobre reglas de host y de patrón
+            ("https://ads.example/allowed/a.js", PAGE, "script", False),
+            ("https://good.example/banner/1.png", PAGE, "image", False),
+            # Regex literales, insensibles a mayúsculas salvo $match-case
+            ("https://site.example/AD12.PNG", PAGE, "image", True),
+            ("https://site.example/ad.png", PAGE, "image", False),
+            ("https://site.example/x/pixel/1", PAGE, "image", True),
+            ("https://site.example/xpixelx", PAGE, "image", False),
+            ("https://site.example/AdServer/x", PAGE, "script", True),
+            ("https://site.example/adserver/x", PAGE, "script", False),
+            ("https://site.example/Metrics.js", PAGE, "script", True),
+            ("https://site.example/metrics.js", PAGE, "script", False),
+            # Reglas ignoradas y documento principal
+            ("https://popup.example/", PAGE, "subdocument", False),
+            ("https://ads.example/", "", "document", True),
+        ])
+
+    def test_cache(self):
+        """La caché compilada se reutiliza y se descarta al cambiar la fecha de una lista"""
+        now = time.time()
+        self._write_list(["||aaa.example^"], now - 100)
+        self.assertTrue(self._load().should_block("https://aaa.example/x.js", PAGE, "script"))
+        self.assertTrue(os.path.exists(os.path.join(self.lists_dir, ContentFilter.CACHE_FILENAME)))
+
+        with mock.patch.object(ContentFilter, "compile_lines",
+                               side_effect=AssertionError("no debe recompilar")):
+            self.assertTrue(self._load().should_block("https://aaa.example/x.js", PAGE, "script"))
+
+        # Mismo tamaño, distinta fecha
+        self._write_list(["||bbb.example^"], now)
+        content_filter = self._load()
+        self.assertFalse(content_filter.should_block("https://aaa.example/x.js", PAGE, "script"))
+        self.assertTrue(content_filter.should_block("https://bbb.example/x.js", PAGE, "script"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+Pruebas de la exportación e importación de datos del usuario
+
+Uso: python -m pytest tests
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser.data_transfer import FORMAT_BINARY, FORMAT_NDJSON, DataExporter, DataImporter
+from browser.database import DatabaseManager
+
+class DataTransferTest(unittest.TestCase):
+    """Exportar e importar entre perfiles en directorios temporales"""
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.temp_dir = self._temp_dir.name
+        self.db_manager = self._new_profile("source")
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def _new_profile(self, name: str) -> DatabaseManager:
+        data_dir = os.path.join(self.temp_dir, name)
+        os.makedirs(data_dir)
+        db_manager = DatabaseManager(data_dir)
+        db_manager.initialize_database()
+        return db_manager
+
+    def _write_ndjson(self, records) -> str:
+        path = os.path.join(self.temp_dir, "export.ndjson")
+        with open(path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        return path
+
+    def test_history_favorites_become_bookmarks(self):
+        """Un historial exportado sin sección de favoritos conserva los favoritos"""
+        path = self._write_ndjson([
+            {"type": "history", "url": "https://example.com/a", "title": "A",
+             "visit_time": "2024-01-01 10:00:00", "visit_count": 3, "is_favorite": 1},
+            {"type": "history", "url": "https://example.com/b", "title": "B",
+             "visit_time": "2024-01-02 10:00:00", "visit_count": 1, "is_favorite": 0},
+        ])
+        self.assertEqual(DataImporter(self.db_manager).import_from_file(path), 2)
+        # Importar otra vez no duplica el marcador
+        DataImporter(self.db_manager).import_from_file(path)
+
+        self.assertEqual([(f["url"], f["title"]) for f in self.db_manager.get_favorites()],
+                         [("https://example.com/a", "A")])
+        favorites = {e["url"]: e["is_favorite"] for e in self.db_manager.get_history(10)}
+        self.assertEqual(favorites, {"https://example.com/a": True, "https://example.com/b": False})
+
+    def _history(self, db_manager: DatabaseManager) -> list:
+        return [{name: entry[name] for name in ("url", "title", "visit_time", "visit_count")}
+                for entry in db_manager.iter_history()]
+
+    def test_history_and_cookies_round_trip(self):
+        """Exportar e importar conserva historial y cookies; las URLs no http(s) se omiten"""
+        source = self.db_manager
+        source.add_history_entry("https://example.com/a", "A")
+        source.add_history_entry("https://example.com/a", "A")
+        source.add_history_entry("http://example.org/b?q=1", None)
+        source.add_history_entry("javascript:fetch('/api/page')", "Script")
+        source.add_cookie("example.com", "session", "abc", "/", "2030-01-01 00:00:00", True, True)
+        source.add_cookie(".example.org", "lang", "es")
+        expected_history = [e for e in self._history(source) if not e["url"].startswith("javascript:")]
+        expected_cookies = list(source.iter_cookies())
+        self.assertEqual(len(expected_history), 2)
+        self.assertEqual(len(expected_cookies), 2)
+
+        for fmt in (FORMAT_NDJSON, FORMAT_BINARY):
+            path = os.path.join(self.temp_dir, f"export.{fmt}")
+            DataExporter(source).export_to_file(path, fmt)
+            target = self._new_profile(f"target-{fmt}")
+            # Dos entradas de historial y dos cookies (la URL javascript: no cuenta)
+            self.assertEqual(DataImporter(target).import_from_file(path), 4, fmt)
+            self.assertEqual(self._history(target), expected_history, fmt)
+            self.assertEqual(list(target.iter_cookies()), expected_cookies, fmt)
+            # Importar otra vez no duplica ni suma visitas
+            DataImporter(target).import_from_file(path)
+            self.assertEqual(self._history(target), expected_history, fmt)
+            self.assertEqual(list(target.iter_cookies()), expected_cookies, fmt)
+
+    def test_restore_keeps_bookmarks(self):
+        self.db_manager.add_history_entry("https://example.com/a", "A")
+        entry_id = self.db_manager.get_history(1)[0]["id"]
+        self.db_manager.set_favorite([entry_id], True)
+
+        deleted = self.db_manager.delete_history_entries([entry_id])
+        self.assertEqual(self.db_manager.restore_history_entries(deleted), [entry_id])
+        self.assertTrue(self.db_manager.get_history(1)[0]["is_favorite"])
+
+    def _tree(self, db_manager: DatabaseManager, parent_id=None) -> list:
+        """Árbol de marcadores como listas anidadas de (título, URL o hijos)"""
+        return [(b["title"], self._tree(db_manager, b["id"]) if b["is_folder"] else b["url"])
+                for b in db_manager.get_bookmark_children(parent_id)]
+
+    def test_bookmark_tree_round_trip(self):
+        """Exportar e importar conserva carpetas (también vacías) y el orden"""
+        source = self.db_manager
+        source.add_bookmark("https://example.com/root", "Raíz")
+        work = source.add_bookmark_folder("Trabajo")
+        source.add_bookmark("https://example.com/z", "Z", work)
+        source.add_bookmark_folder("Vacía", work)
+        source.add_bookmark("https://example.com/a", "A", work)
+        # Un favorito que además está en el historial no debe acabar en la raíz
+        source.add_history_entry("https://example.com/a", "A")
+        expected = [("Raíz", "https://example.com/root"),
+                    ("Trabajo", [("Z", "https://example.com/z"), ("Vacía", []),
+                                 ("A", "https://example.com/a")])]
+        self.assertEqual(self._tree(source), expected)
+
+        for fmt in (FORMAT_NDJSON, FORMAT_BINARY):
+            path = os.path.join(self.temp_dir, f"export.{fmt}")
+            DataExporter(source).export_to_file(path, fmt)
+            target = self._new_profile(f"target-{fmt}")
+            DataImporter(target).import_from_file(path)
+            self.assertEqual(self._tree(target), expected, fmt)
+            # Importar otra vez fusiona carpetas y omite URLs ya guardadas
+            DataImporter(target).import_from_file(path)
+            self.assertEqual(self._tree(target), expected, fmt)
+
+    def test_legacy_favorite_records(self):
+        """Las exportaciones anteriores (favoritos sin carpetas) se siguen importando en la raíz"""
+        path = self._write_ndjson([
+            {"type": "header", "format": "pybrowser-export", "version": 1},
+            {"type": "favorite", "url": "https://example.com/a", "title": "A"},
+        ])
+        DataImporter(self.db_manager).import_from_file(path)
+        self.assertEqual(self._tree(self.db_manager), [("A", "https://example.com/a")])
+
+if __name__ == "__main__":
+    unittest.main()
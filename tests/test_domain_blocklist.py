@@ -0,0 +1,83 @@
+"""
+Pruebas de la lista de bloqueo de dominios y su recarga en caliente
+
+Uso: python -m pytest tests
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser.domain_blocklist import DomainBlocklist
+from browser.utils import SecurityUtils
+
+class DomainBlocklistTest(unittest.TestCase):
+    """Lista de un perfil en un directorio temporal, sin espera entre comprobaciones"""
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        directory = os.path.join(self._temp_dir.name, DomainBlocklist.DIRNAME)
+        os.makedirs(directory)
+        self.source_path = os.path.join(directory, DomainBlocklist.SOURCE_FILENAME)
+        self.blocklist = DomainBlocklist(
+            os.path.join(directory, DomainBlocklist.COMPILED_FILENAME),
+            self.source_path, check_interval=0)
+        self._previous = SecurityUtils.blocklist
+        SecurityUtils.set_blocklist(self.blocklist)
+        self.blocklist.start_reload().join()
+
+    def tearDown(self):
+        SecurityUtils.set_blocklist(self._previous)
+        self._temp_dir.cleanup()
+
+    def _write_source(self, domains, mtime: float):
+        with open(self.source_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(domains) + "\n")
+        # Más reciente que el archivo compilado aunque el reloj tenga poca resolución
+        os.utime(self.source_path, (mtime, mtime))
+
+    def _wait_reload(self):
+        """Comprobar cambios como lo hace is_safe_url y esperar la recarga"""
+        thread = self.blocklist.maybe_reload()
+        if thread is not None:
+            thread.join()
+
+    def test_empty_then_list_added(self):
+        self.assertEqual(self.blocklist.count, 0)
+        self.assertTrue(SecurityUtils.is_safe_url("https://bad.example/"))
+
+        self._write_source(["bad.example"], time.time() + 10)
+        self._wait_reload()
+        self.assertEqual(self.blocklist.count, 1)
+        self.assertFalse(SecurityUtils.is_safe_url("https://bad.example/"))
+        self.assertFalse(SecurityUtils.is_safe_url("https://www.bad.example/login"))
+        self.assertTrue(SecurityUtils.is_safe_url("https://good.example/"))
+
+    def test_list_replaced(self):
+        self._write_source(["bad.example"], time.time() + 10)
+        self._wait_reload()
+        self.assertFalse(SecurityUtils.is_safe_url("https://bad.example/"))
+        reloads = self.blocklist.reloads
+
+        self._write_source(["other.example", "0.0.0.0 evil.example"], time.time() + 20)
+        self._wait_reload()
+        self.assertEqual(self.blocklist.reloads, reloads + 1)
+        self.assertEqual(self.blocklist.count, 2)
+        # La caché de hosts no conserva resultados de la lista anterior
+        self.assertTrue(SecurityUtils.is_safe_url("https://bad.example/"))
+        self.assertFalse(SecurityUtils.is_safe_url("https://evil.example/"))
+
+    def test_is_safe_url_reloads_empty_list(self):
+        """is_safe_url carga por sí sola una lista que aparece después del arranque"""
+        self._write_source(["bad.example"], time.time() + 10)
+        deadline = time.monotonic() + 5
+        while SecurityUtils.is_safe_url("https://bad.example/") and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(SecurityUtils.is_safe_url("https://bad.example/"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Pruebas de la importación del historial de Firefox y Chromium
+Usa los historiales que genera tools/make_history_fixtures.py
+
+Uso: python -m pytest tests
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from contextlib import closing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser.database import DatabaseManager, HISTORY_SECONDARY_INDEXES
+from browser.history_import import (SOURCE_CHROMIUM, SOURCE_FIREFOX,
+                                    BrowserHistoryImporter)
+from tools.make_history_fixtures import create_chromium_history, create_firefox_history
+
+# Lo que debe quedar en el historial tras importar SAMPLE_ENTRIES (fechas en UTC)
+EXPECTED_HISTORY = {
+    "https://www.python.org/": ("Welcome to Python.org", "2023-11-14 22:13:20", 12),
+    # Dos URLs de origen con la misma forma canónica: se conserva el máximo de cada campo
+    "https://docs.python.org/3/library/sqlite3.html": ("sqlite3 — DB-API 2.0", "2023-11-14 23:13:20", 5),
+    "http://example.com/search?q=navegador": (None, "2020-09-13 12:26:40", 1),
+}
+
+class HistoryImportTest(unittest.TestCase):
+    """Importar historiales pequeños generados en un directorio temporal"""
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.temp_dir = self._temp_dir.name
+        self.db_manager = DatabaseManager(self.temp_dir)
+        self.db_manager.initialize_database()
+        # Lotes pequeños para que la importación use varios
+        self.importer = BrowserHistoryImporter(self.db_manager, batch_size=3)
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def _history(self) -> dict:
+        with closing(sqlite3.connect(self.db_manager.db_path)) as conn:
+            return {url: (title, visit_time, visit_count) for url, title, visit_time, visit_count
+                    in conn.execute("SELECT url, title, visit_time, visit_count FROM history")}
+
+    def _indexes(self) -> set:
+        with closing(sqlite3.connect(self.db_manager.db_path)) as conn:
+            return {row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'history'")}
+
+    def _check_import(self, path: str, source: str):
+        self.assertEqual(BrowserHistoryImporter.detect_source(path), source)
+        progress = []
+        imported = self.importer.import_file(
+            path, progress_callback=lambda done, total: progress.append((done, total)))
+
+        self.assertEqual(imported, 4)
+        self.assertEqual(self._history(), EXPECTED_HISTORY)
+        self.assertTrue(set(HISTORY_SECONDARY_INDEXES) <= self._indexes())
+        self.assertEqual(progress[-1][0], progress[-1][1])
+
+        # Importar otra vez no cambia nada
+        self.importer.import_file(path)
+        self.assertEqual(self._history(), EXPECTED_HISTORY)
+
+    def test_import_firefox(self):
+        path = create_firefox_history(os.path.join(self.temp_dir, "places.sqlite"))
+        self._check_import(path, SOURCE_FIREFOX)
+
+    def test_import_chromium(self):
+        path = create_chromium_history(os.path.join(self.temp_dir, "History"))
+        self._check_import(path, SOURCE_CHROMIUM)
+
+    def test_import_locked_file(self):
+        """Un Firefox en ejecución mantiene places.sqlite bloqueado en exclusiva"""
+        path = create_firefox_history(os.path.join(self.temp_dir, "places.sqlite"))
+        with closing(sqlite3.connect(path)) as browser:
+            browser.execute("PRAGMA locking_mode = EXCLUSIVE")
+            browser.execute("UPDATE moz_places SET frecency = 100")
+            browser.commit()
+            self.assertIsNone(BrowserHistoryImporter.detect_source(path))
+            self.assertEqual(self.importer.import_file(path), 4)
+        self.assertEqual(self._history(), EXPECTED_HISTORY)
+
+    def test_unknown_file(self):
+        path = os.path.join(self.temp_dir, "other.sqlite")
+        with closing(sqlite3.connect(path)) as conn:
+            conn.execute("CREATE TABLE things (id INTEGER PRIMARY KEY)")
+        with self.assertRaises(ValueError):
+            self.importer.import_file(path)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+Pruebas del sanitizador de HTML por lista de permitidos
+
+Uso: python -m pytest tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser.html_sanitizer import HTMLSanitizer, sanitize_html
+
+# (HTML sin confianza, resultado esperado)
+URL_CASES = [
+    ('<a href="javascript:alert(1)">x</a>', '<a>x</a>'),
+    ('<a href="JaVaScRiPt:alert(1)">x</a>', '<a>x</a>'),
+    # Los navegadores ignoran tabuladores, saltos de línea y espacios iniciales
+    ('<a href="java\tscript:alert(1)">x</a>', '<a>x</a>'),
+    ('<a href="java\nscript:alert(1)">x</a>', '<a>x</a>'),
+    ('<a href=" \x01javascript:alert(1)">x</a>', '<a>x</a>'),
+    # Referencias de carácter en el valor del atributo
+    ('<a href="&#106;avascript:alert(1)">x</a>', '<a>x</a>'),
+    ('<a href="&#x6A;avascript:alert(1)">x</a>', '<a>x</a>'),
+    ('<a href="vbscript:msgbox(1)">x</a>', '<a>x</a>'),
+    ('<a href="data:text/html,<script>alert(1)</script>">x</a>', '<a>x</a>'),
+    # SVG puede llevar scripts; solo se aceptan imágenes de mapa de bits en línea
+    ('<img src="data:image/svg+xml;base64,PHN2Zz4=">', '<img>'),
+    ('<img src="data:image/png;base64,AAAA">', '<img src="data:image/png;base64,AAAA">'),
+    ('<a href="https://example.com/">x</a>', '<a href="https://example.com/">x</a>'),
+    ('<a href="/relative?a=1&amp;b=2">x</a>', '<a href="/relative?a=1&amp;b=2">x</a>'),
+    ('<a href="mailto:a@example.com">x</a>', '<a href="mailto:a@example.com">x</a>'),
+]
+
+ATTRIBUTE_CASES = [
+    ('<img src="a.png" onerror="alert(1)">', '<img src="a.png">'),
+    ('<p onclick="alert(1)" ONMOUSEOVER=x style="color:red" title="t">x</p>', '<p title="t">x</p>'),
+    ('<p title="a&quot;b">&lt;x&gt;</p>', '<p title="a&quot;b">&lt;x&gt;</p>'),
+    # Un enlace que abre otra ventana siempre lleva rel="noopener noreferrer"
+    ('<a href="https://e.com" target="_blank">x</a>',
+     '<a href="https://e.com" target="_blank" rel="noopener noreferrer">x</a>'),
+    ('<a href="https://e.com" rel="opener" target="_blank">x</a>',
+     '<a href="https://e.com" target="_blank" rel="noopener noreferrer">x</a>'),
+]
+
+STRUCTURE_CASES = [
+    # Etiquetas que se eliminan con su contenido, aunque no se cierren
+    ('<p>ok<script>alert(1)', '<p>ok</p>'),
+    ('<div><script>a</script><style>b</style>c</div>', '<div>c</div>'),
+    ('<svg><script>alert(1)</script></svg>ok', 'ok'),
+    ('<iframe src="https://e.com"></iframe>ok', 'ok'),
+    ('<object><object></object>dentro</object>fuera', 'fuera'),
+    # textarea y title son texto: la primera etiqueta de cierre las termina
+    ('<textarea><textarea></textarea>safe</textarea>', 'safe'),
+    ('<title><title></title>safe</title>', 'safe'),
+    # Etiquetas no permitidas: se quitan conservando el texto
+    ('<form action="/x"><input value="v">texto</form>', 'texto'),
+    ('<!-- comentario --><!DOCTYPE html><p>x</p>', '<p>x</p>'),
+    # Errores de anidamiento y cierres sin apertura
+    ('<b><i>x</b>y</i>', '<b><i>x</i></b>y'),
+    ('</i></b>texto<b>', 'texto<b></b>'),
+    ('<ul><li>a<li>b</ul>', '<ul><li>a<li>b</li></li></ul>'),
+    ('<br/><hr><img src="a.png"/>', '<br><hr><img src="a.png">'),
+]
+
+class HTMLSanitizerTest(unittest.TestCase):
+    """Casos que deben seguir limpios si cambian las listas de permitidos"""
+
+    def _check(self, cases):
+        for html, expected in cases:
+            with self.subTest(html=html):
+                self.assertEqual(sanitize_html(html), expected)
+
+    def test_url_attributes(self):
+        self._check(URL_CASES)
+
+    def test_attributes(self):
+        self._check(ATTRIBUTE_CASES)
+
+    def test_structure(self):
+        self._check(STRUCTURE_CASES)
+
+    def test_chunks(self):
+        """Procesar el documento por trozos da el mismo resultado que de una vez"""
+        html = ''.join(case for case, _ in URL_CASES + ATTRIBUTE_CASES + STRUCTURE_CASES)
+        expected = sanitize_html(html)
+        for size in (1, 7, 64):
+            sanitizer = HTMLSanitizer()
+            out = [sanitizer.feed(html[i:i + size]) for i in range(0, len(html), size)]
+            self.assertEqual(''.join(out) + sanitizer.close(), expected, size)
+
+if __name__ == "__main__":
+    unittest.main()
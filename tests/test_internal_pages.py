@@ -0,0 +1,47 @@
+"""
+Pruebas de las páginas internas pybrowser://
+
+Uso: python -m pytest tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser.database import DatabaseManager
+from browser.internal_pages import NEW_TAB_URL, InternalPageRouter
+
+class NewTabPageTest(unittest.TestCase):
+    """Nueva pestaña generada desde un historial temporal"""
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.db_manager = DatabaseManager(self._temp_dir.name)
+        self.db_manager.initialize_database()
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def _new_tab(self) -> str:
+        status, _, body = InternalPageRouter(self.db_manager).handle(NEW_TAB_URL)
+        self.assertEqual(status, 200)
+        return body.decode("utf-8")
+
+    def test_only_http_urls_are_links(self):
+        """Una URL javascript: del historial no se puede abrir desde el origen pybrowser://"""
+        self.db_manager.add_history_entry("https://example.com/a", "A")
+        self.db_manager.add_history_entry("javascript:fetch('/api/page')", "Script")
+        self.db_manager.add_history_entry("JavaScript:alert(1)", None)
+
+        page = self._new_tab()
+        self.assertIn('href="https://example.com/a"', page)
+        self.assertNotIn('href="javascript:', page.lower())
+        # Se siguen mostrando como texto
+        self.assertIn("<span>Script</span>", page)
+        self.assertIn("JavaScript:alert(1)", page)
+
+if __name__ == "__main__":
+    unittest.main()
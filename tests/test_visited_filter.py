@@ -0,0 +1,90 @@
+"""
+Pruebas del filtro de URLs visitadas y de sus consultas
+
+Uso: python -m pytest tests
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser.database import DatabaseManager
+from browser.internal_pages import InternalPageRouter, internal_url
+from browser.visited_filter import VisitedURLFilter
+
+class VisitedFilterTest(unittest.TestCase):
+    """Filtro persistente en un directorio temporal"""
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.temp_dir = self._temp_dir.name
+        self.db_manager = DatabaseManager(self.temp_dir)
+        self.db_manager.initialize_database()
+        self.db_manager.add_history_entry("https://example.com/a", "A")
+        self.visited_filter = VisitedURLFilter(
+            os.path.join(self.temp_dir, VisitedURLFilter.FILENAME), 1000, 0.01, 1)
+        self.db_manager.attach_visited_filter(self.visited_filter)
+        self.visited_filter.start_rebuild(self.db_manager).join()
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def test_has_visited(self):
+        self.assertTrue(self.visited_filter.ready)
+        self.assertTrue(self.db_manager.has_visited("https://EXAMPLE.com/a#top"))
+        self.db_manager.add_history_entry("https://example.com/b", "B")
+        self.assertTrue(self.db_manager.has_visited("https://example.com/b"))
+
+        # Las respuestas negativas del filtro no abren SQLite
+        with mock.patch("browser.database.sqlite3.connect") as connect:
+            self.assertFalse(self.db_manager.has_visited("https://example.com/never"))
+            connect.assert_not_called()
+
+    def test_failed_rebuild_is_not_ready(self):
+        """Un error a mitad de la reconstrucción no deja un filtro con falsos negativos"""
+        self.db_manager.add_history_entry("https://example.com/b", "B")
+
+        def failing_urls():
+            yield "https://example.com/a"
+            raise sqlite3.OperationalError("disk I/O error")
+
+        visited_filter = VisitedURLFilter(
+            os.path.join(self.temp_dir, "failed.bloom"), 1000, 0.01, 1)
+        self.db_manager.attach_visited_filter(visited_filter)
+        with mock.patch.object(self.db_manager, "iter_history_urls", failing_urls):
+            visited_filter.start_rebuild(self.db_manager).join()
+
+        self.assertFalse(visited_filter.ready)
+        self.assertFalse(os.path.exists(visited_filter.path + ".tmp"))
+        # Sin filtro listo, la respuesta viene de SQLite
+        self.assertTrue(self.db_manager.has_visited("https://example.com/b"))
+
+    def test_iter_history_urls_raises(self):
+        """El recorrido no termina en silencio si SQLite falla"""
+        broken = DatabaseManager(self.temp_dir)
+        broken.db_path = os.path.join(self.temp_dir, "broken.db")
+        with open(broken.db_path, "wb") as f:
+            f.write(b"no es una base de datos" * 100)
+        with self.assertRaises(sqlite3.DatabaseError):
+            list(broken.iter_history_urls())
+
+    def test_favorites_mark_visited(self):
+        """La página de favoritos colorea los marcadores que están en el historial"""
+        self.db_manager.add_bookmark("https://example.com/a", "A")
+        self.db_manager.add_bookmark("https://example.com/never", "Nunca")
+        self.db_manager.add_bookmark_folder("Carpeta")
+
+        status, _, body = InternalPageRouter(self.db_manager).handle(
+            internal_url("favorites") + "/api/children")
+        self.assertEqual(status, 200)
+        visited = {item["title"]: item["visited"] for item in json.loads(body)["items"]}
+        self.assertEqual(visited, {"A": True, "Nunca": False, "Carpeta": False})
+
+if __name__ == "__main__":
+    unittest.main()
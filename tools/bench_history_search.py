@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Medir el rendimiento de la búsqueda en el historial en memoria
+Compara HistorySearchIndex (columnas en minúsculas construidas una vez) con
+el recorrido por entradas que usaba HistoryUtils.search_history_entries
+
+Uso: python tools/bench_history_search.py [entradas]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser.history_index import HAS_NUMPY, HistorySearchIndex
+
+# Una consulta frecuente (muchas coincidencias), selectivas, de varios términos y con erratas
+QUERIES = ['news', 'github', 'python docs', 'wiki 2024', 'gthub']
+
+COMMON_WORDS = ['news', 'mail', 'search', 'video', 'blog']
+SITE_WORDS = ['github', 'python', 'docs', 'wiki', 'maps', 'music', 'forum', 'cloud', 'sports']
+# Vocabulario sintético amplio, para que la mayoría de términos sean poco frecuentes
+SYLLABLES = ['ka', 'ro', 'mi', 'tel', 'san', 'po', 'lu', 'ver', 'di', 'na', 'gor', 'ex']
+WORDS = COMMON_WORDS + SITE_WORDS + [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+
+def scan_entries(entries: list, query: str) -> list:
+    """Implementación anterior de HistoryUtils.search_history_entries (sin títulos None)"""
+    query = query.lower()
+    results = []
+    for entry in entries:
+        url = entry.get('url', '').lower()
+        title = entry.get('title', '').lower()
+        if query in url or query in title:
+            results.append(entry)
+    return results
+
+def generate_history(count: int) -> list:
+    """Historial sintético con hosts, rutas y títulos variados"""
+    rng = random.Random(0)
+    entries = []
+    for i in range(count):
+        host = f"{rng.choice(WORDS)}{i % 500}.example.com"
+        path = '/'.join([rng.choice(COMMON_WORDS)] + rng.sample(WORDS, 2))
+        entries.append({
+            'id': i,
+            'url': f"https://www.{host}/{path}/{2000 + i % 30}",
+            'title': ' '.join(rng.sample(WORDS, 4)).title(),
+            'visit_count': rng.randint(1, 50),
+            'visit_time': f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d} 12:00:00",
+        })
+    return entries
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    """Función principal del benchmark"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    entries = generate_history(count)
+    print(f"{count} entradas (NumPy {'disponible' if HAS_NUMPY else 'no instalado'})")
+
+    variants = [('Índice (Python)', False)]
+    if HAS_NUMPY:
+        variants.append(('Índice (NumPy)', True))
+    indexes = []
+    for label, use_numpy in variants:
+        index, elapsed = timed(HistorySearchIndex, entries, use_numpy)
+        print(f"Construir {label:<20} {elapsed * 1000:9.1f} ms")
+        indexes.append((label, index))
+
+    for query in QUERIES:
+        print(f"'{query}'")
+        # El recorrido anterior solo busca la consulta entera como subcadena
+        results, elapsed = timed(scan_entries, entries, query)
+        print(f"  {'Recorrido por entradas':<28} {elapsed * 1000:9.1f} ms  ({len(results)} resultados)")
+        for label, index in indexes:
+            results, elapsed = timed(index.rank, query)
+            print(f"  {label:<28} {elapsed * 1000:9.1f} ms  ({len(results)} resultados, ordenados)")
+            results, elapsed = timed(index.rank, query, 20)
+            print(f"  {label + ', 20 mejores':<28} {elapsed * 1000:9.1f} ms")
+
+if __name__ == "__main__":
+    main()
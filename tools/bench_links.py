@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Medir el rendimiento de la extracción de enlaces
+Compara LinkExtractor (por trozos, conjunto ordenado) con la regex y la
+lista que usaba NetworkUtils.extract_links_from_html
+
+Uso: python tools/bench_links.py
+"""
+
+import os
+import re
+import sys
+import time
+from urllib.parse import urljoin
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser.link_extractor import iter_links
+
+CHUNK_SIZE = 64 * 1024
+
+def regex_links(html: str, base_url: str = '') -> list:
+    """Implementación anterior de NetworkUtils.extract_links_from_html"""
+    links = []
+    for match in re.findall(r'<a[^>]+href=["\']([^"\']+)["\'][^>]*>', html, re.IGNORECASE):
+        if base_url and not match.startswith(('http://', 'https://')):
+            link = urljoin(base_url, match)
+        else:
+            link = match
+        if link not in links:
+            links.append(link)
+    return links
+
+def streaming_links(html: str, base_url: str = '') -> list:
+    """LinkExtractor alimentado en trozos de CHUNK_SIZE, como al descargar"""
+    chunks = (html[i:i + CHUNK_SIZE] for i in range(0, len(html), CHUNK_SIZE))
+    return list(iter_links(chunks, base_url))
+
+def generate_page(anchors: int) -> str:
+    """Página con `anchors` enlaces distintos (mitad relativos) y algunos repetidos"""
+    parts = ['<html><head><title>Índice</title></head><body><ul>']
+    for i in range(anchors):
+        href = f"/articulo/{i}" if i % 2 else f"https://example.com/articulo/{i}"
+        parts.append(f'<li><a class="item" href="{href}">Artículo {i}</a> '
+                     f'<a href="/inicio">inicio</a></li>')
+    parts.append('</ul></body></html>')
+    return ''.join(parts)
+
+def run(label: str, function, html: str) -> float:
+    """Extraer los enlaces e imprimir el tiempo"""
+    start = time.perf_counter()
+    links = function(html, 'https://example.com/indice')
+    elapsed = time.perf_counter() - start
+    print(f"{label:<26} {elapsed * 1000:9.1f} ms  ({len(links)} enlaces)")
+    return elapsed
+
+def main():
+    """Función principal del benchmark"""
+    # Con la lista el tiempo se cuadruplica al duplicar los enlaces; con el conjunto, se duplica
+    for anchors in (5000, 10000, 20000, 40000):
+        html = generate_page(anchors)
+        print(f"{anchors} enlaces ({len(html) / 1e6:.1f} MB)")
+        run("  Regex + lista", regex_links, html)
+        run("  LinkExtractor", streaming_links, html)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Medir el rendimiento de la lista de sufijos públicos
+Calcula el dominio registrable de hosts generados: el recorrido del trie sin
+caché, hosts únicos (fallos de la caché LRU) y hosts repetidos (aciertos)
+
+Uso: python tools/bench_psl.py [número de hosts]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser import public_suffix
+from browser.public_suffix import registrable_domain
+
+SUFFIXES = ['com', 'org', 'net', 'de', 'co.uk', 'com.au', 'github.io', 'blogspot.com',
+            'kawasaki.jp', 'city.kawasaki.jp', 'xn--55qx5d.cn', 'unknowntld']
+SUBDOMAINS = ['', 'www.', 'cdn.', 'static.img.', 'a.b.c.', 'm.']
+
+def generate_hosts(count: int, distinct: int) -> list:
+    """Generar `count` hosts tomados de `distinct` hosts distintos"""
+    rng = random.Random(42)
+    pool = [f"{rng.choice(SUBDOMAINS)}site{i}.{rng.choice(SUFFIXES)}" for i in range(distinct)]
+    return [rng.choice(pool) for _ in range(count)]
+
+def run(label: str, hosts: list, function=registrable_domain):
+    """Calcular el dominio registrable de todos los hosts e imprimir la velocidad"""
+    start = time.perf_counter()
+    for host in hosts:
+        function(host)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {len(hosts) / elapsed / 1e6:6.2f} M hosts/s "
+          f"({elapsed / len(hosts) * 1e9:5.0f} ns/host)")
+
+def main():
+    """Función principal del benchmark"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    start = time.perf_counter()
+    public_suffix._load_trie()
+    print(f"Carga del trie: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    # Todos distintos: cada búsqueda recorre el trie
+    hosts = list(dict.fromkeys(generate_hosts(count, count)))
+    run("Sin caché (recorrido)", hosts, registrable_domain.__wrapped__)
+    # Los mismos hosts a través de la caché: recorrido más inserción y desalojo
+    registrable_domain.cache_clear()
+    run("Fallos de caché (únicos)", hosts)
+
+    # Navegación real: pocos miles de hosts que se repiten mucho
+    hosts = generate_hosts(count, 2000)
+    registrable_domain.cache_clear()
+    run("Con caché (2000 hosts)", hosts)
+    print(registrable_domain.cache_info())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Medir el rendimiento del sanitizador de HTML
+Compara HTMLSanitizer (una pasada, por trozos) con las sustituciones con
+expresiones regulares que usaba SecurityUtils.sanitize_html
+
+Uso: python tools/bench_sanitizer.py [MB]
+"""
+
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser.html_sanitizer import HTMLSanitizer
+
+CHUNK_SIZE = 64 * 1024
+
+def regex_sanitize(html: str) -> str:
+    """Implementación anterior de SecurityUtils.sanitize_html"""
+    for tag in ['script', 'object', 'embed', 'iframe']:
+        html = re.sub(f'<{tag}[^>]*>.*?</{tag}>', '', html, flags=re.IGNORECASE | re.DOTALL)
+    return html
+
+def streaming_sanitize(html: str) -> str:
+    """HTMLSanitizer alimentado en trozos de CHUNK_SIZE, como al descargar"""
+    sanitizer = HTMLSanitizer()
+    out = [sanitizer.feed(html[i:i + CHUNK_SIZE]) for i in range(0, len(html), CHUNK_SIZE)]
+    out.append(sanitizer.close())
+    return ''.join(out)
+
+def generate_page(size: int) -> str:
+    """Página típica: párrafos, enlaces, imágenes, scripts y estilos"""
+    block = ('<div class="post"><h2 onclick="track()">Título</h2>'
+             '<p>Texto con <a href="https://example.com/a?b=1&amp;c=2">enlace</a> y '
+             '<img src="/img.png" alt="imagen" onerror="x()"> &amp; entidades.</p>'
+             '<script>var data = {"a": "<b>no es html</b>"};</script>'
+             '<style>.post { color: red; }</style><!-- comentario --></div>\n')
+    return '<html><head><title>Bench</title></head><body>' + block * (size // len(block)) + '</body></html>'
+
+def generate_unclosed(count: int) -> str:
+    """Caso adverso: etiquetas peligrosas sin cerrar (cada una obliga a la regex a buscar hasta el final)"""
+    return '<iframe src=x>texto ' * count
+
+def generate_unmatched_closes(count: int) -> str:
+    """Caso adverso: muchas etiquetas abiertas y cierres de otra que nunca se abrió"""
+    return '<b>' * count + '</i>' * count
+
+def run(label: str, function, html: str) -> float:
+    """Sanitizar e imprimir el tiempo y la velocidad"""
+    start = time.perf_counter()
+    function(html)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed * 1000:9.1f} ms  {len(html) / elapsed / 1e6:7.1f} MB/s")
+    return elapsed
+
+def main():
+    """Función principal del benchmark"""
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+
+    html = generate_page(int(megabytes * 1024 * 1024))
+    print(f"Página de {len(html) / 1e6:.1f} MB")
+    run("Expresiones regulares (4 pasadas)", regex_sanitize, html)
+    run("HTMLSanitizer (1 pasada, trozos)", streaming_sanitize, html)
+
+    # La regex es cuadrática con etiquetas sin cerrar: se duplica el tamaño y el tiempo se cuadruplica
+    for count in (2500, 5000, 10000):
+        html = generate_unclosed(count)
+        print(f"{count} <iframe> sin cerrar ({len(html) / 1e3:.0f} KB)")
+        run("  Expresiones regulares", regex_sanitize, html)
+        run("  HTMLSanitizer", streaming_sanitize, html)
+
+    # Cada </i> sin abrir no debe recorrer la pila de <b> abiertas: el tiempo debe duplicarse, no cuadruplicarse
+    for count in (10000, 20000, 40000):
+        html = generate_unmatched_closes(count)
+        print(f"{count} <b> abiertas y {count} </i> sin abrir ({len(html) / 1e3:.0f} KB)")
+        run("  HTMLSanitizer", streaming_sanitize, html)
+
+if __name__ == "__main__":
+    main()
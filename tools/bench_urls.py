@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Medir el rendimiento del análisis de URLs
+Compara los helpers de URLUtils con urlparse en cada llamada (como antes de
+URLUtils.parse) y con la caché compartida de URLs analizadas
+
+Uso: python tools/bench_urls.py [número de llamadas]
+"""
+
+import os
+import random
+import re
+import sys
+import time
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser.utils import URLUtils
+
+def uncached_helpers(url: str):
+    """Lo que costaban get_domain, get_base_url, is_valid_url e is_secure por separado"""
+    parsed = urlparse(url)
+    parsed.netloc.lower()
+    parsed = urlparse(url)
+    f"{parsed.scheme}://{parsed.netloc}"
+    parsed = urlparse(url)
+    all([parsed.scheme, parsed.netloc])
+    url.startswith('https://')
+
+def cached_helpers(url: str):
+    """Los mismos helpers a través de URLUtils.parse"""
+    URLUtils.get_domain(url)
+    URLUtils.get_base_url(url)
+    URLUtils.is_valid_url(url)
+    URLUtils.is_secure(url)
+
+def recompiled_classifier(text: str) -> bool:
+    """MainWindow.is_valid_url tal como construía sus expresiones en cada llamada"""
+    url_pattern = re.compile(
+        r'^(?:http|ftp)s?://'
+        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|'
+        r'localhost|'
+        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'
+        r'(?::\d+)?'
+        r'(?:/?|[/?]\S+)$', re.IGNORECASE)
+    domain_pattern = re.compile(
+        r'^(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)$',
+        re.IGNORECASE)
+    return bool(url_pattern.match(text)) or bool(domain_pattern.match(text))
+
+def generate_urls(count: int, distinct: int) -> list:
+    """Generar `count` URLs tomadas de `distinct` URLs distintas"""
+    rng = random.Random(42)
+    pool = [f"{rng.choice(['http', 'https'])}://{rng.choice(['', 'www.', 'cdn.'])}"
+            f"site{i % 300}.{rng.choice(['com', 'co.uk', 'github.io'])}/page/{i}?q={i}"
+            for i in range(distinct)]
+    return [rng.choice(pool) for _ in range(count)]
+
+def run(label: str, function, items: list) -> float:
+    """Llamar a la función con todos los elementos e imprimir el tiempo por llamada"""
+    start = time.perf_counter()
+    for item in items:
+        function(item)
+    per_call = (time.perf_counter() - start) / len(items)
+    print(f"{label:<36} {per_call * 1e9:7.0f} ns/URL")
+    return per_call
+
+def main():
+    """Función principal del benchmark"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    urls = generate_urls(count, 2000)
+
+    before = run("urlparse en cada helper", uncached_helpers, urls)
+    URLUtils.parse.cache_clear()
+    after = run("URLUtils.parse con caché", cached_helpers, urls)
+    print(f"  x{before / after:.1f}  {URLUtils.parse.cache_info()}")
+
+    texts = [url.split('://', 1)[1] for url in urls[:count // 10]]
+    before = run("is_valid_url recompilando", recompiled_classifier, texts)
+    after = run("URLUtils.looks_like_url", URLUtils.looks_like_url, texts)
+    print(f"  x{before / after:.1f}")
+
+if __name__ == "__main__":
+    main()
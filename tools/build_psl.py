@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Compilar la lista de sufijos públicos
+Genera browser/public_suffix_trie.json a partir de public_suffix_list.dat
+
+Uso: python tools/build_psl.py [public_suffix_list.dat] [destino]
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser.public_suffix import SYSTEM_PSL_PATHS, TRIE_PATH, compile_rules
+
+def count_rules(node: dict) -> int:
+    """Contar los nodos del trie que terminan una regla"""
+    return sum(count_rules(child) if label else 1 for label, child in node.items())
+
+def main():
+    """Función principal del compilador"""
+    source = sys.argv[1] if len(sys.argv) > 1 else SYSTEM_PSL_PATHS[0]
+    target = sys.argv[2] if len(sys.argv) > 2 else TRIE_PATH
+
+    with open(source, encoding='utf-8') as f:
+        trie = compile_rules(f)
+
+    temp_path = target + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        # Sin espacios y con las claves ordenadas: el archivo es compacto y estable entre compilaciones
+        json.dump(trie, f, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+    os.replace(temp_path, target)
+
+    print(f"{count_rules(trie)} reglas, {os.path.getsize(target) // 1024} KB -> {target}")
+
+if __name__ == "__main__":
+    main()
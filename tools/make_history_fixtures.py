@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Generar historiales de prueba de Firefox y Chromium
+Crea places.sqlite y History pequeños con el esquema de cada navegador (solo
+las tablas y columnas que lee BrowserHistoryImporter), para probar la
+importación sin copiar el perfil de nadie
+
+Uso: python tools/make_history_fixtures.py [directorio]
+"""
+
+import os
+import sqlite3
+import sys
+from contextlib import closing
+from typing import Iterable, Optional, Tuple
+
+# Entrada de ejemplo: (url, título, visitas, última visita en segundos Unix o None)
+FixtureEntry = Tuple[str, Optional[str], int, Optional[int]]
+
+# Diferencia en segundos entre 1601-01-01 (época de Chromium) y 1970-01-01
+CHROMIUM_EPOCH_OFFSET = 11644473600
+
+SAMPLE_ENTRIES = [
+    ("https://www.python.org/", "Welcome to Python.org", 12, 1700000000),
+    ("https://docs.python.org/3/library/sqlite3.html", "sqlite3 — DB-API 2.0", 3, 1700003600),
+    # Misma URL canónica que la anterior: se fusionan (máximo de visitas y de fecha)
+    ("https://DOCS.python.org:443/3/library/sqlite3.html#module-sqlite3", "", 5, 1699990000),
+    ("http://example.com/search?q=navegador", "", 1, 1600000000),
+    # No se importan: sin visitas, sin fecha o con un esquema que no es http(s)
+    ("https://example.org/never-visited", "Nunca visitada", 0, None),
+    ("https://example.org/no-date", "Sin fecha", 2, None),
+    ("file:///home/user/notes.txt", "notes.txt", 4, 1700000500),
+    ("place:sort=8&maxResults=10", "Más visitados", 1, 1700000600),
+]
+
+FIREFOX_SCHEMA = '''
+    CREATE TABLE moz_places (
+        id INTEGER PRIMARY KEY,
+        url LONGVARCHAR,
+        title LONGVARCHAR,
+        rev_host LONGVARCHAR,
+        visit_count INTEGER DEFAULT 0,
+        hidden INTEGER DEFAULT 0 NOT NULL,
+        typed INTEGER DEFAULT 0 NOT NULL,
+        frecency INTEGER DEFAULT -1 NOT NULL,
+        last_visit_date INTEGER,
+        guid TEXT
+    );
+    CREATE TABLE moz_historyvisits (
+        id INTEGER PRIMARY KEY,
+        from_visit INTEGER,
+        place_id INTEGER,
+        visit_date INTEGER,
+        visit_type INTEGER,
+        session INTEGER
+    );
+'''
+
+CHROMIUM_SCHEMA = '''
+    CREATE TABLE urls (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        url LONGVARCHAR,
+        title LONGVARCHAR,
+        visit_count INTEGER DEFAULT 0 NOT NULL,
+        typed_count INTEGER DEFAULT 0 NOT NULL,
+        last_visit_time INTEGER NOT NULL,
+        hidden INTEGER DEFAULT 0 NOT NULL
+    );
+    CREATE TABLE visits (
+        id INTEGER PRIMARY KEY,
+        url INTEGER NOT NULL,
+        visit_time INTEGER NOT NULL,
+        from_visit INTEGER,
+        transition INTEGER DEFAULT 0 NOT NULL,
+        segment_id INTEGER,
+        visit_duration INTEGER DEFAULT 0 NOT NULL
+    );
+'''
+
+def create_firefox_history(path: str, entries: Iterable[FixtureEntry] = SAMPLE_ENTRIES) -> str:
+    """
+    Crear un places.sqlite de Firefox (fechas en microsegundos desde 1970)
+
+    Returns:
+        Ruta del archivo creado
+    """
+    with closing(sqlite3.connect(path)) as conn:
+        conn.executescript(FIREFOX_SCHEMA)
+        for place_id, (url, title, visit_count, last_visit) in enumerate(entries, start=1):
+            last_visit_date = last_visit * 1000000 if last_visit is not None else None
+            conn.execute(
+                "INSERT INTO moz_places (id, url, title, visit_count, last_visit_date, guid) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (place_id, url, title or None, visit_count, last_visit_date, f"guid{place_id:08d}"))
+            if last_visit_date is not None:
+                for _ in range(visit_count):
+                    conn.execute("INSERT INTO moz_historyvisits (place_id, visit_date, visit_type) "
+                                 "VALUES (?, ?, 1)", (place_id, last_visit_date))
+        conn.commit()
+    return path
+
+def create_chromium_history(path: str, entries: Iterable[FixtureEntry] = SAMPLE_ENTRIES) -> str:
+    """
+    Crear un History de Chromium (fechas en microsegundos desde 1601)
+
+    Returns:
+        Ruta del archivo creado
+    """
+    with closing(sqlite3.connect(path)) as conn:
+        conn.executescript(CHROMIUM_SCHEMA)
+        for url, title, visit_count, last_visit in entries:
+            # Chromium usa 0 para "nunca" y cadenas vacías en vez de NULL
+            last_visit_time = ((last_visit + CHROMIUM_EPOCH_OFFSET) * 1000000
+                               if last_visit is not None else 0)
+            cursor = conn.execute(
+                "INSERT INTO urls (url, title, visit_count, last_visit_time) VALUES (?, ?, ?, ?)",
+                (url, title or "", visit_count, last_visit_time))
+            if last_visit_time:
+                for _ in range(visit_count):
+                    conn.execute("INSERT INTO visits (url, visit_time) VALUES (?, ?)",
+                                 (cursor.lastrowid, last_visit_time))
+        conn.commit()
+    return path
+
+def main():
+    """Crear ambos historiales en el directorio indicado"""
+    directory = sys.argv[1] if len(sys.argv) > 1 else "history_fixtures"
+    os.makedirs(directory, exist_ok=True)
+    for name, create in (("places.sqlite", create_firefox_history),
+                         ("History", create_chromium_history)):
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            os.remove(path)
+        print(f"Creado {create(path)}")
+
+if __name__ == "__main__":
+    main()